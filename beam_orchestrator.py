@@ -2,6 +2,8 @@
 Orchestrateur Apache Beam + schedule
 - Exécute un job Beam toutes les 10 minutes
 - Le job peut lancer: export Data Lake, sync Data Warehouse, ou produire dans Kafka
+- Maintenance du Data Lake (conversion du tier chaud en Parquet, purge de la
+  corbeille) après chaque export, ou seule avec la tâche lake_maintenance
 - DirectRunner (local). Compatible Dataflow avec options appropriées.
 """
 import argparse
@@ -31,11 +33,32 @@ logger = logging.getLogger("beam_orchestrator")
 
 def task_export_datalake() -> str:
     import subprocess
-    cmd = [sys.executable, "export_to_data_lake.py", "--all"]
+    # Export incrémental: chaque exécution ne reprend que les nouveaux enregistrements
+    cmd = [sys.executable, "export_to_data_lake.py", "--all", "--incremental"]
+    res = subprocess.run(cmd, capture_output=True, text=True)
+    return res.stdout[-5000:] + task_lake_maintenance()
+
+
+def task_lake_tiering() -> str:
+    import subprocess
+    # Conversion des partitions fermées du tier chaud (Arrow IPC) en Parquet
+    cmd = [sys.executable, "lake_tiering.py"]
     res = subprocess.run(cmd, capture_output=True, text=True)
     return res.stdout[-5000:]
 
 
+def task_trash_purge() -> str:
+    import subprocess
+    # Purge des entrées de corbeille plus anciennes que le délai de grâce
+    cmd = [sys.executable, "lake_trash.py", "purge"]
+    res = subprocess.run(cmd, capture_output=True, text=True)
+    return res.stdout[-5000:]
+
+
+def task_lake_maintenance() -> str:
+    return task_lake_tiering() + task_trash_purge()
+
+
 def task_sync_warehouse(mysql_password: str) -> str:
     import subprocess
     cmd = [sys.executable, "sync_to_mysql.py", "--mysql-password", mysql_password]
@@ -98,6 +121,8 @@ def run_beam_job(task_name: str, mysql_password: str, topic: str, messages: int,
 
     if task_name == "export_datalake":
         fn = lambda: task_export_datalake()
+    elif task_name == "lake_maintenance":
+        fn = lambda: task_lake_maintenance()
     elif task_name == "sync_warehouse":
         fn = lambda: task_sync_warehouse(mysql_password)
     elif task_name == "kafka_produce":
@@ -133,7 +158,7 @@ def schedule_loop(task_name: str, every_minutes: int, mysql_password: str, topic
 
 def main():
     parser = argparse.ArgumentParser(description="Orchestrateur Apache Beam + schedule (toutes les 10 min)")
-    parser.add_argument("--task", choices=["export_datalake", "sync_warehouse", "kafka_produce"], required=True)
+    parser.add_argument("--task", choices=["export_datalake", "lake_maintenance", "sync_warehouse", "kafka_produce"], required=True)
     parser.add_argument("--every-minutes", type=int, default=10)
     parser.add_argument("--mysql-password", type=str, default="")
     parser.add_argument("--topic", type=str, default="transaction_stream")
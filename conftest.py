@@ -0,0 +1,133 @@
+"""
+Fixtures partagées des tests du Data Lake
+- lake: data lake vide sous tmp_path (dossiers et catalogue SQLite isolés)
+- ksqldb: serveur ksqlDB simulé derrière un vrai KsqlDBClient (endpoint /query)
+"""
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+import data_lake_config
+import lake_catalog
+from ksqldb_client import KsqlDBClient
+
+
+# Script de validation de l'installation, exécuté directement (python test_setup.py)
+collect_ignore = ["test_setup.py"]
+
+REPO_DIR = Path(__file__).parent
+
+LAKE_DIRS = ("STREAMS_DIR", "TABLES_DIR", "FEEDS_DIR", "LOGS_DIR", "CATALOG_DIR", "TRASH_DIR")
+
+
+@pytest.fixture
+def lake(tmp_path, monkeypatch) -> Path:
+    """
+    Data lake vide sous tmp_path
+    
+    Les chemins importés par nom (from data_lake_config import STREAMS_DIR...)
+    sont redirigés dans tous les modules du dépôt déjà importés, et le
+    catalogue partagé est remplacé par un catalogue vide.
+    """
+    root = tmp_path / "data_lake"
+    paths = {
+        "DATA_LAKE_ROOT": root,
+        "STREAMS_DIR": root / "streams",
+        "TABLES_DIR": root / "tables",
+        "FEEDS_DIR": root / "feeds",
+        "LOGS_DIR": root / "logs",
+        "CATALOG_DIR": root / "_catalog",
+        "TRASH_DIR": root / "_trash",
+        "QUERY_CACHE_DIR": root / "_catalog" / "query_cache",
+        "SCAN_CACHE_FILE": root / "_catalog" / "scan_cache.json",
+    }
+    originals = {name: getattr(data_lake_config, name) for name in paths}
+    
+    for module in list(sys.modules.values()):
+        module_file = getattr(module, "__file__", None)
+        if not module_file or Path(module_file).parent != REPO_DIR:
+            continue
+        for name, path in paths.items():
+            if getattr(module, name, None) == originals[name]:
+                monkeypatch.setattr(module, name, path)
+    
+    for name in LAKE_DIRS:
+        paths[name].mkdir(parents=True)
+    monkeypatch.setattr(lake_catalog, "_catalog", lake_catalog.LakeCatalog(paths["CATALOG_DIR"] / "catalog.db"))
+    return root
+
+
+class FakeQueryResponse:
+    """Réponse /query simulée: tableau JSON, un élément par ligne, lu en flux"""
+    
+    def __init__(self, messages: List[Dict]):
+        self.lines = [
+            ("[" if index == 0 else "") + json.dumps(message) + ("]" if index == len(messages) - 1 else ",")
+            for index, message in enumerate(messages)
+        ]
+    
+    def raise_for_status(self):
+        pass
+    
+    def iter_lines(self, decode_unicode: bool = False):
+        return iter(self.lines)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class FakeKsqlDB:
+    """
+    Serveur ksqlDB simulé (session HTTP du client)
+    
+    rows: (ROWTIME, valeurs) dans l'ordre du topic; les bornes ROWTIME > / <=
+    des requêtes sont appliquées, la pseudo-colonne ROWTIME est renvoyée
+    quand elle est projetée (SELECT ROWTIME, *). error_after: nombre de
+    lignes après lequel la réponse se termine par un errorMessage.
+    """
+    
+    def __init__(self):
+        self.columns: Dict[str, str] = {}
+        self.rows: List[Tuple[int, List]] = []
+        self.queries: List[str] = []
+        self.error_after: Optional[int] = None
+        self.client = KsqlDBClient("localhost", 8088, max_retries=0)
+        self.client.session = self
+    
+    def post(self, url: str, json: Dict, **kwargs) -> FakeQueryResponse:
+        query = json["ksql"]
+        self.queries.append(query)
+        since = re.search(r"ROWTIME > (\d+)", query)
+        until = re.search(r"ROWTIME <= (\d+)", query)
+        with_rowtime = query.startswith("SELECT ROWTIME")
+        
+        columns = ([("ROWTIME", "BIGINT")] if with_rowtime else []) + list(self.columns.items())
+        messages = [{"header": {"queryId": "q1", "schema": ", ".join(f"`{n}` {t}" for n, t in columns)}}]
+        for rowtime, values in self.rows:
+            if since and rowtime <= int(since.group(1)):
+                continue
+            if until and rowtime > int(until.group(1)):
+                continue
+            if self.error_after is not None and len(messages) - 1 == self.error_after:
+                messages.append({"errorMessage": {"@type": "generic_error", "message": "Query terminated"}})
+                return FakeQueryResponse(messages)
+            messages.append({"row": {"columns": ([rowtime] if with_rowtime else []) + list(values)}})
+        
+        messages.append({"finalMessage": "Query Completed"})
+        return FakeQueryResponse(messages)
+    
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def ksqldb() -> FakeKsqlDB:
+    """Serveur ksqlDB simulé; ksqldb.client est un KsqlDBClient qui l'interroge"""
+    return FakeKsqlDB()
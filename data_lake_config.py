@@ -1,10 +1,18 @@
 """
 Configuration centralisée pour le Data Lake
 """
+import inspect
+import json
+import logging
 import os
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from enum import Enum
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
 
 
 class StorageMode(Enum):
@@ -34,12 +42,20 @@ STREAMS_DIR = DATA_LAKE_ROOT / "streams"
 TABLES_DIR = DATA_LAKE_ROOT / "tables"
 FEEDS_DIR = DATA_LAKE_ROOT / "feeds"
 LOGS_DIR = DATA_LAKE_ROOT / "logs"
+CATALOG_DIR = DATA_LAKE_ROOT / "_catalog"
+TRASH_DIR = DATA_LAKE_ROOT / "_trash"
+QUERY_CACHE_DIR = CATALOG_DIR / "query_cache"
+SCAN_CACHE_FILE = CATALOG_DIR / "scan_cache.json"
 
 # Configuration ksqlDB
 KSQLDB_CONFIG = {
     "host": "localhost",
     "port": 8088,
-    "timeout": 30
+    "timeout": 30,
+    "pool_size": 10,         # Connexions keep-alive conservées dans le pool
+    "max_retries": 3,        # Retries sur erreurs de connexion et 429/5xx
+    "backoff_factor": 0.5,   # Backoff exponentiel entre retries (secondes)
+    "use_http2": False       # Endpoint /query-stream en HTTP/2 (nécessite httpx[http2])
 }
 
 # Configuration des streams ksqlDB
@@ -117,12 +133,83 @@ TABLES_CONFIG: Dict[str, dict] = {
 # Format de stockage
 STORAGE_FORMAT = "parquet"
 
+# Tier chaud des streams: fichiers Arrow IPC non compressés (lecture en
+# memory-map), convertis en Parquet quand la partition est fermée: jour passé
+# et aucune écriture depuis HOT_TIER_GRACE_MINUTES (cf. lake_tiering.py)
+HOT_FILE_SUFFIX = ".arrow"
+HOT_TIER_GRACE_MINUTES = 15
+
+# Fichiers temporaires d'écriture (<feed>/_tmp/.<fichier>.<pid>.<thread>.tmp) non modifiés
+# depuis ce délai: écrivain interrompu, supprimés au démarrage (cf. lake_writer.py)
+ORPHAN_TMP_MAX_AGE_MINUTES = 60
+
 # Compression Parquet (gzip, snappy, zstd, lz4)
 PARQUET_COMPRESSION = "snappy"
 
+# Options d'écriture Parquet par défaut, surchargeables par feed via la section
+# "parquet" du JSON du feed (feeds/active/<feed>.json, cf. parquet_benchmark.py)
+DEFAULT_PARQUET_OPTIONS = {
+    "compression": PARQUET_COMPRESSION,
+    "compression_level": None,   # ex: 1-22 pour zstd, 1-9 pour gzip
+    "use_dictionary": True,      # bool ou liste de colonnes
+    "row_group_size": None,      # lignes par row group (None = ~TARGET_ROW_GROUP_BYTES)
+    "data_page_size": None,      # octets par page de données (None = défaut pyarrow)
+    "cluster_by": None,          # colonnes de clustering à l'écriture (lake_clustering.py)
+    "cluster_method": "sort",    # sort, zorder ou hilbert
+    "bloom_filter_columns": None,  # colonnes avec bloom filter (liste ou {colonne: {"ndv", "fpp"}})
+    "write_page_index": False,   # index de pages (column/offset index) pour toutes les colonnes
+    "write_workers": None        # threads d'encodage des gros snapshots (None = PARQUET_WRITE_WORKERS)
+}
+
+# Taille cible (non compressée) d'un row group quand row_group_size n'est pas fixé
+TARGET_ROW_GROUP_BYTES = 128 * 1024 * 1024
+
+# Encodage parallèle des gros snapshots: un fichier part par thread, à partir
+# de PARALLEL_WRITE_MIN_ROWS lignes (cf. lake_writer.write_parquet_parallel)
+PARQUET_WRITE_WORKERS = os.cpu_count() or 4
+PARALLEL_WRITE_MIN_ROWS = 1_000_000
+
+# Nombre de buckets par défaut d'un stream bucketé (partition bucket=NN sous day=)
+DEFAULT_NUM_BUCKETS = 16
+
+# Nombre de threads pour le parcours des partitions (rapports, métadonnées)
+SCAN_WORKERS = 8
+
+# Colonnes dont les min/max/nulls sont indexés (catalogue) pour l'élagage
+STATISTICS_COLUMNS = ["timestamp", "user_id", "amount", "currency"]
+
 # Taille des batches pour l'export
 BATCH_SIZE = 10000
 
+# Nombre de feeds exportés en parallèle (export --all)
+EXPORT_WORKERS = 4
+
+# Export incrémental: le watermark est le plus grand ROWTIME reçu moins cette
+# marge (enregistrements en retard de moins de la marge relus au run suivant);
+# la fenêtre retenue est exportée une fois la marge écoulée sans ligne plus
+# récente (stream inactif); surchargeable par stream (clé "safety_lag_seconds"
+# de STREAMS_CONFIG)
+EXPORT_SAFETY_LAG_SECONDS = 300
+
+# Rétention: nombre de feeds nettoyés en parallèle
+RETENTION_WORKERS = 4
+
+# Rétention d'un stream (section "retention" du JSON du feed):
+# - "partition": suppression des partitions day= entièrement expirées
+# - "row": suppression ligne à ligne sur time_column (fichiers à cheval sur le
+#   cutoff réécrits, cf. data_retention_manager.cleanup_stream_rows)
+DEFAULT_RETENTION_OPTIONS = {
+    "mode": "partition",
+    "time_column": "timestamp"
+}
+RETENTION_MODES = ("partition", "row")
+
+# Corbeille (cf. lake_trash.py): les suppressions sont des renommages dans
+# TRASH_DIR, annulables pendant TRASH_GRACE_HOURS puis purgées en arrière-plan
+# à TRASH_PURGE_DELETES_PER_SECOND fichiers par seconde au plus
+TRASH_GRACE_HOURS = 24
+TRASH_PURGE_DELETES_PER_SECOND = 500
+
 # Configuration des logs
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_LEVEL = "INFO"
@@ -148,6 +235,131 @@ def get_version_partition_path(base_path: Path, version: int) -> Path:
     return base_path / f"version=v{version}"
 
 
+def get_bucket_partition_path(partition_path: Path, bucket: int) -> Path:
+    """Retourne le chemin d'un bucket sous une partition par date"""
+    return partition_path / f"bucket={bucket:02d}"
+
+
+def get_feed_file(feed_name: str) -> Path:
+    """Retourne le fichier de configuration JSON d'un feed actif"""
+    return FEEDS_DIR / "active" / f"{feed_name}.json"
+
+
+def get_parquet_options(feed_name: str) -> Dict:
+    """Options d'écriture Parquet d'un feed (défauts + section "parquet" du JSON du feed)"""
+    options = dict(DEFAULT_PARQUET_OPTIONS)
+    feed_file = get_feed_file(feed_name)
+    
+    if feed_file.exists():
+        try:
+            with open(feed_file, 'r') as f:
+                options.update(json.load(f).get("parquet", {}))
+        except (OSError, ValueError):
+            pass
+    
+    return options
+
+
+def get_bucketing(feed_name: str) -> Optional[Dict]:
+    """
+    Bucketing d'un stream (section "partitioning" du JSON du feed)
+    
+    Returns:
+        {"column", "num_buckets"}, ou None si le feed n'est pas bucketé
+    """
+    feed_file = get_feed_file(feed_name)
+    if not feed_file.exists():
+        return None
+    
+    try:
+        with open(feed_file, 'r') as f:
+            partitioning = json.load(f).get("partitioning", {})
+    except (OSError, ValueError):
+        return None
+    
+    if not partitioning.get("bucket_by"):
+        return None
+    return {
+        "column": partitioning["bucket_by"],
+        "num_buckets": partitioning.get("num_buckets", DEFAULT_NUM_BUCKETS)
+    }
+
+
+def get_retention_options(feed_name: str) -> Dict:
+    """Options de rétention d'un stream (défauts + section "retention" du JSON du feed)"""
+    options = dict(DEFAULT_RETENTION_OPTIONS)
+    feed_file = get_feed_file(feed_name)
+    
+    if feed_file.exists():
+        try:
+            with open(feed_file, 'r') as f:
+                options.update(json.load(f).get("retention", {}))
+        except (OSError, ValueError):
+            pass
+    
+    return options
+
+
+def save_parquet_options(feed_name: str, options: Dict) -> Dict:
+    """Enregistre les options Parquet dans le JSON du feed"""
+    feed_file = get_feed_file(feed_name)
+    if not feed_file.exists():
+        raise ValueError(f"Feed inconnu: {feed_name} ({feed_file} absent)")
+    
+    unknown = set(options) - set(DEFAULT_PARQUET_OPTIONS)
+    if unknown:
+        raise ValueError(f"Options Parquet inconnues: {', '.join(sorted(unknown))}")
+    
+    with open(feed_file, 'r') as f:
+        feed_config = json.load(f)
+    
+    feed_config.setdefault("parquet", {}).update(options)
+    feed_config["updated_at"] = datetime.now().isoformat()
+    
+    with open(feed_file, 'w') as f:
+        json.dump(feed_config, f, indent=2)
+    
+    return feed_config["parquet"]
+
+
+@lru_cache(maxsize=None)
+def parquet_writer_supports(argument: str) -> bool:
+    """
+    Indique si la version de pyarrow installée accepte un argument d'écriture
+    
+    write_page_index et bloom_filter_options n'existent que dans les versions
+    récentes: l'option est ignorée (avec un avertissement) plutôt que de faire
+    échouer l'écriture.
+    """
+    import pyarrow.parquet as pq
+    
+    supported = argument in inspect.signature(pq.write_table).parameters
+    if not supported:
+        logger.warning(f"Option Parquet {argument} non supportée par cette version de pyarrow: ignorée")
+    return supported
+
+
+def parquet_writer_kwargs(options: Dict) -> Dict:
+    """Arguments de pq.ParquetWriter / pq.write_table correspondant aux options d'un feed"""
+    kwargs = {
+        "compression": options["compression"],
+        "use_dictionary": options["use_dictionary"],
+        "write_statistics": True
+    }
+    if options.get("compression_level") is not None:
+        kwargs["compression_level"] = options["compression_level"]
+    if options.get("data_page_size") is not None:
+        kwargs["data_page_size"] = options["data_page_size"]
+    if options.get("write_page_index") and parquet_writer_supports("write_page_index"):
+        kwargs["write_page_index"] = True
+    if options.get("bloom_filter_columns") and parquet_writer_supports("bloom_filter_options"):
+        bloom_columns = options["bloom_filter_columns"]
+        if isinstance(bloom_columns, list):
+            bloom_columns = {column: True for column in bloom_columns}
+        kwargs["bloom_filter_options"] = bloom_columns
+    return kwargs
+
+
 def ensure_directories():
     """Crée la structure de dossiers du data lake"""
     directories = [
@@ -157,7 +369,9 @@ def ensure_directories():
         FEEDS_DIR,
         FEEDS_DIR / "active",
         FEEDS_DIR / "archived",
-        LOGS_DIR
+        LOGS_DIR,
+        CATALOG_DIR,
+        TRASH_DIR
     ]
     
     for directory in directories:
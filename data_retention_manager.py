@@ -1,17 +1,41 @@
 """
 Gestionnaire de Rétention des Données
 Supprime automatiquement les données historiques selon les politiques définies
+- Feeds indépendants nettoyés en parallèle
+- Partitions expirées mises à la corbeille (renommage, purge différée et
+  limitée en débit par lake_trash.py)
+- Journal des suppressions écrit en une insertion multi-lignes par exécution
+- Mode "row" (section "retention" du feed): suppression ligne à ligne, seuls
+  les fichiers à cheval sur le cutoff sont lus et réécrits
 """
 import logging
+import os
+import re
 import sys
-import shutil
-from datetime import datetime, timedelta
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Optional, Tuple
 import mysql.connector
 from mysql.connector import Error
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
-from data_lake_config import STREAMS_DIR, TABLES_DIR, LOGS_DIR
+from data_lake_config import (
+    STREAMS_DIR, TABLES_DIR, LOGS_DIR, HOT_FILE_SUFFIX,
+    RETENTION_WORKERS,
+    get_date_partition_path, get_bucketing, get_parquet_options,
+    get_retention_options, parquet_writer_kwargs
+)
+from lake_catalog import get_catalog, parse_partition
+from lake_metadata import (
+    extract_file_statistics, read_metadata, record_file_written,
+    record_files_removed, record_partition_removed
+)
+from lake_trash import move_to_trash
+from lake_writer import row_group_rows, write_parquet_atomic
 
 
 # Configuration du logging
@@ -31,20 +55,27 @@ logger = logging.getLogger(__name__)
 class DataRetentionManager:
     """Gestionnaire de rétention des données"""
     
-    def __init__(self, mysql_config: dict, dry_run: bool = False):
+    def __init__(
+        self,
+        mysql_config: dict,
+        dry_run: bool = False,
+        workers: int = RETENTION_WORKERS
+    ):
         """
         Initialise le gestionnaire de rétention
         
         Args:
             mysql_config: Configuration MySQL
             dry_run: Si True, simule les suppressions sans les effectuer
+            workers: Nombre de feeds nettoyés en parallèle
         """
         self.mysql_config = mysql_config
         self.dry_run = dry_run
+        self.workers = max(1, workers)
         self.mysql_connection = None
         self.mysql_cursor = None
         
-        logger.info(f"DataRetentionManager initialisé (dry_run={dry_run})")
+        logger.info(f"DataRetentionManager initialisé (dry_run={dry_run}, workers={self.workers})")
     
     def connect_mysql(self):
         """Établit la connexion à MySQL"""
@@ -85,10 +116,90 @@ class DataRetentionManager:
         logger.info(f"Récupéré {len(policies)} politiques de rétention actives")
         return policies
     
+    @staticmethod
+    def _expired_subtree(stream_path: Path, year: int, month: int, day: int, cutoff: date) -> Path:
+        """
+        Plus haut dossier d'une partition expirée entièrement antérieur au cutoff
+        
+        year=YYYY si l'année entière est passée, sinon month=MM si le mois
+        entier l'est, sinon day=DD: un seul renommage (corbeille) par sous-arbre expiré.
+        """
+        day_dir = get_date_partition_path(stream_path, year, month, day)
+        if year < cutoff.year:
+            return day_dir.parent.parent
+        if (year, month) < (cutoff.year, cutoff.month):
+            return day_dir.parent
+        return day_dir
+    
+    @staticmethod
+    def _scan_tree(path: Path) -> Tuple[int, int]:
+        """Nombre de fichiers de données (Parquet et tier chaud Arrow) et taille d'un sous-arbre, en une passe scandir"""
+        file_count = 0
+        size_bytes = 0
+        stack = [path]
+        
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    size_bytes += entry.stat(follow_symlinks=False).st_size
+                    if entry.name.endswith((".parquet", HOT_FILE_SUFFIX)) and not entry.name.startswith("."):
+                        file_count += 1
+        
+        return file_count, size_bytes
+    
+    @staticmethod
+    def _partition_value(directory: Path) -> Optional[int]:
+        """Valeur entière d'un dossier de partition (year=2024 -> 2024), None si invalide"""
+        try:
+            return int(directory.name.split("=", 1)[1])
+        except (IndexError, ValueError):
+            return None
+    
+    def _expired_subtrees_from_disk(self, stream_path: Path, cutoff: date) -> List[Path]:
+        """
+        Sous-arbres expirés d'un stream non catalogué
+        
+        Seuls l'année et le mois du cutoff sont parcourus en détail: les années
+        et mois entièrement passés sont retenus sans être listés, les années
+        postérieures ne sont pas ouvertes.
+        """
+        subtrees = []
+        
+        for year_dir in sorted(stream_path.glob("year=*")):
+            year = self._partition_value(year_dir)
+            if year is None or year > cutoff.year:
+                continue
+            if year < cutoff.year:
+                subtrees.append(year_dir)
+                continue
+            
+            for month_dir in sorted(year_dir.glob("month=*")):
+                month = self._partition_value(month_dir)
+                if month is None or month > cutoff.month:
+                    continue
+                if month < cutoff.month:
+                    subtrees.append(month_dir)
+                    continue
+                
+                for day_dir in sorted(month_dir.glob("day=*")):
+                    day = self._partition_value(day_dir)
+                    if day is not None and day < cutoff.day:
+                        subtrees.append(day_dir)
+        
+        return subtrees
+    
     def cleanup_stream_data(self, feed_name: str, retention_days: int) -> Tuple[int, float]:
         """
         Supprime les données de stream plus anciennes que retention_days
         
+        Les partitions expirées sont regroupées en sous-arbres year= / month=
+        / day= entièrement antérieurs au cutoff, mis chacun à la corbeille en
+        un renommage: le coût dépend du nombre de partitions expirées, pas du
+        nombre total de fichiers du stream.
+        
         Returns:
             (nombre de fichiers supprimés, taille en MB)
         """
@@ -98,48 +209,316 @@ class DataRetentionManager:
             logger.warning(f"Chemin stream non trouvé: {stream_path}")
             return 0, 0.0
         
-        cutoff_date = datetime.now() - timedelta(days=retention_days)
+        cutoff = (datetime.now() - timedelta(days=retention_days)).date()
         files_deleted = 0
         size_deleted = 0.0
         
-        logger.info(f"Nettoyage stream {feed_name}: suppression avant {cutoff_date.date()}")
+        logger.info(f"Nettoyage stream {feed_name}: suppression avant {cutoff}")
+        
+        # Partitions expirées lues dans le catalogue (tailles et comptes inclus),
+        # sinon sous-arbres expirés trouvés sur disque et mesurés en une passe
+        catalog = get_catalog()
+        expired: Dict[Path, Dict[str, int]] = {}
+        if catalog.has_feed(stream_path):
+            for partition in catalog.list_partitions(stream_path, before=cutoff):
+                subtree = self._expired_subtree(
+                    stream_path, partition["year"], partition["month"], partition["day"], cutoff
+                )
+                totals = expired.setdefault(subtree, {"files_count": 0, "size_bytes": 0})
+                totals["files_count"] += partition["files_count"]
+                totals["size_bytes"] += partition["size_bytes"]
+        else:
+            for subtree in self._expired_subtrees_from_disk(stream_path, cutoff):
+                try:
+                    file_count, size_bytes = self._scan_tree(subtree)
+                except OSError as e:
+                    logger.error(f"Erreur lors du traitement de {subtree}: {e}")
+                    continue
+                expired[subtree] = {"files_count": file_count, "size_bytes": size_bytes}
         
-        # Parcourir les partitions par date
-        for year_dir in stream_path.glob("year=*"):
-            year = int(year_dir.name.split("=")[1])
+        for subtree, totals in sorted(expired.items()):
+            file_count = totals["files_count"]
+            partition_size = totals["size_bytes"] / (1024 * 1024)  # MB
             
-            for month_dir in year_dir.glob("month=*"):
-                month = int(month_dir.name.split("=")[1])
+            try:
+                if not self.dry_run:
+                    move_to_trash(subtree, stream_path, "retention")
+                    record_partition_removed(stream_path, subtree)
+                    logger.info(f"✓ Mis à la corbeille: {subtree} ({file_count} fichiers, {partition_size:.2f} MB)")
+                else:
+                    logger.info(f"[DRY RUN] Supprimerait: {subtree} ({file_count} fichiers, {partition_size:.2f} MB)")
                 
-                for day_dir in month_dir.glob("day=*"):
-                    day = int(day_dir.name.split("=")[1])
-                    
-                    try:
-                        partition_date = datetime(year, month, day)
-                        
-                        if partition_date < cutoff_date:
-                            # Calculer la taille
-                            partition_size = sum(
-                                f.stat().st_size for f in day_dir.rglob("*") if f.is_file()
-                            ) / (1024 * 1024)  # MB
-                            
-                            # Compter les fichiers
-                            file_count = len(list(day_dir.rglob("*.parquet")))
-                            
-                            if not self.dry_run:
-                                shutil.rmtree(day_dir)
-                                logger.info(f"✓ Supprimé: {day_dir} ({file_count} fichiers, {partition_size:.2f} MB)")
-                            else:
-                                logger.info(f"[DRY RUN] Supprimerait: {day_dir} ({file_count} fichiers, {partition_size:.2f} MB)")
-                            
-                            files_deleted += file_count
-                            size_deleted += partition_size
-                    
-                    except (ValueError, OSError) as e:
-                        logger.error(f"Erreur lors du traitement de {day_dir}: {e}")
+                files_deleted += file_count
+                size_deleted += partition_size
+            
+            except OSError as e:
+                logger.error(f"Erreur lors du traitement de {subtree}: {e}")
         
         return files_deleted, size_deleted
     
+    @staticmethod
+    def _list_stream_files(stream_path: Path) -> List[Tuple[Path, Optional[int], Optional[int]]]:
+        """
+        Fichiers de données d'un stream: (chemin, lignes, octets)
+        
+        Lignes et octets viennent du catalogue; None pour un stream non
+        catalogué (lus seulement pour les fichiers supprimés ou réécrits).
+        """
+        catalog = get_catalog()
+        if catalog.has_feed(stream_path):
+            return [
+                (stream_path / entry["partition_path"] / entry["file_name"], entry["records"], entry["size_bytes"])
+                for entry in catalog.list_files(stream_path)
+            ]
+        return [
+            (file_path, None, None)
+            for file_path in sorted(stream_path.rglob("*"))
+            if file_path.name.endswith((".parquet", HOT_FILE_SUFFIX)) and not file_path.name.startswith(".")
+        ]
+    
+    @staticmethod
+    def _as_datetime(value: Any) -> Optional[datetime]:
+        """Valeur min/max de l'index (ISO 8601) en datetime, None si inexploitable"""
+        if value is None:
+            return None
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _before(value: datetime, cutoff: datetime) -> bool:
+        """value < cutoff (cutoff en heure locale, converti si value porte un fuseau)"""
+        if value.tzinfo is not None:
+            cutoff = cutoff.astimezone()
+        return value < cutoff
+    
+    def _time_range(
+        self,
+        stream_path: Path,
+        file_path: Path,
+        statistics: Dict[Path, Dict],
+        time_column: str
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """
+        Min/max de la colonne horodatée d'un fichier, sans lire ses données
+        
+        Statistiques du catalogue, sinon footer Parquet (colonne non indexée,
+        fichier absent de l'index); (None, None) si les statistiques manquent.
+        """
+        file_stats = statistics.get(file_path) or {}
+        column_stats = file_stats.get("columns", {}).get(time_column)
+        
+        if column_stats is None:
+            try:
+                column_stats = extract_file_statistics(file_path, [time_column])["columns"].get(time_column)
+            except Exception as e:
+                logger.warning(f"Statistiques non lues pour {file_path}: {e}")
+        
+        if not column_stats:
+            return None, None
+        return self._as_datetime(column_stats.get("min")), self._as_datetime(column_stats.get("max"))
+    
+    @staticmethod
+    def _file_entry(file_path: Path, records: Optional[int], size_bytes: Optional[int]) -> Tuple[Path, int, int]:
+        """(chemin, lignes, octets) d'un fichier, complété par son footer hors catalogue"""
+        if records is None:
+            records = pq.ParquetFile(file_path).metadata.num_rows
+        if size_bytes is None:
+            size_bytes = file_path.stat().st_size
+        return file_path, records, size_bytes
+    
+    @staticmethod
+    def _remove_empty_parents(path: Path, stream_path: Path):
+        """Supprime les dossiers de partition devenus vides (day= d'un stream bucketé...)"""
+        parent = path.parent
+        while parent != stream_path and stream_path in parent.parents:
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+    
+    def _rewrite_file(
+        self,
+        stream_path: Path,
+        feed_name: str,
+        entry: Tuple[Path, int, int],
+        time_column: str,
+        cutoff: datetime
+    ) -> Tuple[int, int]:
+        """
+        Réécrit un fichier à cheval sur le cutoff avec ses seules lignes récentes
+        
+        Le filtre est évalué par pyarrow.dataset (vectorisé, row groups
+        entièrement expirés écartés par leurs statistiques). Le fichier réécrit
+        est publié et enregistré avant que l'original parte à la corbeille.
+        
+        Returns:
+            (lignes supprimées, octets libérés)
+        """
+        file_path, records, size_bytes = entry
+        dataset = ds.dataset(file_path, format="parquet")
+        
+        if time_column not in dataset.schema.names:
+            raise ValueError(f"Colonne horodatée absente de {file_path.name}: {time_column}")
+        field_type = dataset.schema.field(time_column).type
+        if not pa.types.is_timestamp(field_type):
+            raise ValueError(f"Colonne {time_column} de type {field_type}, timestamp attendu")
+        
+        value = cutoff.astimezone() if field_type.tz else cutoff
+        keep = (ds.field(time_column) >= pa.scalar(value, type=field_type)) | ds.field(time_column).is_null()
+        
+        if self.dry_run:
+            return records - dataset.count_rows(filter=keep), 0
+        
+        table = dataset.to_table(filter=keep)
+        removed = records - table.num_rows
+        if removed == 0:
+            return 0, 0
+        
+        partition_path = file_path.parent
+        new_size = 0
+        new_path = None
+        
+        if table.num_rows > 0:
+            options = get_parquet_options(feed_name)
+            stem = re.sub(r"_r\d{8}_\d{6}$", "", file_path.stem)
+            new_path = partition_path / f"{stem}_r{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
+            write_parquet_atomic(
+                table,
+                new_path,
+                row_group_size=row_group_rows(table, options),
+                **parquet_writer_kwargs(options)
+            )
+            new_size = new_path.stat().st_size
+            
+            metadata = read_metadata(stream_path) or {}
+            partition_key = str(partition_path.relative_to(stream_path))
+            record_file_written(
+                stream_path,
+                feed_name,
+                metadata.get("type", "stream"),
+                metadata.get("storage_mode", "append"),
+                metadata.get("partitioning", "date"),
+                partition_path,
+                new_path,
+                table.num_rows,
+                new_size,
+                bucketing=get_bucketing(feed_name) if parse_partition(partition_key)["bucket"] is not None else None
+            )
+        
+        move_to_trash(file_path, stream_path, "retention_rewrite")
+        record_files_removed(stream_path, partition_path, [entry])
+        
+        logger.info(
+            f"✓ Réécrit: {file_path.relative_to(stream_path)} -> "
+            f"{new_path.name if new_path else '(vide)'} ({removed:,} lignes expirées sur {records:,})"
+        )
+        return removed, size_bytes - new_size
+    
+    def cleanup_stream_rows(self, feed_name: str, retention_days: int, time_column: str) -> Tuple[int, float]:
+        """
+        Supprime les lignes de stream plus anciennes que retention_days (mode "row")
+        
+        Les fichiers sont classés sans lire leurs données, d'après les min/max
+        de time_column (index de statistiques, sinon footer):
+        - max < cutoff: fichier expiré, mis à la corbeille sans être lu (la
+          partition entière en un renommage si tous ses fichiers le sont)
+        - min < cutoff <= max (ou statistiques absentes): fichier à cheval,
+          réécrit avec ses seules lignes récentes
+        - min >= cutoff: fichier conservé
+        Les lignes sans horodatage sont conservées. Les fichiers du tier chaud
+        (Arrow) sont convertis en Parquet avant d'expirer et ne sont pas traités.
+        
+        Returns:
+            (nombre de fichiers supprimés ou réécrits, taille libérée en MB)
+        """
+        stream_path = STREAMS_DIR / feed_name
+        
+        if not stream_path.exists():
+            logger.warning(f"Chemin stream non trouvé: {stream_path}")
+            return 0, 0.0
+        
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        logger.info(
+            f"Nettoyage stream {feed_name} (lignes): suppression avant "
+            f"{cutoff:%Y-%m-%d %H:%M:%S} sur {time_column}"
+        )
+        
+        statistics = get_catalog().get_file_statistics(stream_path)
+        expired: Dict[Path, List[Tuple[Path, Optional[int], Optional[int]]]] = {}
+        straddling: List[Tuple[Path, Optional[int], Optional[int]]] = []
+        kept_partitions = set()
+        
+        for file_path, records, size_bytes in self._list_stream_files(stream_path):
+            if file_path.name.endswith(HOT_FILE_SUFFIX):
+                kept_partitions.add(file_path.parent)
+                continue
+            
+            low, high = self._time_range(stream_path, file_path, statistics, time_column)
+            if high is not None and self._before(high, cutoff):
+                expired.setdefault(file_path.parent, []).append((file_path, records, size_bytes))
+                continue
+            
+            kept_partitions.add(file_path.parent)
+            if low is None or self._before(low, cutoff):
+                straddling.append((file_path, records, size_bytes))
+        
+        files_deleted = 0
+        bytes_freed = 0
+        rows_deleted = 0
+        
+        for partition_path, files in sorted(expired.items()):
+            try:
+                entries = [self._file_entry(*entry) for entry in files]
+                partition_bytes = sum(entry[2] for entry in entries)
+                whole_partition = partition_path not in kept_partitions and partition_path != stream_path
+                target = partition_path if whole_partition else f"{len(entries)} fichier(s) de {partition_path}"
+                
+                if self.dry_run:
+                    logger.info(f"[DRY RUN] Supprimerait: {target} ({partition_bytes / (1024 * 1024):.2f} MB)")
+                elif whole_partition:
+                    move_to_trash(partition_path, stream_path, "retention")
+                    record_partition_removed(stream_path, partition_path)
+                    self._remove_empty_parents(partition_path, stream_path)
+                    logger.info(f"✓ Mis à la corbeille: {target} ({partition_bytes / (1024 * 1024):.2f} MB)")
+                else:
+                    for file_path, _, _ in entries:
+                        move_to_trash(file_path, stream_path, "retention")
+                    record_files_removed(stream_path, partition_path, entries)
+                    logger.info(f"✓ Mis à la corbeille: {target} ({partition_bytes / (1024 * 1024):.2f} MB)")
+                
+                files_deleted += len(entries)
+                bytes_freed += partition_bytes
+                rows_deleted += sum(entry[1] for entry in entries)
+            
+            except OSError as e:
+                logger.error(f"Erreur lors du traitement de {partition_path}: {e}")
+        
+        for file_entry in straddling:
+            try:
+                removed, freed = self._rewrite_file(
+                    stream_path, feed_name, self._file_entry(*file_entry), time_column, cutoff
+                )
+            except (OSError, ValueError, pa.ArrowException) as e:
+                logger.error(f"Erreur lors de la réécriture de {file_entry[0]}: {e}")
+                continue
+            
+            if removed == 0:
+                continue
+            if self.dry_run:
+                logger.info(f"[DRY RUN] Réécrirait: {file_entry[0]} ({removed:,} lignes expirées)")
+            files_deleted += 1
+            bytes_freed += freed
+            rows_deleted += removed
+        
+        logger.info(
+            f"Stream {feed_name}: {rows_deleted:,} lignes expirées, "
+            f"{len(straddling)} fichier(s) à cheval sur le cutoff examiné(s)"
+        )
+        return files_deleted, bytes_freed / (1024 * 1024)
+    
     def cleanup_table_data(self, feed_name: str, retention_versions: int) -> Tuple[int, float]:
         """
         Supprime les anciennes versions de table au-delà de retention_versions
@@ -171,17 +550,14 @@ class DataRetentionManager:
         logger.info(f"Nettoyage table {feed_name}: suppression de {len(versions_to_delete)} anciennes versions")
         
         for version_dir in versions_to_delete:
-            # Calculer la taille
-            version_size = sum(
-                f.stat().st_size for f in version_dir.rglob("*") if f.is_file()
-            ) / (1024 * 1024)  # MB
-            
-            # Compter les fichiers
-            file_count = len(list(version_dir.rglob("*.parquet")))
+            # Compter les fichiers et calculer la taille en une passe
+            file_count, size_bytes = self._scan_tree(version_dir)
+            version_size = size_bytes / (1024 * 1024)  # MB
             
             if not self.dry_run:
-                shutil.rmtree(version_dir)
-                logger.info(f"✓ Supprimé: {version_dir} ({file_count} fichiers, {version_size:.2f} MB)")
+                move_to_trash(version_dir, table_path, "retention")
+                record_partition_removed(table_path, version_dir)
+                logger.info(f"✓ Mis à la corbeille: {version_dir} ({file_count} fichiers, {version_size:.2f} MB)")
             else:
                 logger.info(f"[DRY RUN] Supprimerait: {version_dir} ({file_count} fichiers, {version_size:.2f} MB)")
             
@@ -190,89 +566,141 @@ class DataRetentionManager:
         
         return files_deleted, size_deleted
     
-    def log_deletion(self, feed_name: str, feed_type: str, folder_path: str,
-                     files_deleted: int, size_deleted: float, user_id: int = 1):
-        """Enregistre la suppression dans le journal"""
+    def log_deletions(self, results: List[Dict], user_id: int = 1):
+        """
+        Enregistre les suppressions d'une exécution dans le journal
+        
+        Une seule insertion multi-lignes dans data_deletion_log et une seule
+        mise à jour de last_cleanup_at, validées par un commit unique.
+        """
+        if not results:
+            return
+        
         if self.dry_run:
-            logger.info(f"[DRY RUN] Enregistrerait la suppression: {feed_name}")
+            logger.info(f"[DRY RUN] Enregistrerait {len(results)} suppression(s) dans le journal")
             return
         
-        query = """
+        insert_query = """
         INSERT INTO data_deletion_log (
             feed_name, feed_type, folder_path, deletion_type,
             files_deleted, size_deleted_mb, deleted_by, notes
-        ) VALUES (
-            %s, %s, %s, 'retention', %s, %s, %s, 'Automatic retention cleanup'
+        ) VALUES
+        """ + ", ".join(
+            ["(%s, %s, %s, 'retention', %s, %s, %s, 'Automatic retention cleanup')"] * len(results)
         )
+        insert_params = [
+            value
+            for result in results
+            for value in (
+                result["feed_name"], result["feed_type"], result["folder_path"],
+                result["files"], result["size"], user_id
+            )
+        ]
+        
+        policy_ids = [result["policy_id"] for result in results]
+        update_query = f"""
+        UPDATE data_retention_policies
+        SET last_cleanup_at = CURRENT_TIMESTAMP
+        WHERE policy_id IN ({", ".join(["%s"] * len(policy_ids))})
         """
         
         try:
-            self.mysql_cursor.execute(query, (
-                feed_name, feed_type, folder_path,
-                files_deleted, size_deleted, user_id
-            ))
+            self.mysql_cursor.execute(insert_query, insert_params)
+            self.mysql_cursor.execute(update_query, policy_ids)
             self.mysql_connection.commit()
-            logger.info(f"✓ Suppression enregistrée dans le journal")
+            logger.info(f"✓ {len(results)} suppression(s) enregistrée(s) dans le journal")
         except Error as e:
-            logger.error(f"Erreur lors de l'enregistrement de la suppression: {e}")
+            self.mysql_connection.rollback()
+            logger.error(f"Erreur lors de l'enregistrement des suppressions: {e}")
     
-    def update_last_cleanup(self, policy_id: int):
-        """Met à jour la date du dernier nettoyage"""
-        if self.dry_run:
-            return
+    def cleanup_policy(self, policy: Dict) -> Optional[Dict]:
+        """
+        Applique une politique de rétention (exécuté sur un worker)
         
-        query = """
-        UPDATE data_retention_policies
-        SET last_cleanup_at = CURRENT_TIMESTAMP
-        WHERE policy_id = %s
+        Returns:
+            {"policy_id", "feed_name", "feed_type", "folder_path", "files", "size"},
+            None si la politique est incomplète
         """
+        feed_name = policy['feed_name']
+        feed_type = policy['feed_type']
         
-        try:
-            self.mysql_cursor.execute(query, (policy_id,))
-            self.mysql_connection.commit()
-        except Error as e:
-            logger.error(f"Erreur lors de la mise à jour de last_cleanup_at: {e}")
+        logger.info(f"--- Traitement: {feed_name} ({feed_type}) ---")
+        
+        if feed_type == 'stream':
+            retention = get_retention_options(feed_name)
+            if retention["mode"] == "row":
+                files, size = self.cleanup_stream_rows(
+                    feed_name, policy['retention_days'], retention["time_column"]
+                )
+            else:
+                files, size = self.cleanup_stream_data(feed_name, policy['retention_days'])
+            folder_path = str(STREAMS_DIR / feed_name)
+        
+        else:  # table
+            retention_versions = policy['retention_versions']
+            if retention_versions is None:
+                logger.warning(f"Pas de retention_versions défini pour {feed_name}")
+                return None
+            files, size = self.cleanup_table_data(feed_name, retention_versions)
+            folder_path = str(TABLES_DIR / feed_name)
+        
+        return {
+            "policy_id": policy['policy_id'],
+            "feed_name": feed_name,
+            "feed_type": feed_type,
+            "folder_path": folder_path,
+            "files": files,
+            "size": size
+        }
     
     def run_cleanup(self):
-        """Exécute le nettoyage selon les politiques de rétention"""
+        """
+        Exécute le nettoyage selon les politiques de rétention
+        
+        Les feeds sont nettoyés en parallèle (un feed par worker); l'échec
+        d'un feed n'interrompt pas les autres. Les workers ne font que
+        renommer les partitions expirées dans la corbeille: la suppression
+        des fichiers, limitée en débit, est faite plus tard par
+        lake_trash.purge_trash. Le journal MySQL n'est écrit qu'une fois, en
+        fin d'exécution, depuis le thread principal.
+        """
         logger.info("🚀 Démarrage du nettoyage des données historiques")
+        start = time.perf_counter()
         
         try:
             self.connect_mysql()
             policies = self.get_retention_policies()
             
-            total_files = 0
-            total_size = 0.0
-            
-            for policy in policies:
-                feed_name = policy['feed_name']
-                feed_type = policy['feed_type']
-                
-                logger.info(f"\n--- Traitement: {feed_name} ({feed_type}) ---")
-                
-                if feed_type == 'stream':
-                    retention_days = policy['retention_days']
-                    files, size = self.cleanup_stream_data(feed_name, retention_days)
-                    folder_path = str(STREAMS_DIR / feed_name)
-                
-                else:  # table
-                    retention_versions = policy['retention_versions']
-                    if retention_versions is None:
-                        logger.warning(f"Pas de retention_versions défini pour {feed_name}")
+            results = []
+            failed = []
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(self.cleanup_policy, policy): policy for policy in policies}
+                for future in as_completed(futures):
+                    policy = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Erreur lors du nettoyage de {policy['feed_name']}: {e}")
+                        failed.append(policy['feed_name'])
                         continue
-                    files, size = self.cleanup_table_data(feed_name, retention_versions)
-                    folder_path = str(TABLES_DIR / feed_name)
-                
-                if files > 0:
-                    self.log_deletion(feed_name, feed_type, folder_path, files, size)
-                    self.update_last_cleanup(policy['policy_id'])
-                
-                total_files += files
-                total_size += size
+                    if result is not None:
+                        results.append(result)
+            
+            deleted = sorted(
+                (result for result in results if result["files"] > 0),
+                key=lambda result: (result["feed_type"], result["feed_name"])
+            )
+            self.log_deletions(deleted)
+            
+            total_files = sum(result["files"] for result in results)
+            total_size = sum(result["size"] for result in results)
             
-            logger.info(f"\n✓ Nettoyage terminé:")
+            logger.info(f"\n✓ Nettoyage terminé en {time.perf_counter() - start:.1f}s:")
+            logger.info(f"  - Feeds traités: {len(results)}")
             logger.info(f"  - Fichiers supprimés: {total_files}")
-            logger.info(f"  - Espace libéré: {total_size:.2f} MB")
+            logger.info(f"  - Espace libéré après purge de la corbeille: {total_size:.2f} MB")
+            if failed:
+                logger.warning(f"  - Feeds en échec: {', '.join(sorted(failed))}")
             
             if self.dry_run:
                 logger.info("\n⚠️  Mode DRY RUN: Aucune suppression réelle effectuée")
@@ -303,6 +731,12 @@ def main():
         action="store_true",
         help="Simule les suppressions sans les effectuer"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=RETENTION_WORKERS,
+        help="Nombre de feeds nettoyés en parallèle"
+    )
     
     args = parser.parse_args()
     
@@ -317,7 +751,11 @@ def main():
     }
     
     try:
-        manager = DataRetentionManager(mysql_config, dry_run=args.dry_run)
+        manager = DataRetentionManager(
+            mysql_config,
+            dry_run=args.dry_run,
+            workers=args.workers
+        )
         manager.run_cleanup()
     
     except Exception as e:
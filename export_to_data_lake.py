@@ -2,25 +2,40 @@
 Script d'export des données ksqlDB vers le Data Lake
 """
 import argparse
+import hashlib
 import json
 import logging
+import math
 import sys
-from datetime import datetime, timedelta
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, time as dt_time
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-import requests
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional
+import numpy as np
 import pandas as pd
 import pyarrow as pa
-import pyarrow.parquet as pq
+import pyarrow.compute as pc
 
 from data_lake_config import (
-    KSQLDB_CONFIG, STREAMS_CONFIG, TABLES_CONFIG,
+    KSQLDB_CONFIG, STREAMS_CONFIG, TABLES_CONFIG, STREAMS_DIR, TABLES_DIR,
     StorageMode, FeedType, PartitioningType,
     get_stream_path, get_table_path,
     get_date_partition_path, get_version_partition_path,
-    STORAGE_FORMAT, PARQUET_COMPRESSION, BATCH_SIZE,
+    STORAGE_FORMAT, BATCH_SIZE, EXPORT_WORKERS, EXPORT_SAFETY_LAG_SECONDS,
+    get_parquet_options, get_bucketing, parquet_writer_kwargs,
     LOG_FORMAT, LOG_LEVEL, LOGS_DIR, ensure_directories
 )
+from ksqldb_client import ROWTIME_COLUMN, KsqlDBClient
+from lake_bucketing import bucket_file_path, split_by_bucket
+from lake_catalog import get_catalog
+from lake_clustering import cluster_table
+from lake_metadata import (
+    read_metadata, record_file_written, record_files_removed, record_partition_removed, write_json_atomic
+)
+from lake_trash import move_to_trash
+from lake_writer import AtomicParquetWriter, cleanup_orphans, row_group_full, write_parquet_parallel
 
 
 # Configuration du logging
@@ -37,61 +52,157 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-class KsqlDBClient:
-    """Client pour interagir avec ksqlDB"""
-    
-    def __init__(self, host: str, port: int, timeout: int = 30):
-        self.base_url = f"http://{host}:{port}"
-        self.timeout = timeout
-        logger.info(f"Initialisation du client ksqlDB: {self.base_url}")
-    
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
-        """Exécute une requête ksqlDB et retourne les résultats"""
-        url = f"{self.base_url}/query"
-        payload = {
-            "ksql": query,
-            "streamsProperties": {}
-        }
+class ContentHasher:
+    """
+    Empreinte du contenu indépendante de l'ordre des lignes, calculée au fil des batches
+    
+    Chaque ligne est hachée (hash vectorisé pandas), puis les hash sont
+    combinés par sommes modulo 2^64: deux snapshots avec les mêmes lignes,
+    dans n'importe quel ordre, ont la même empreinte.
+    """
+    
+    def __init__(self):
+        self.row_count = 0
+        self.schema: Optional[pa.Schema] = None
+        self._sum_hash = np.uint64(0)
+        self._sum_mixed = np.uint64(0)
+    
+    def update(self, batch: pa.RecordBatch):
+        if self.schema is None:
+            self.schema = batch.schema
         
-        try:
-            logger.debug(f"Exécution de la requête: {query}")
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=self.timeout,
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
+        with np.errstate(over='ignore'):
+            df = _hashable_frame(batch)
+            hashes = pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
             
-            # Parser la réponse (format JSON délimité par des lignes)
-            results = []
-            for line in response.text.strip().split('\n'):
-                if line:
-                    data = json.loads(line)
-                    if 'row' in data:
-                        results.append(data['row']['columns'])
+            # Deuxième combinaison pour limiter les collisions des sommes
+            mixed = (hashes ^ (hashes >> np.uint64(29))) * np.uint64(0xBF58476D1CE4E5B9)
             
-            logger.info(f"Requête réussie: {len(results)} lignes récupérées")
-            return results
-        
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erreur lors de l'exécution de la requête: {e}")
-            raise
+            self._sum_hash += hashes.sum(dtype=np.uint64)
+            self._sum_mixed += mixed.sum(dtype=np.uint64)
+        self.row_count += batch.num_rows
     
-    def get_stream_data(self, stream_name: str, limit: Optional[int] = None) -> pd.DataFrame:
-        """Récupère les données d'un stream"""
-        query = f"SELECT * FROM {stream_name} EMIT CHANGES"
-        if limit:
-            query += f" LIMIT {limit}"
-        
-        results = self.execute_query(query)
-        return pd.DataFrame(results) if results else pd.DataFrame()
+    def hash_batches(self, batches: Iterable[pa.RecordBatch]) -> Iterator[pa.RecordBatch]:
+        """Laisse passer les batches en les ajoutant à l'empreinte"""
+        for batch in batches:
+            self.update(batch)
+            yield batch
     
-    def get_table_data(self, table_name: str) -> pd.DataFrame:
-        """Récupère les données d'une table (snapshot)"""
-        query = f"SELECT * FROM {table_name}"
-        results = self.execute_query(query)
-        return pd.DataFrame(results) if results else pd.DataFrame()
+    def hexdigest(self) -> str:
+        digest = hashlib.sha256()
+        digest.update(str(self.schema or pa.schema([])).encode())
+        digest.update(f"{self.row_count}:{int(self._sum_hash)}:{int(self._sum_mixed)}".encode())
+        return digest.hexdigest()
+
+
+def compute_content_hash(batches: Iterable[pa.RecordBatch]) -> str:
+    """Empreinte du contenu indépendante de l'ordre des lignes (voir ContentHasher)"""
+    hasher = ContentHasher()
+    for batch in batches:
+        hasher.update(batch)
+    return hasher.hexdigest()
+
+
+def split_by_day(table: pa.Table, column: str) -> Dict[date, pa.Table]:
+    """
+    Découpe une table par jour (heure locale) d'une colonne de ms epoch (ROWTIME)
+    
+    Les bornes des jours sont calculées en Python (changements d'heure
+    compris), l'affectation des lignes est vectorisée.
+    """
+    if table.num_rows == 0:
+        return {}
+    
+    rowtimes = table.column(column)
+    first = datetime.fromtimestamp(pc.min(rowtimes).as_py() / 1000).date()
+    last = datetime.fromtimestamp(pc.max(rowtimes).as_py() / 1000).date()
+    
+    parts = {}
+    day = first
+    while day <= last:
+        start = int(datetime.combine(day, dt_time()).timestamp() * 1000)
+        end = int(datetime.combine(day + timedelta(days=1), dt_time()).timestamp() * 1000)
+        part = table.filter(pc.and_(pc.greater_equal(rowtimes, start), pc.less(rowtimes, end)))
+        if part.num_rows:
+            parts[day] = part
+        day += timedelta(days=1)
+    return parts
+
+
+def hold_back(
+    batches: Iterable[pa.RecordBatch],
+    lag_ms: int,
+    state: Dict,
+    idle_before: Optional[int] = None
+) -> Iterator[pa.RecordBatch]:
+    """
+    Ne laisse passer que les lignes de ROWTIME <= borne de sécurité
+    
+    La borne est le plus grand ROWTIME reçu moins lag_ms. Quand ce plus grand
+    ROWTIME est antérieur à idle_before (horloge - marge: le stream n'a rien
+    reçu de récent), toute la fenêtre est libérée, sans quoi les dernières
+    lignes d'un stream inactif resteraient en attente indéfiniment.
+    Les lignes au-delà de la borne sont abandonnées en fin de lecture: elles
+    seront relues au run suivant. state["max_rowtime"] contient le plus grand
+    ROWTIME reçu, state["until"] la borne finale (nouveau watermark).
+    """
+    held: Optional[pa.Table] = None
+    
+    for batch in batches:
+        if batch.num_rows == 0:
+            continue
+        table = pa.Table.from_batches([batch])
+        batch_max = pc.max(table.column(ROWTIME_COLUMN)).as_py()
+        state["max_rowtime"] = max(state.get("max_rowtime", batch_max), batch_max)
+        state["until"] = state["max_rowtime"] - lag_ms
+        if idle_before is not None:
+            state["until"] = max(state["until"], min(state["max_rowtime"], idle_before))
+        
+        if held is not None:
+            table = pa.concat_tables([held, table], promote_options="default")
+        ready = pc.less_equal(table.column(ROWTIME_COLUMN), state["until"])
+        held = table.filter(pc.invert(ready))
+        
+        released = table.filter(ready)
+        if released.num_rows:
+            yield from released.to_batches()
+
+
+def write_row_groups(writer: AtomicParquetWriter, table: pa.Table, options: Dict, encoding: Dict):
+    """
+    Écrit des lignes accumulées: row groups de row_group_size lignes (option du
+    feed), sinon un seul row group; cumule octets, row groups et temps d'encodage
+    """
+    row_group_size = options["row_group_size"] or table.num_rows
+    start = time.perf_counter()
+    writer.write_table(table, row_group_size=row_group_size)
+    encoding["seconds"] = encoding.get("seconds", 0.0) + time.perf_counter() - start
+    encoding["bytes"] = encoding.get("bytes", 0) + table.nbytes
+    encoding["row_groups"] = encoding.get("row_groups", 0) + math.ceil(table.num_rows / row_group_size)
+
+
+def log_encoding(name: str, encoding: Dict, files: int):
+    """Journalise le débit d'encodage d'une écriture Parquet en flux (comme write_parquet_parallel)"""
+    size_mb = encoding.get("bytes", 0) / (1024 * 1024)
+    seconds = encoding.get("seconds", 0.0)
+    logger.info(
+        f"Encodage Parquet {name}: {size_mb:.1f} MB en {seconds:.2f}s "
+        f"({size_mb / max(seconds, 1e-9):.1f} MB/s, {files} fichier(s), "
+        f"{encoding.get('row_groups', 0)} row group(s))"
+    )
+
+
+def _hashable_frame(batch: pa.RecordBatch) -> pd.DataFrame:
+    """Convertit un batch en DataFrame hachable (colonnes imbriquées sérialisées en JSON)"""
+    columns = {}
+    for field, column in zip(batch.schema, batch.columns):
+        if pa.types.is_nested(field.type):
+            columns[field.name] = [
+                json.dumps(value, sort_keys=True, default=str) for value in column.to_pylist()
+            ]
+        else:
+            columns[field.name] = column.to_pandas()
+    return pd.DataFrame(columns)
 
 
 class DataLakeExporter:
@@ -100,10 +211,28 @@ class DataLakeExporter:
     def __init__(self, ksqldb_client: KsqlDBClient):
         self.client = ksqldb_client
         ensure_directories()
+        
+        # Fichiers temporaires laissés par un export interrompu
+        cleanup_orphans([STREAMS_DIR, TABLES_DIR])
         logger.info("DataLakeExporter initialisé")
     
-    def export_stream(self, stream_name: str, config: dict, date: Optional[datetime] = None):
-        """Exporte un stream vers le data lake"""
+    def export_stream(
+        self,
+        stream_name: str,
+        config: dict,
+        date: Optional[datetime] = None,
+        incremental: bool = False
+    ):
+        """
+        Exporte un stream vers le data lake
+        
+        En mode incrémental, seuls les enregistrements arrivés depuis le
+        dernier export (watermark ROWTIME) sont exportés, chacun dans la
+        partition du jour de son ROWTIME (date est alors ignorée).
+        
+        Returns:
+            Statistiques de l'export ({"records", "bytes", "path"}), None si rien n'a été écrit
+        """
         if not config.get('enabled', True):
             logger.info(f"Stream {stream_name} désactivé, skip")
             return
@@ -115,13 +244,6 @@ class DataLakeExporter:
             date = datetime.now()
         
         try:
-            # Récupérer les données du stream
-            df = self.client.get_stream_data(stream_name)
-            
-            if df.empty:
-                logger.warning(f"Aucune donnée pour {stream_name}")
-                return
-            
             # Chemin de base du stream
             base_path = get_stream_path(stream_name)
             
@@ -132,33 +254,216 @@ class DataLakeExporter:
                 date.month,
                 date.day
             )
-            partition_path.mkdir(parents=True, exist_ok=True)
             
             # Nom du fichier avec timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             file_path = partition_path / f"data_{timestamp}.parquet"
             
-            # Mode APPEND: toujours ajouter un nouveau fichier
-            self._write_parquet(df, file_path, StorageMode.APPEND)
+            # Bucketing optionnel: un fichier par bucket=NN sous la partition du jour
+            bucketing = get_bucketing(stream_name)
             
-            # Mettre à jour les métadonnées
+            # Mode APPEND: toujours ajouter un nouveau fichier, écrit au fil des batches
+            if incremental:
+                written = self._export_stream_incremental(
+                    stream_name, config, base_path, file_path.name, bucketing
+                )
+            else:
+                written = self._write_stream_files(
+                    self.client.iter_stream_data(stream_name),
+                    file_path,
+                    stream_name,
+                    bucketing
+                )
+                # Mettre à jour les métadonnées
+                self._record_stream_files(base_path, stream_name, config, written, bucketing)
+            
+            records = sum(written.values())
+            if records == 0:
+                logger.warning(f"Aucune donnée pour {stream_name}")
+                return
+            
+            if incremental:
+                # Fichiers répartis par jour de ROWTIME: chemin du plus récent
+                file_path = max(written)
+                partitions = {
+                    path.parent.parent if bucketing else path.parent for path in written
+                }
+                logger.info(
+                    f"✓ Stream {stream_name} exporté: {records} lignes -> "
+                    f"{len(written)} fichiers dans {len(partitions)} partitions (dernier: {file_path})"
+                )
+            elif bucketing:
+                logger.info(
+                    f"✓ Stream {stream_name} exporté: {records} lignes -> "
+                    f"{file_path.name} dans {len(written)} buckets de {partition_path}"
+                )
+            else:
+                logger.info(f"✓ Stream {stream_name} exporté: {records} lignes -> {file_path}")
+            return self._export_stats(records, file_path, list(written))
+        
+        except Exception as e:
+            logger.error(f"Erreur lors de l'export du stream {stream_name}: {e}")
+            raise
+    
+    def _export_stream_incremental(
+        self,
+        stream_name: str,
+        config: dict,
+        base_path: Path,
+        file_name: str,
+        bucketing: Optional[Dict] = None
+    ) -> Dict[Path, int]:
+        """
+        Exporte les enregistrements d'un stream arrivés depuis le watermark
+        
+        Le watermark est le plus grand ROWTIME reçu moins une marge de sécurité
+        (safety_lag_seconds): les lignes plus récentes que cette borne ne sont
+        pas écrites et seront relues au run suivant, ce qui couvre les
+        enregistrements arrivés en retard dans le topic. Une fois la marge
+        écoulée à l'horloge sans ligne plus récente (stream inactif), la
+        fenêtre retenue est exportée. Chaque ligne est rangée dans la
+        partition du jour de son ROWTIME.
+        Le watermark n'avance qu'une fois les fichiers complètement écrits et
+        enregistrés; un export interrompu est rejoué depuis l'ancien watermark.
+        
+        Returns:
+            {fichier écrit: nombre de lignes}
+        """
+        watermark = self._read_watermark(base_path)
+        
+        # Un export précédent interrompu a pu laisser des fichiers publiés
+        # sans que le watermark n'avance
+        pending = watermark.pop("pending", None)
+        if pending:
+            self._discard_pending_files(base_path, pending)
+            self._write_watermark(base_path, watermark)
+        
+        since_rowtime = watermark.get("rowtime")
+        lag_ms = int(config.get("safety_lag_seconds", EXPORT_SAFETY_LAG_SECONDS) * 1000)
+        received: Dict[str, int] = {}
+        
+        def split(table: pa.Table) -> Dict[Path, pa.Table]:
+            parts = {}
+            for day, part in split_by_day(table, ROWTIME_COLUMN).items():
+                part = part.drop_columns([ROWTIME_COLUMN])
+                path = get_date_partition_path(base_path, day.year, day.month, day.day) / file_name
+                if bucketing:
+                    for bucket, bucket_part in split_by_bucket(
+                        part, bucketing["column"], bucketing["num_buckets"]
+                    ).items():
+                        parts[bucket_file_path(path, bucket)] = bucket_part
+                else:
+                    parts[path] = part
+            return parts
+        
+        def before_publish(paths: List[Path]):
+            watermark["pending"] = {
+                "files": [str(path.relative_to(base_path)) for path in paths],
+                "started_at": datetime.now().isoformat()
+            }
+            self._write_watermark(base_path, watermark)
+        
+        logger.info(
+            f"Export incrémental de {stream_name}: ROWTIME > {since_rowtime} "
+            f"(marge de sécurité {lag_ms // 1000}s)"
+        )
+        written = self._write_split_parquet(
+            hold_back(
+                self.client.iter_stream_data(stream_name, since_rowtime=since_rowtime, with_rowtime=True),
+                lag_ms,
+                received,
+                idle_before=int(datetime.now().timestamp() * 1000) - lag_ms
+            ),
+            split,
+            StorageMode.APPEND,
+            stream_name,
+            before_publish
+        )
+        self._record_stream_files(base_path, stream_name, config, written, bucketing)
+        
+        # Fichiers publiés et enregistrés: avancer le watermark
+        watermark.pop("pending", None)
+        if "max_rowtime" in received:
+            watermark["rowtime"] = max(since_rowtime or 0, received["until"])
+            watermark["max_rowtime_received"] = received["max_rowtime"]
+        watermark.update({
+            "stream": stream_name,
+            "last_records": sum(written.values()),
+            "updated_at": datetime.now().isoformat()
+        })
+        self._write_watermark(base_path, watermark)
+        
+        return written
+    
+    def _discard_pending_files(self, base_path: Path, pending: dict):
+        """Supprime les fichiers d'un export incrémental interrompu (et leur entrée au catalogue)"""
+        # Ancien format: un fichier (ou un fichier par bucket) sous la partition du jour
+        if "file" in pending:
+            pending_file = base_path / pending["file"]
+            files = [pending_file]
+            if pending_file.parent.exists():
+                files += list(pending_file.parent.glob(f"bucket=*/{pending_file.name}"))
+        else:
+            files = [base_path / name for name in pending.get("files", [])]
+        
+        catalog = get_catalog()
+        for stale_file in files:
+            entry = next(
+                (e for e in catalog.list_files(base_path, str(stale_file.parent.relative_to(base_path)))
+                 if e["file_name"] == stale_file.name),
+                None
+            )
+            if stale_file.exists():
+                logger.warning(f"Suppression du fichier d'un export interrompu: {stale_file}")
+                stale_file.unlink()
+            if entry is not None:
+                record_files_removed(
+                    base_path, stale_file.parent, [(stale_file, entry["records"], entry["size_bytes"])]
+                )
+    
+    def _record_stream_files(
+        self,
+        base_path: Path,
+        stream_name: str,
+        config: dict,
+        written: Dict[Path, int],
+        bucketing: Optional[Dict] = None
+    ):
+        """Enregistre dans les métadonnées les fichiers écrits d'un stream"""
+        for written_path, file_records in written.items():
             self._update_metadata(
                 base_path,
                 stream_name,
                 FeedType.STREAM,
                 config,
-                df,
-                partition_path
+                file_records,
+                written_path.parent,
+                written_path,
+                bucketing=bucketing
             )
-            
-            logger.info(f"✓ Stream {stream_name} exporté: {len(df)} lignes -> {file_path}")
+    
+    def _read_watermark(self, base_path: Path) -> dict:
+        """Lit le watermark d'export incrémental d'un stream"""
+        watermark_file = base_path / "_watermark.json"
         
-        except Exception as e:
-            logger.error(f"Erreur lors de l'export du stream {stream_name}: {e}")
-            raise
+        if not watermark_file.exists():
+            return {}
+        
+        with open(watermark_file, 'r') as f:
+            return json.load(f)
+    
+    def _write_watermark(self, base_path: Path, watermark: dict):
+        """Enregistre le watermark (écriture atomique)"""
+        base_path.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(base_path / "_watermark.json", watermark)
     
     def export_table(self, table_name: str, config: dict, version: Optional[int] = None):
-        """Exporte une table vers le data lake"""
+        """
+        Exporte une table vers le data lake
+        
+        Returns:
+            Statistiques de l'export ({"records", "bytes", "path"}), None si rien n'a été écrit
+        """
         if not config.get('enabled', True):
             logger.info(f"Table {table_name} désactivée, skip")
             return
@@ -166,74 +471,358 @@ class DataLakeExporter:
         logger.info(f"Export de la table: {table_name}")
         
         try:
-            # Récupérer les données de la table
-            df = self.client.get_table_data(table_name)
-            
-            if df.empty:
-                logger.warning(f"Aucune donnée pour {table_name}")
-                return
-            
             # Chemin de base de la table
             base_path = get_table_path(table_name)
             
-            # Déterminer la version
+            # Empreinte de la dernière version (snapshot inchangé: pas de publication)
+            latest_hash = None
             if version is None:
+                latest_hash = self._get_latest_content_hash(base_path)
                 version = self._get_next_version(base_path)
             
-            # Créer le chemin de partition par version
+            # Chemin de partition par version
             partition_path = get_version_partition_path(base_path, version)
-            partition_path.mkdir(parents=True, exist_ok=True)
             
             # Nom du fichier avec timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             file_path = partition_path / f"snapshot_{timestamp}.parquet"
             
-            # Mode OVERWRITE: remplacer la version existante
-            self._write_parquet(df, file_path, StorageMode.OVERWRITE)
-            
-            # Mettre à jour les métadonnées
-            self._update_metadata(
-                base_path,
+            # Mode OVERWRITE: le snapshot est lu et écrit au fil des batches dans
+            # un fichier temporaire, en calculant son empreinte; il n'est publié
+            # que si l'empreinte diffère de celle de la dernière version
+            hasher = ContentHasher()
+            written = self._write_snapshot(
+                hasher.hash_batches(self.client.iter_table_data(table_name)),
+                file_path,
                 table_name,
-                FeedType.TABLE,
-                config,
-                df,
-                partition_path
+                publish_if=lambda: hasher.hexdigest() != latest_hash
             )
+            records = hasher.row_count
+            content_hash = hasher.hexdigest()
+            
+            if records == 0:
+                logger.warning(f"Aucune donnée pour {table_name}")
+                return
+            
+            # Snapshot identique à la dernière version: pas d'écriture ni de rotation
+            if not written:
+                logger.info(f"Table {table_name} inchangée depuis la dernière version, skip")
+                return
+            
+            # Mettre à jour les métadonnées
+            for written_path, file_records in written.items():
+                self._update_metadata(
+                    base_path,
+                    table_name,
+                    FeedType.TABLE,
+                    config,
+                    file_records,
+                    partition_path,
+                    written_path,
+                    content_hash
+                )
             
             # Nettoyer les anciennes versions
             retention = config.get('retention_versions', 7)
             self._cleanup_old_versions(base_path, retention)
             
-            logger.info(f"✓ Table {table_name} exportée: {len(df)} lignes -> {file_path}")
+            logger.info(
+                f"✓ Table {table_name} exportée: {records} lignes -> {file_path}"
+                + (f" ({len(written)} fichiers part)" if len(written) > 1 else "")
+            )
+            return self._export_stats(records, file_path, list(written))
         
         except Exception as e:
             logger.error(f"Erreur lors de l'export de la table {table_name}: {e}")
             raise
     
-    def _write_parquet(self, df: pd.DataFrame, file_path: Path, mode: StorageMode):
-        """Écrit un DataFrame en format Parquet"""
+    def _export_stats(
+        self,
+        records: int,
+        file_path: Path,
+        written: Optional[List[Path]] = None
+    ) -> Dict[str, Any]:
+        """Statistiques d'un export (written: fichiers réellement écrits, un par bucket)"""
+        return {
+            "records": records,
+            "bytes": sum(f.stat().st_size for f in (written or [file_path])),
+            "path": str(file_path)
+        }
+    
+    def _write_parquet(
+        self,
+        batches: Iterable[pa.RecordBatch],
+        file_path: Path,
+        mode: StorageMode,
+        feed_name: str,
+        publish_if: Optional[Callable[[], bool]] = None
+    ) -> int:
+        """
+        Écrit des record batches en format Parquet au fil de l'eau
+        
+        Le fichier n'est créé qu'à la réception du premier batch, sous un nom
+        temporaire, et publié une fois complet (si publish_if, appelé après le
+        dernier batch, ne retourne pas False). Les batches sont accumulés
+        jusqu'à former un row group complet (row_group_size du feed, sinon
+        ~TARGET_ROW_GROUP_BYTES) au lieu d'un row group par batch.
+        Compression, dictionnaire, taille de page et clustering viennent des
+        options du feed.
+        
+        Returns:
+            Nombre de lignes publiées
+        """
+        options = get_parquet_options(feed_name)
+        
+        # Clustering: les lignes du fichier sont réordonnées avant écriture,
+        # ce qui impose de matérialiser le fichier en mémoire
+        if options.get("cluster_by"):
+            batches = list(batches)
+            if batches:
+                table = cluster_table(
+                    pa.Table.from_batches(batches).combine_chunks(),
+                    options["cluster_by"],
+                    options.get("cluster_method", "sort")
+                )
+                batches = table.to_batches(max_chunksize=BATCH_SIZE)
+        
+        writer = None
+        records = 0
+        pending: List[pa.RecordBatch] = []
+        encoding: Dict[str, float] = {}
+        
+        def flush():
+            write_row_groups(writer, pa.Table.from_batches(pending), options, encoding)
+            pending.clear()
+        
         try:
-            # Convertir en Arrow Table pour plus de contrôle
-            table = pa.Table.from_pandas(df)
+            for batch in batches:
+                if writer is None:
+                    schema = batch.schema
+                    
+                    # Écrire le fichier Parquet avec les options du feed
+                    writer = AtomicParquetWriter(
+                        file_path,
+                        schema,
+                        **parquet_writer_kwargs(options)
+                    )
+                
+                if batch.schema != schema:
+                    batch = pa.Table.from_batches([batch]).cast(schema).to_batches()[0]
+                
+                pending.append(batch)
+                records += batch.num_rows
+                if row_group_full(
+                    sum(b.num_rows for b in pending), sum(b.nbytes for b in pending), options
+                ):
+                    flush()
             
-            # Écrire le fichier Parquet avec compression
-            pq.write_table(
-                table,
-                file_path,
-                compression=PARQUET_COMPRESSION,
-                use_dictionary=True,
-                write_statistics=True
-            )
-            
-            logger.debug(f"Fichier Parquet écrit: {file_path} ({file_path.stat().st_size / 1024:.2f} KB)")
+            if pending:
+                flush()
         
         except Exception as e:
             logger.error(f"Erreur lors de l'écriture Parquet: {e}")
+            # Rien n'est publié: le fichier temporaire est supprimé
+            if writer is not None:
+                writer.abort()
+            raise
+        
+        if writer is None:
+            return 0
+        
+        if publish_if is not None and not publish_if():
+            writer.abort()
+            return 0
+        
+        writer.close()
+        log_encoding(file_path.name, encoding, 1)
+        logger.debug(f"Fichier Parquet écrit: {file_path} ({file_path.stat().st_size / 1024:.2f} KB)")
+        return records
+    
+    def _write_snapshot(
+        self,
+        batches: Iterable[pa.RecordBatch],
+        file_path: Path,
+        feed_name: str,
+        publish_if: Optional[Callable[[], bool]] = None
+    ) -> Dict[Path, int]:
+        """
+        Écrit un snapshot de table, publié seulement si publish_if() (après lecture complète)
+        
+        Sans clustering, le snapshot est écrit au fil des batches (mémoire
+        bornée à un row group). Le clustering trie tout le snapshot: il est
+        alors matérialisé puis encodé en parallèle (un fichier part par thread).
+        
+        Returns:
+            {fichier écrit: nombre de lignes}, vide si rien n'a été publié
+        """
+        options = get_parquet_options(feed_name)
+        if not options.get("cluster_by"):
+            records = self._write_parquet(batches, file_path, StorageMode.OVERWRITE, feed_name, publish_if)
+            return {file_path: records} if records else {}
+        
+        batches = list(batches)
+        if not batches or (publish_if is not None and not publish_if()):
+            return {}
+        schema = batches[0].schema
+        table = pa.Table.from_batches(
+            [batch if batch.schema == schema else pa.Table.from_batches([batch]).cast(schema).to_batches()[0]
+             for batch in batches],
+            schema
+        ).combine_chunks()
+        table = cluster_table(table, options["cluster_by"], options.get("cluster_method", "sort"))
+        return write_parquet_parallel(table, file_path, options)
+    
+    def _write_stream_files(
+        self,
+        batches: Iterable[pa.RecordBatch],
+        file_path: Path,
+        feed_name: str,
+        bucketing: Optional[Dict] = None
+    ) -> Dict[Path, int]:
+        """
+        Écrit les batches d'un stream dans un fichier, ou un fichier par bucket
+        
+        Returns:
+            {fichier écrit: nombre de lignes}
+        """
+        if bucketing:
+            return self._write_bucketed_parquet(batches, file_path, StorageMode.APPEND, feed_name, bucketing)
+        
+        records = self._write_parquet(batches, file_path, StorageMode.APPEND, feed_name)
+        return {file_path: records} if records else {}
+    
+    def _write_bucketed_parquet(
+        self,
+        batches: Iterable[pa.RecordBatch],
+        file_path: Path,
+        mode: StorageMode,
+        feed_name: str,
+        bucketing: Dict
+    ) -> Dict[Path, int]:
+        """
+        Écrit des record batches répartis par bucket: <partition>/bucket=NN/<fichier>
+        
+        Returns:
+            {fichier écrit: nombre de lignes}
+        """
+        def split(table: pa.Table) -> Dict[Path, pa.Table]:
+            return {
+                bucket_file_path(file_path, bucket): part
+                for bucket, part in split_by_bucket(table, bucketing["column"], bucketing["num_buckets"]).items()
+            }
+        
+        return self._write_split_parquet(batches, split, mode, feed_name)
+    
+    def _write_split_parquet(
+        self,
+        batches: Iterable[pa.RecordBatch],
+        split: Callable[[pa.Table], Dict[Path, pa.Table]],
+        mode: StorageMode,
+        feed_name: str,
+        before_publish: Optional[Callable[[List[Path]], None]] = None
+    ) -> Dict[Path, int]:
+        """
+        Écrit des record batches répartis entre plusieurs fichiers
+        
+        split découpe chaque batch en {fichier: lignes} (buckets, jours...); les
+        lignes d'un fichier sont accumulées jusqu'à former un row group complet
+        (row_group_size du feed, sinon ~TARGET_ROW_GROUP_BYTES) avant d'être
+        écrites (un writer ouvert par fichier). Avec clustering,
+        chaque fichier est matérialisé puis écrit par _write_parquet.
+        before_publish reçoit la liste des fichiers juste avant leur publication.
+        
+        Returns:
+            {fichier écrit: nombre de lignes}
+        """
+        options = get_parquet_options(feed_name)
+        
+        if options.get("cluster_by"):
+            batches = list(batches)
+            if not batches:
+                return {}
+            parts = split(pa.Table.from_batches(batches))
+            if before_publish is not None:
+                before_publish(sorted(parts))
+            written = {}
+            try:
+                for path, part in sorted(parts.items()):
+                    written[path] = self._write_parquet(part.to_batches(), path, mode, feed_name)
+            except Exception:
+                for path in written:
+                    path.unlink(missing_ok=True)
+                raise
+            return written
+        
+        writers: Dict[Path, AtomicParquetWriter] = {}
+        buffers: Dict[Path, List[pa.Table]] = {}
+        records: Dict[Path, int] = {}
+        encoding: Dict[str, float] = {}
+        schema = None
+        
+        def flush(path: Path):
+            if not buffers.get(path):
+                return
+            table = pa.concat_tables(buffers.pop(path))
+            if path not in writers:
+                writers[path] = AtomicParquetWriter(
+                    path, table.schema, **parquet_writer_kwargs(options)
+                )
+            write_row_groups(writers[path], table, options, encoding)
+        
+        try:
+            for batch in batches:
+                if schema is None:
+                    schema = batch.schema
+                table = pa.Table.from_batches([batch])
+                if batch.schema != schema:
+                    table = table.cast(schema)
+                
+                for path, part in split(table).items():
+                    buffers.setdefault(path, []).append(part)
+                    records[path] = records.get(path, 0) + part.num_rows
+                    if row_group_full(
+                        sum(t.num_rows for t in buffers[path]), sum(t.nbytes for t in buffers[path]), options
+                    ):
+                        flush(path)
+            
+            for path in list(buffers):
+                flush(path)
+            
+            if before_publish is not None and writers:
+                before_publish(sorted(writers))
+        
+        except Exception as e:
+            logger.error(f"Erreur lors de l'écriture Parquet répartie: {e}")
+            # Rien n'est publié: les fichiers temporaires sont supprimés
+            for writer in writers.values():
+                writer.abort()
             raise
+        
+        # Publication des fichiers; en cas d'échec, retrait des fichiers déjà publiés
+        published = []
+        try:
+            for path, writer in writers.items():
+                writer.close()
+                published.append(path)
+        except Exception:
+            for path, writer in writers.items():
+                if path in published:
+                    path.unlink(missing_ok=True)
+                else:
+                    writer.abort()
+            raise
+        
+        if writers:
+            log_encoding(next(iter(writers)).name, encoding, len(writers))
+        return dict(sorted(records.items()))
     
     def _get_next_version(self, base_path: Path) -> int:
         """Détermine le prochain numéro de version"""
+        latest_version = get_catalog().latest_version(base_path)
+        if latest_version is not None:
+            return latest_version + 1
+        
+        # Table absente du catalogue: parcours des dossiers de version
         versions = []
         for version_dir in base_path.glob("version=v*"):
             try:
@@ -244,6 +833,21 @@ class DataLakeExporter:
         
         return max(versions) + 1 if versions else 1
     
+    def _get_latest_content_hash(self, base_path: Path) -> Optional[str]:
+        """Empreinte du contenu de la dernière version, lue dans _metadata.json"""
+        latest_version = self._get_next_version(base_path) - 1
+        metadata = read_metadata(base_path) if latest_version >= 1 else None
+        
+        if metadata is None:
+            return None
+        
+        latest_path = str(get_version_partition_path(base_path, latest_version).relative_to(base_path))
+        partition = next(
+            (p for p in metadata.get("partitions", []) if p["path"] == latest_path),
+            None
+        )
+        return partition.get("content_hash") if partition else None
+    
     def _cleanup_old_versions(self, base_path: Path, retention: int):
         """Supprime les anciennes versions au-delà de la rétention"""
         versions = []
@@ -257,12 +861,11 @@ class DataLakeExporter:
         # Trier par version décroissante
         versions.sort(reverse=True)
         
-        # Supprimer les versions au-delà de la rétention
+        # Mettre à la corbeille les versions au-delà de la rétention (purge différée)
         for version_num, version_dir in versions[retention:]:
             logger.info(f"Suppression de l'ancienne version: {version_dir}")
-            for file in version_dir.glob("*"):
-                file.unlink()
-            version_dir.rmdir()
+            move_to_trash(version_dir, base_path, "old_version")
+            record_partition_removed(base_path, version_dir)
     
     def _update_metadata(
         self,
@@ -270,62 +873,124 @@ class DataLakeExporter:
         source_name: str,
         feed_type: FeedType,
         config: dict,
-        df: pd.DataFrame,
-        partition_path: Path
+        records: int,
+        partition_path: Path,
+        file_path: Path,
+        content_hash: Optional[str] = None,
+        bucketing: Optional[Dict] = None
     ):
-        """Met à jour le fichier de métadonnées"""
-        metadata_file = base_path / "_metadata.json"
-        
-        # Charger les métadonnées existantes ou créer nouvelles
-        if metadata_file.exists():
-            with open(metadata_file, 'r') as f:
-                metadata = json.load(f)
-        else:
-            metadata = {
-                "source": source_name,
-                "type": feed_type.value,
-                "storage_mode": config['storage_mode'].value,
-                "format": STORAGE_FORMAT,
-                "partitioning": config['partitioning'].value,
-                "created_at": datetime.now().isoformat(),
-                "total_records": 0,
-                "total_size_mb": 0,
-                "partitions": []
-            }
-        
-        # Mettre à jour les statistiques
-        metadata["last_export"] = datetime.now().isoformat()
-        metadata["total_records"] += len(df)
-        
-        # Calculer la taille de la partition
-        partition_size = sum(f.stat().st_size for f in partition_path.glob("*.parquet"))
-        partition_size_mb = partition_size / (1024 * 1024)
-        metadata["total_size_mb"] += partition_size_mb
-        
-        # Ajouter les infos de la partition
-        partition_info = {
-            "path": str(partition_path.relative_to(base_path)),
-            "records": len(df),
-            "size_mb": round(partition_size_mb, 2),
-            "exported_at": datetime.now().isoformat()
-        }
-        
-        # Vérifier si la partition existe déjà
-        existing = next(
-            (p for p in metadata["partitions"] if p["path"] == partition_info["path"]),
-            None
+        """Met à jour le fichier de métadonnées avec le fichier qui vient d'être écrit"""
+        record_file_written(
+            base_path,
+            source_name,
+            feed_type.value,
+            config['storage_mode'].value,
+            config['partitioning'].value,
+            partition_path,
+            file_path,
+            records,
+            file_path.stat().st_size,
+            content_hash,
+            bucketing
         )
-        
-        if existing:
-            existing.update(partition_info)
+
+
+def run_export_job(feed_type: FeedType, name: str, export_fn: Callable[[], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Exécute l'export d'un feed en isolant ses erreurs
+    
+    Returns:
+        Résultat du feed: type, nom, statut (ok / skipped / failed), lignes, octets, durée
+    """
+    result = {
+        "type": feed_type.value,
+        "name": name,
+        "status": "ok",
+        "records": 0,
+        "bytes": 0,
+        "seconds": 0.0,
+        "error": None
+    }
+    
+    start = time.perf_counter()
+    try:
+        stats = export_fn()
+        if stats is None:
+            result["status"] = "skipped"
         else:
-            metadata["partitions"].append(partition_info)
-        
-        # Sauvegarder les métadonnées
-        with open(metadata_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
-        
-        logger.debug(f"Métadonnées mises à jour: {metadata_file}")
+            result["records"] = stats["records"]
+            result["bytes"] = stats["bytes"]
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def export_all(
+    exporter: DataLakeExporter,
+    workers: int = EXPORT_WORKERS,
+    export_date: Optional[datetime] = None,
+    version: Optional[int] = None,
+    incremental: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Exporte tous les streams et tables en parallèle
+    
+    Chaque feed est exporté dans son propre job: l'échec d'un feed n'interrompt
+    pas les autres. La durée totale est proche de celle du feed le plus lent.
+    
+    Returns:
+        Résultats par feed (voir run_export_job)
+    """
+    jobs = []
+    for stream_name, config in STREAMS_CONFIG.items():
+        jobs.append((
+            FeedType.STREAM,
+            stream_name,
+            partial(exporter.export_stream, stream_name, config, export_date, incremental)
+        ))
+    for table_name, config in TABLES_CONFIG.items():
+        jobs.append((
+            FeedType.TABLE,
+            table_name,
+            partial(exporter.export_table, table_name, config, version)
+        ))
+    
+    logger.info(f"Export de {len(jobs)} feeds avec {workers} workers")
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export") as pool:
+        futures = [pool.submit(run_export_job, *job) for job in jobs]
+        results = [future.result() for future in futures]
+    
+    return results
+
+
+def log_export_summary(results: List[Dict[str, Any]], wall_seconds: float):
+    """Affiche le résumé des exports: durée, lignes et octets par feed"""
+    logger.info("=" * 80)
+    logger.info("RÉSUMÉ DES EXPORTS")
+    logger.info("-" * 80)
+    logger.info(f"{'Feed':<34} {'Type':<7} {'Statut':<8} {'Durée':>8} {'Lignes':>10} {'Taille':>10}")
+    
+    for result in results:
+        logger.info(
+            f"{result['name']:<34} {result['type']:<7} {result['status']:<8} "
+            f"{result['seconds']:>7.2f}s {result['records']:>10,} "
+            f"{result['bytes'] / (1024 * 1024):>8.2f}MB"
+        )
+        if result["error"]:
+            logger.info(f"  ✗ {result['error']}")
+    
+    total_seconds = sum(r["seconds"] for r in results)
+    logger.info("-" * 80)
+    logger.info(
+        f"Total: {sum(r['records'] for r in results):,} lignes, "
+        f"{sum(r['bytes'] for r in results) / (1024 * 1024):.2f} MB, "
+        f"{wall_seconds:.2f}s (somme des feeds: {total_seconds:.2f}s)"
+    )
+    logger.info("=" * 80)
 
 
 def main():
@@ -353,11 +1018,22 @@ def main():
         type=str,
         help="Date pour le partitionnement (format: YYYY-MM-DD)"
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Streams: exporter uniquement les nouveaux enregistrements depuis le dernier export"
+    )
     parser.add_argument(
         "--version",
         type=int,
         help="Version pour les tables (par défaut: auto-incrémenté)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=EXPORT_WORKERS,
+        help=f"Nombre d'exports en parallèle avec --all (défaut: {EXPORT_WORKERS})"
+    )
     
     args = parser.parse_args()
     
@@ -372,11 +1048,7 @@ def main():
     
     # Initialiser le client ksqlDB
     try:
-        client = KsqlDBClient(
-            KSQLDB_CONFIG['host'],
-            KSQLDB_CONFIG['port'],
-            KSQLDB_CONFIG['timeout']
-        )
+        client = KsqlDBClient.from_config(KSQLDB_CONFIG)
     except Exception as e:
         logger.error(f"Impossible de se connecter à ksqlDB: {e}")
         sys.exit(1)
@@ -389,13 +1061,20 @@ def main():
         if args.all:
             logger.info("Export de tous les streams et tables")
             
-            # Exporter tous les streams
-            for stream_name, config in STREAMS_CONFIG.items():
-                exporter.export_stream(stream_name, config, export_date)
+            start = time.perf_counter()
+            results = export_all(
+                exporter,
+                workers=args.workers,
+                export_date=export_date,
+                version=args.version,
+                incremental=args.incremental
+            )
+            log_export_summary(results, time.perf_counter() - start)
             
-            # Exporter toutes les tables
-            for table_name, config in TABLES_CONFIG.items():
-                exporter.export_table(table_name, config, args.version)
+            failed = [r["name"] for r in results if r["status"] == "failed"]
+            if failed:
+                logger.error(f"Échec de l'export pour: {', '.join(failed)}")
+                sys.exit(1)
         
         elif args.stream:
             if args.stream not in STREAMS_CONFIG:
@@ -405,7 +1084,8 @@ def main():
             exporter.export_stream(
                 args.stream,
                 STREAMS_CONFIG[args.stream],
-                export_date
+                export_date,
+                args.incremental
             )
         
         elif args.table:
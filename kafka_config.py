@@ -22,6 +22,7 @@ KAFKA_TOPICS = {
             "destination": "data_lake",  # 'data_lake' ou 'both'
             "partitioning": "date",
             "storage_mode": "append",
+            "hot_tier": True,  # Flushs en Arrow IPC, convertis en Parquet (lake_tiering.py)
             "enabled": True
         },
         {
@@ -30,6 +31,7 @@ KAFKA_TOPICS = {
             "destination": "data_lake",
             "partitioning": "date",
             "storage_mode": "append",
+            "hot_tier": True,
             "enabled": True
         },
         {
@@ -38,6 +40,7 @@ KAFKA_TOPICS = {
             "destination": "data_lake",
             "partitioning": "date",
             "storage_mode": "append",
+            "hot_tier": True,
             "enabled": True
         },
         {
@@ -46,6 +49,7 @@ KAFKA_TOPICS = {
             "destination": "data_lake",
             "partitioning": "date",
             "storage_mode": "append",
+            "hot_tier": True,
             "enabled": True
         }
     ],
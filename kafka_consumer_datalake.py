@@ -5,7 +5,6 @@ from datetime import datetime, date
 from pathlib import Path
 import pandas as pd
 import pyarrow as pa
-import pyarrow.parquet as pq
 from kafka import KafkaConsumer
 from kafka.errors import KafkaError
 
@@ -15,10 +14,18 @@ from kafka_config import (
     get_topics_for_destination, get_topic_config
 )
 from data_lake_config import (
-    STREAMS_DIR, TABLES_DIR, PARQUET_COMPRESSION,
+    STREAMS_DIR, TABLES_DIR, HOT_FILE_SUFFIX,
     get_date_partition_path, get_version_partition_path,
+    get_parquet_options, get_bucketing, parquet_writer_kwargs,
     ensure_directories
 )
+from lake_bucketing import bucket_file_path, split_by_bucket
+from lake_catalog import get_catalog
+from lake_clustering import cluster_table
+from lake_metadata import record_file_written, record_partition_removed
+from lake_tiering import write_hot_file
+from lake_trash import move_to_trash
+from lake_writer import cleanup_orphans, row_group_rows, write_parquet_atomic, write_parquet_parallel
 
 
 # Configuration du logging
@@ -36,6 +43,9 @@ class DataLakeKafkaConsumer:
     def __init__(self, topics=None):
         ensure_directories()
         
+        # Fichiers temporaires laissés par un arrêt brutal du consumer
+        cleanup_orphans([STREAMS_DIR, TABLES_DIR])
+        
         # Déterminer les topics à consommer
         if topics is None:
             self.topics = get_topics_for_destination("data_lake")
@@ -152,37 +162,78 @@ class DataLakeKafkaConsumer:
         # Créer le dossier si nécessaire
         partition_path.mkdir(parents=True, exist_ok=True)
         
-        # Nom du fichier avec timestamp
+        # Nom du fichier avec timestamp (tier chaud: Arrow IPC, converti plus tard en Parquet)
+        hot_tier = config.get("hot_tier", False)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_path = partition_path / f"data_{timestamp}.parquet"
+        suffix = HOT_FILE_SUFFIX if hot_tier else ".parquet"
+        file_path = partition_path / f"data_{timestamp}{suffix}"
         
-        # Convertir en Arrow Table et écrire
+        options = get_parquet_options(topic)
         table = pa.Table.from_pandas(df)
-        pq.write_table(
-            table,
-            file_path,
-            compression=PARQUET_COMPRESSION,
-            use_dictionary=True,
-            write_statistics=True
-        )
         
-        logger.info(f"✓ Stream {topic} écrit: {file_path}")
+        # Bucketing: un fichier par bucket=NN sous la partition du jour
+        bucketing = get_bucketing(topic)
+        if bucketing:
+            parts = {
+                bucket_file_path(file_path, bucket): part
+                for bucket, part in split_by_bucket(
+                    table, bucketing["column"], bucketing["num_buckets"]
+                ).items()
+            }
+        else:
+            parts = {file_path: table}
+        
+        for part_path, part in parts.items():
+            part_path.parent.mkdir(parents=True, exist_ok=True)
+            if hot_tier:
+                # Clustering et compression à la conversion en Parquet
+                write_hot_file(part, part_path)
+            else:
+                # Clusteriser selon les options du feed et écrire
+                part = cluster_table(part, options["cluster_by"], options["cluster_method"])
+                write_parquet_atomic(
+                    part,
+                    part_path,
+                    row_group_size=row_group_rows(part, options),
+                    **parquet_writer_kwargs(options)
+                )
+            
+            record_file_written(
+                STREAMS_DIR / topic,
+                topic,
+                config["feed_type"],
+                config["storage_mode"],
+                config["partitioning"],
+                part_path.parent,
+                part_path,
+                part.num_rows,
+                part_path.stat().st_size,
+                bucketing=bucketing
+            )
+        
+        if bucketing:
+            logger.info(f"✓ Stream {topic} écrit: {file_path.name} dans {len(parts)} buckets de {partition_path}")
+        else:
+            logger.info(f"✓ Stream {topic} écrit: {file_path}")
     
     def write_table_data(self, topic, df, config):
         # Déterminer la prochaine version
         base_path = TABLES_DIR / topic
         base_path.mkdir(parents=True, exist_ok=True)
         
-        # Trouver les versions existantes
-        existing_versions = []
-        for version_dir in base_path.glob("version=v*"):
-            try:
-                version_num = int(version_dir.name.replace("version=v", ""))
-                existing_versions.append(version_num)
-            except ValueError:
-                continue
+        # Trouver la dernière version (catalogue, sinon dossiers existants)
+        latest_version = get_catalog().latest_version(base_path)
+        if latest_version is None:
+            existing_versions = []
+            for version_dir in base_path.glob("version=v*"):
+                try:
+                    version_num = int(version_dir.name.replace("version=v", ""))
+                    existing_versions.append(version_num)
+                except ValueError:
+                    continue
+            latest_version = max(existing_versions, default=0)
         
-        next_version = max(existing_versions, default=0) + 1
+        next_version = latest_version + 1
         
         # Créer le chemin de partition
         partition_path = get_version_partition_path(base_path, version=next_version)
@@ -192,17 +243,29 @@ class DataLakeKafkaConsumer:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         file_path = partition_path / f"snapshot_{timestamp}.parquet"
         
-        # Convertir en Arrow Table et écrire
-        table = pa.Table.from_pandas(df)
-        pq.write_table(
-            table,
-            file_path,
-            compression=PARQUET_COMPRESSION,
-            use_dictionary=True,
-            write_statistics=True
+        # Convertir en Arrow Table (clusterisée selon les options du feed) et écrire
+        options = get_parquet_options(topic)
+        table = cluster_table(
+            pa.Table.from_pandas(df),
+            options["cluster_by"],
+            options["cluster_method"]
         )
+        written = write_parquet_parallel(table, file_path, options)
+        
+        for written_path, records in written.items():
+            record_file_written(
+                base_path,
+                topic,
+                config["feed_type"],
+                config["storage_mode"],
+                config["partitioning"],
+                partition_path,
+                written_path,
+                records,
+                written_path.stat().st_size
+            )
         
-        logger.info(f"✓ Table {topic} écrite: {file_path} (version {next_version})")
+        logger.info(f"✓ Table {topic} écrite: {file_path} (version {next_version}, {len(written)} fichier(s))")
         
         # Nettoyage des anciennes versions si nécessaire
         self.cleanup_old_versions(base_path, retention_versions=7)
@@ -215,9 +278,10 @@ class DataLakeKafkaConsumer:
         
         if len(version_dirs) > retention_versions:
             for old_version in version_dirs[:-retention_versions]:
+                # Renommage dans la corbeille: la boucle de poll ne paie pas la suppression
                 logger.info(f"Suppression de l'ancienne version: {old_version}")
-                import shutil
-                shutil.rmtree(old_version)
+                move_to_trash(old_version, base_path, "old_version")
+                record_partition_removed(base_path, old_version)
     
     def flush_all_buffers(self):
         logger.info("Flush de tous les buffers...")
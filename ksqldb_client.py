@@ -0,0 +1,522 @@
+"""
+Client ksqlDB partagé
+- Session HTTP keep-alive avec pool de connexions et retries avec backoff
+- Support optionnel de HTTP/2 via l'endpoint /query-stream (nécessite httpx[http2])
+- Lecture en flux des réponses en record batches Arrow typés
+- Une erreur ksqlDB en cours de réponse lève KsqlQueryError (résultat incomplet)
+"""
+import base64
+import json
+import logging
+from datetime import time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from data_lake_config import KSQLDB_CONFIG, BATCH_SIZE
+
+try:
+    import httpx
+except ImportError:  # HTTP/2 optionnel
+    httpx = None
+
+
+logger = logging.getLogger(__name__)
+
+# Codes HTTP pour lesquels une requête est rejouée
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Colonne du ROWTIME (ms epoch) ajoutée par iter_stream_data(with_rowtime=True),
+# en minuscules comme toutes les colonnes du header (ksql_schema_to_arrow)
+ROWTIME_COLUMN = "rowtime"
+
+
+class KsqlQueryError(RuntimeError):
+    """Erreur renvoyée par ksqlDB en cours de réponse: le résultat lu est incomplet"""
+
+
+class KsqlDBClient:
+    """Client pour interagir avec ksqlDB"""
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: int = 30,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        use_http2: bool = False
+    ):
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+        self.use_http2 = use_http2
+        
+        # Session keep-alive partagée par toutes les requêtes (et tous les threads)
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET", "POST"])
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        
+        self.http2_client = None
+        if use_http2:
+            if httpx is None:
+                raise ImportError("HTTP/2 nécessite httpx: pip install 'httpx[http2]'")
+            
+            # http1=False: HTTP/2 en clair (prior knowledge) vers ksqlDB
+            self.http2_client = httpx.Client(
+                base_url=self.base_url,
+                timeout=timeout,
+                transport=httpx.HTTPTransport(
+                    http1=False,
+                    http2=True,
+                    retries=max_retries,
+                    limits=httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size
+                    )
+                )
+            )
+        
+        logger.info(
+            f"Initialisation du client ksqlDB: {self.base_url} "
+            f"(pool={pool_size}, retries={max_retries}, http2={use_http2})"
+        )
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any] = KSQLDB_CONFIG) -> "KsqlDBClient":
+        """Crée un client à partir de KSQLDB_CONFIG"""
+        return cls(
+            config['host'],
+            config['port'],
+            config.get('timeout', 30),
+            pool_size=config.get('pool_size', 10),
+            max_retries=config.get('max_retries', 3),
+            backoff_factor=config.get('backoff_factor', 0.5),
+            use_http2=config.get('use_http2', False)
+        )
+    
+    def close(self):
+        """Ferme les connexions du pool"""
+        self.session.close()
+        if self.http2_client is not None:
+            self.http2_client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def stream_query(
+        self,
+        query: str,
+        properties: Optional[Dict[str, Any]] = None
+    ) -> Iterator[pa.RecordBatch]:
+        """Exécute une requête ksqlDB et produit les résultats par record batches"""
+        logger.debug(f"Exécution de la requête: {query}")
+        
+        if self.http2_client is not None:
+            batches = self._stream_query_http2(query, properties or {})
+        else:
+            batches = self._stream_query_http1(query, properties or {})
+        
+        rows_count = 0
+        for batch in batches:
+            rows_count += batch.num_rows
+            yield batch
+        
+        logger.info(f"Requête réussie: {rows_count} lignes récupérées")
+    
+    def _stream_query_http1(self, query: str, properties: Dict[str, Any]) -> Iterator[pa.RecordBatch]:
+        """Requête via l'endpoint /query (HTTP/1.1, connexion réutilisée)"""
+        payload = {
+            "ksql": query,
+            "streamsProperties": properties
+        }
+        
+        try:
+            response = self.session.post(
+                f"{self.base_url}/query",
+                json=payload,
+                timeout=self.timeout,
+                stream=True
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Erreur lors de l'exécution de la requête: {e}")
+            raise
+        
+        # Parser la réponse au fil de l'eau (format JSON délimité par des lignes)
+        with response:
+            lines = response.iter_lines(decode_unicode=True)
+            yield from iter_response_batches(lines, BATCH_SIZE)
+    
+    def _stream_query_http2(self, query: str, properties: Dict[str, Any]) -> Iterator[pa.RecordBatch]:
+        """Requête via l'endpoint /query-stream (HTTP/2)"""
+        payload = {
+            "sql": query,
+            "properties": properties
+        }
+        headers = {"Accept": "application/vnd.ksqlapi.delimited.v1"}
+        
+        try:
+            with self.http2_client.stream("POST", "/query-stream", json=payload, headers=headers) as response:
+                response.raise_for_status()
+                yield from iter_query_stream_batches(response.iter_lines(), BATCH_SIZE)
+        except httpx.HTTPError as e:
+            logger.error(f"Erreur lors de l'exécution de la requête: {e}")
+            raise
+    
+    def execute_query(self, query: str) -> List[Dict[str, Any]]:
+        """Exécute une requête ksqlDB et retourne les résultats"""
+        results = []
+        for batch in self.stream_query(query):
+            results.extend(batch.to_pylist())
+        return results
+    
+    def iter_stream_data(
+        self,
+        stream_name: str,
+        limit: Optional[int] = None,
+        since_rowtime: Optional[int] = None,
+        until_rowtime: Optional[int] = None,
+        with_rowtime: bool = False
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Récupère les données d'un stream par record batches
+        
+        Utilise une pull query sur le stream (sans EMIT CHANGES): la requête lit
+        le topic jusqu'à sa fin au moment de l'exécution puis se termine.
+        Les bornes since_rowtime (exclue) et until_rowtime (incluse), en ms
+        epoch, limitent la lecture à une fenêtre de ROWTIME. with_rowtime
+        ajoute la colonne ROWTIME_COLUMN (pseudo-colonne ROWTIME).
+        """
+        projection = "ROWTIME, *" if with_rowtime else "*"
+        query = f"SELECT {projection} FROM {stream_name}"
+        
+        conditions = []
+        if since_rowtime is not None:
+            conditions.append(f"ROWTIME > {since_rowtime}")
+        if until_rowtime is not None:
+            conditions.append(f"ROWTIME <= {until_rowtime}")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
+        if limit:
+            query += f" LIMIT {limit}"
+        
+        return self.stream_query(query)
+    
+    def iter_table_data(self, table_name: str) -> Iterator[pa.RecordBatch]:
+        """Récupère les données d'une table (snapshot) par record batches"""
+        query = f"SELECT * FROM {table_name}"
+        return self.stream_query(query)
+    
+    def get_stream_data(self, stream_name: str, limit: Optional[int] = None) -> pd.DataFrame:
+        """Récupère les données d'un stream"""
+        return batches_to_dataframe(self.iter_stream_data(stream_name, limit))
+    
+    def get_table_data(self, table_name: str) -> pd.DataFrame:
+        """Récupère les données d'une table (snapshot)"""
+        return batches_to_dataframe(self.iter_table_data(table_name))
+
+
+def batches_to_dataframe(batches: Iterable[pa.RecordBatch]) -> pd.DataFrame:
+    """Assemble des record batches en DataFrame"""
+    batches = list(batches)
+    if not batches:
+        return pd.DataFrame()
+    return pa.Table.from_batches(batches).to_pandas()
+
+
+def parse_response_line(line: str) -> Optional[dict]:
+    """
+    Parse une ligne de la réponse /query
+    
+    ksqlDB renvoie un tableau JSON dont chaque élément est sur sa propre ligne
+    ("[{...},", "{...},", "{...}]"), on retire donc les délimiteurs du tableau.
+    """
+    line = line.strip()
+    if line.startswith('['):
+        line = line[1:]
+    if line.endswith(','):
+        line = line[:-1]
+    if not line or line == ']':
+        return None
+    
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        # Dernier élément du tableau: "{...}]"
+        if line.endswith(']'):
+            return json.loads(line[:-1])
+        raise
+
+
+def error_text(error: Any) -> str:
+    """Message d'une erreur ksqlDB (objet {"@type", "error_code", "message"} ou texte)"""
+    if isinstance(error, dict):
+        return str(error.get("message", error))
+    return str(error)
+
+
+def iter_response_messages(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Itère sur les messages (header, row, ...) d'une réponse ksqlDB
+    
+    Raises:
+        KsqlQueryError: ksqlDB a interrompu la réponse (errorMessage)
+    """
+    for line in lines:
+        if not line:
+            continue
+        
+        data = parse_response_line(line)
+        if not data:
+            continue
+        
+        if 'errorMessage' in data:
+            # Résultat tronqué: ne jamais le laisser passer pour un résultat complet
+            raise KsqlQueryError(f"Erreur renvoyée par ksqlDB: {error_text(data['errorMessage'])}")
+        elif 'finalMessage' in data:
+            logger.debug(f"Fin de la requête: {data['finalMessage']}")
+        else:
+            yield data
+
+
+def iter_response_batches(
+    lines: Iterable[str],
+    batch_size: int = BATCH_SIZE
+) -> Iterator[pa.RecordBatch]:
+    """
+    Transforme une réponse ksqlDB en record batches Arrow de batch_size lignes
+    
+    Le schéma Arrow est construit une seule fois à partir du header de la
+    réponse; les colonnes sont ensuite typées directement à la construction.
+    """
+    schema = None
+    buffer = []
+    
+    for data in iter_response_messages(lines):
+        if 'header' in data:
+            if data['header'].get('schema'):
+                schema = ksql_schema_to_arrow(data['header']['schema'])
+                logger.debug(f"Schéma de la requête: {schema}")
+        elif 'row' in data:
+            buffer.append(data['row']['columns'])
+            if len(buffer) >= batch_size:
+                yield build_record_batch(buffer, schema)
+                buffer = []
+    
+    if buffer:
+        yield build_record_batch(buffer, schema)
+
+
+def iter_query_stream_batches(
+    lines: Iterable[str],
+    batch_size: int = BATCH_SIZE
+) -> Iterator[pa.RecordBatch]:
+    """
+    Transforme une réponse /query-stream (format délimité) en record batches
+    
+    La première ligne est un header {"columnNames": [...], "columnTypes": [...]},
+    chaque ligne suivante est un tableau JSON de valeurs.
+    
+    Raises:
+        KsqlQueryError: trame d'erreur ({"@type", "error_code", "message"})
+    """
+    schema = None
+    buffer = []
+    
+    for line in lines:
+        if not line:
+            continue
+        
+        data = json.loads(line)
+        if isinstance(data, dict):
+            if 'columnNames' in data:
+                schema = ksql_schema_to_arrow(", ".join(
+                    f"`{name}` {column_type}"
+                    for name, column_type in zip(data['columnNames'], data['columnTypes'])
+                ))
+            elif 'message' in data:
+                raise KsqlQueryError(f"Erreur renvoyée par ksqlDB: {error_text(data)}")
+            continue
+        
+        buffer.append(data)
+        if len(buffer) >= batch_size:
+            yield build_record_batch(buffer, schema)
+            buffer = []
+    
+    if buffer:
+        yield build_record_batch(buffer, schema)
+
+
+# Correspondance des types ksqlDB simples vers Arrow
+KSQL_TYPES = {
+    "BOOLEAN": pa.bool_(),
+    "INT": pa.int32(),
+    "INTEGER": pa.int32(),
+    "BIGINT": pa.int64(),
+    "DOUBLE": pa.float64(),
+    "STRING": pa.string(),
+    "VARCHAR": pa.string(),
+    "BYTES": pa.binary(),
+    "DATE": pa.date32(),
+    "TIME": pa.time32("ms"),
+    "TIMESTAMP": pa.timestamp("ms"),
+}
+
+
+def ksql_schema_to_arrow(schema: str) -> pa.Schema:
+    """
+    Convertit le schéma d'un header ksqlDB en schéma Arrow
+    
+    Exemple: "`USER_ID` STRING, `AMOUNT` DECIMAL(10, 2), `ITEMS` ARRAY<STRING>"
+    Les noms de colonnes sont mis en minuscules, comme dans le reste du pipeline.
+    Les champs des STRUCT gardent leur nom d'origine, qui est celui des clés JSON.
+    """
+    return pa.schema(_parse_fields(schema, lower_names=True))
+
+
+def _parse_fields(text: str, lower_names: bool = False) -> List[pa.Field]:
+    """Parse une liste "`NOM` TYPE, ..." en champs Arrow"""
+    fields = []
+    for item in _split_top_level(text):
+        item = item.strip()
+        if not item:
+            continue
+        
+        if item.startswith('`'):
+            end = item.index('`', 1)
+            name, type_text = item[1:end], item[end + 1:]
+        else:
+            name, _, type_text = item.partition(' ')
+        
+        # Les colonnes clés sont suffixées par KEY / PRIMARY KEY
+        type_text = type_text.strip()
+        for suffix in (" PRIMARY KEY", " KEY"):
+            if type_text.upper().endswith(suffix):
+                type_text = type_text[:-len(suffix)].strip()
+        
+        if lower_names:
+            name = name.lower()
+        fields.append(pa.field(name, _parse_type(type_text)))
+    
+    return fields
+
+
+def _parse_type(type_text: str) -> pa.DataType:
+    """Parse un type ksqlDB (éventuellement imbriqué) en type Arrow"""
+    type_text = type_text.strip()
+    upper = type_text.upper()
+    
+    if upper.startswith("ARRAY<"):
+        return pa.list_(_parse_type(type_text[6:-1]))
+    
+    if upper.startswith("MAP<"):
+        key_type, value_type = _split_top_level(type_text[4:-1])
+        return pa.map_(_parse_type(key_type), _parse_type(value_type))
+    
+    if upper.startswith("STRUCT<"):
+        return pa.struct(_parse_fields(type_text[7:-1]))
+    
+    if upper.startswith("DECIMAL"):
+        precision, scale = (int(v) for v in type_text[type_text.index('(') + 1:-1].split(','))
+        return pa.decimal128(precision, scale)
+    
+    if upper not in KSQL_TYPES:
+        logger.warning(f"Type ksqlDB inconnu '{type_text}', stocké en STRING")
+        return pa.string()
+    
+    return KSQL_TYPES[upper]
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Découpe sur les virgules qui ne sont pas dans <...>, (...) ou `...`"""
+    parts = []
+    depth = 0
+    quoted = False
+    current = []
+    
+    for char in text:
+        if char == '`':
+            quoted = not quoted
+        elif not quoted and char in '<(':
+            depth += 1
+        elif not quoted and char in '>)':
+            depth -= 1
+        elif not quoted and char == ',' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    
+    parts.append(''.join(current))
+    return parts
+
+
+def build_record_batch(rows: List[List[Any]], schema: Optional[pa.Schema] = None) -> pa.RecordBatch:
+    """
+    Construit un record batch colonne par colonne
+    
+    Sans schéma (pas de header), les types sont inférés et les colonnes
+    nommées par leur position.
+    """
+    columns = list(zip(*rows))
+    
+    if schema is None:
+        return pa.RecordBatch.from_arrays(
+            [pa.array(column) for column in columns],
+            names=[str(i) for i in range(len(columns))]
+        )
+    
+    return pa.RecordBatch.from_arrays(
+        [_to_arrow_array(column, field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def _to_arrow_array(values: Sequence[Any], arrow_type: pa.DataType) -> pa.Array:
+    """Convertit les valeurs JSON d'une colonne vers son type Arrow"""
+    if pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+        # ksqlDB sérialise les dates et timestamps en ISO 8601
+        return pa.array(values, type=pa.string()).cast(arrow_type)
+    
+    if pa.types.is_time(arrow_type):
+        return pa.array(
+            [time.fromisoformat(v) if v is not None else None for v in values],
+            type=arrow_type
+        )
+    
+    if pa.types.is_decimal(arrow_type):
+        return pa.array(
+            [Decimal(str(v)) if v is not None else None for v in values],
+            type=arrow_type
+        )
+    
+    if pa.types.is_binary(arrow_type):
+        # ksqlDB sérialise les BYTES en base64
+        return pa.array(
+            [base64.b64decode(v) if v is not None else None for v in values],
+            type=arrow_type
+        )
+    
+    return pa.array(values, type=arrow_type)
@@ -0,0 +1,65 @@
+"""
+Bucketing des partitions de streams par hash d'une clé
+- Second niveau de partition bucket=NN sous day=, calculé à partir d'un hash
+  stable de la clé configurée (ex: user_id): toutes les lignes d'une même clé
+  tombent dans le même bucket
+- Élagage des buckets pour les recherches par clé et traitements par clé
+  parallélisables bucket par bucket
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from data_lake_config import get_bucket_partition_path
+
+
+def bucket_ids(values: pa.Array, num_buckets: int) -> np.ndarray:
+    """
+    Bucket de chaque valeur
+    
+    Le hash porte sur la représentation texte de la valeur (hash pandas, stable
+    entre processus et versions de Python): 42 et "42" tombent dans le même
+    bucket, les valeurs nulles dans le bucket de la chaîne vide.
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    strings = pc.cast(values, pa.string()).fill_null("")
+    hashes = pd.util.hash_array(
+        np.asarray(strings.to_numpy(zero_copy_only=False), dtype=object),
+        categorize=False
+    )
+    return (hashes % np.uint64(num_buckets)).astype(np.int64)
+
+
+def candidate_buckets(values: Iterable[Any], num_buckets: int, value_type: Optional[pa.DataType] = None) -> Set[int]:
+    """Buckets pouvant contenir les valeurs recherchées (converties au type de la colonne)"""
+    array = pa.array(list(values))
+    if value_type is not None:
+        array = array.cast(value_type)
+    return set(bucket_ids(array, num_buckets).tolist())
+
+
+def split_by_bucket(table: pa.Table, column: str, num_buckets: int) -> Dict[int, pa.Table]:
+    """Découpe une table par bucket de la colonne clé"""
+    if column not in table.column_names:
+        raise ValueError(f"Colonne de bucketing absente: {column}")
+    
+    ids = bucket_ids(table.column(column), num_buckets)
+    order = np.argsort(ids, kind="stable")
+    sorted_ids = ids[order]
+    boundaries = np.flatnonzero(np.diff(sorted_ids)) + 1
+    
+    parts = {}
+    for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(ids)]):
+        if end > start:
+            parts[int(sorted_ids[start])] = table.take(pa.array(order[start:end]))
+    return parts
+
+
+def bucket_file_path(file_path: Path, bucket: int) -> Path:
+    """Fichier d'un bucket: <partition>/bucket=NN/<nom du fichier>"""
+    return get_bucket_partition_path(file_path.parent, bucket) / file_path.name
@@ -0,0 +1,455 @@
+"""
+Catalogue transactionnel du Data Lake (SQLite sous data_lake/_catalog)
+Chaque écrivain y enregistre les fichiers ajoutés et supprimés: listings, tailles,
+nombres de lignes et dernières versions deviennent des requêtes indexées au lieu
+de parcours du système de fichiers. Les statistiques min/max/nulls des colonnes
+clés (par fichier et par row group) y sont stockées fichier par fichier.
+"""
+import json
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from data_lake_config import CATALOG_DIR, DATA_LAKE_ROOT, HOT_FILE_SUFFIX, STREAMS_DIR, TABLES_DIR
+
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    feed TEXT NOT NULL,
+    partition_path TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    year INTEGER,
+    month INTEGER,
+    day INTEGER,
+    version INTEGER,
+    records INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    added_at TEXT NOT NULL,
+    PRIMARY KEY (feed, partition_path, file_name)
+);
+CREATE INDEX IF NOT EXISTS idx_files_date ON files (feed, year, month, day);
+CREATE INDEX IF NOT EXISTS idx_files_version ON files (feed, version);
+CREATE TABLE IF NOT EXISTS file_statistics (
+    feed TEXT NOT NULL,
+    partition_path TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    statistics TEXT NOT NULL,
+    PRIMARY KEY (feed, partition_path, file_name)
+);
+"""
+
+# Tables dont les lignes sont retirées avec le fichier qu'elles décrivent
+FILE_TABLES = ("files", "file_statistics")
+
+
+def feed_key(base_path: Path) -> str:
+    """Clé d'un feed dans le catalogue: "streams/<nom>" ou "tables/<nom>" """
+    return f"{base_path.parent.name}/{base_path.name}"
+
+
+def parse_partition(partition_path: str) -> Dict[str, Optional[int]]:
+    """Extrait year/month/day/version/bucket d'un chemin de partition hive-style"""
+    values = {"year": None, "month": None, "day": None, "version": None, "bucket": None}
+    for part in Path(partition_path).parts:
+        key, _, value = part.partition("=")
+        if key in values:
+            try:
+                values[key] = int(value.lstrip("v"))
+            except ValueError:
+                continue
+    return values
+
+
+class LakeCatalog:
+    """Catalogue des fichiers du Data Lake"""
+    
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path or CATALOG_DIR / "catalog.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.executescript(CATALOG_SCHEMA)
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connexion courte (une par opération, utilisable depuis plusieurs threads)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def add_file(self, base_path: Path, file_path: Path, records: int, size_bytes: int):
+        """Enregistre un fichier qui vient d'être écrit (ses anciennes statistiques sont retirées)"""
+        partition_path = str(file_path.parent.relative_to(base_path))
+        partition = parse_partition(partition_path)
+        
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM file_statistics WHERE feed = ? AND partition_path = ? AND file_name = ?",
+                (feed_key(base_path), partition_path, file_path.name)
+            )
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO files (
+                    feed, partition_path, file_name, year, month, day, version,
+                    records, size_bytes, added_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    feed_key(base_path), partition_path, file_path.name,
+                    partition["year"], partition["month"], partition["day"], partition["version"],
+                    records, size_bytes, datetime.now().isoformat()
+                )
+            )
+    
+    def remove_partition(self, base_path: Path, partition_path: Path) -> Dict[str, int]:
+        """
+        Retire du catalogue tous les fichiers d'une partition (et de ses sous-dossiers)
+        
+        Returns:
+            {"files": n, "records": n, "size_bytes": n} retirés
+        """
+        partition = str(partition_path.relative_to(base_path))
+        
+        with self._connect() as conn:
+            where = "feed = ? AND (partition_path = ? OR partition_path LIKE ?)"
+            params = (feed_key(base_path), partition, f"{partition}/%")
+            row = conn.execute(
+                f"""
+                SELECT COUNT(*) AS files,
+                       COALESCE(SUM(records), 0) AS records,
+                       COALESCE(SUM(size_bytes), 0) AS size_bytes
+                FROM files WHERE {where}
+                """,
+                params
+            ).fetchone()
+            for table in FILE_TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE {where}", params)
+        
+        return dict(row)
+    
+    def remove_file(self, base_path: Path, file_path: Path):
+        """Retire un fichier (et ses statistiques) du catalogue"""
+        with self._connect() as conn:
+            for table in FILE_TABLES:
+                conn.execute(
+                    f"DELETE FROM {table} WHERE feed = ? AND partition_path = ? AND file_name = ?",
+                    (feed_key(base_path), str(file_path.parent.relative_to(base_path)), file_path.name)
+                )
+    
+    def set_file_statistics(self, base_path: Path, file_path: Path, statistics: Dict):
+        """Enregistre les statistiques d'un fichier ({"columns", "row_groups"})"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO file_statistics VALUES (?, ?, ?, ?)",
+                (
+                    feed_key(base_path), str(file_path.parent.relative_to(base_path)),
+                    file_path.name, json.dumps(statistics)
+                )
+            )
+    
+    def get_file_statistics(self, base_path: Path, files: Optional[List[Path]] = None) -> Dict[Path, Dict]:
+        """
+        Statistiques des fichiers d'un feed (seuls les fichiers indexés sont retournés)
+        
+        Args:
+            files: fichiers candidats (défaut: tout le feed); seules leurs
+                statistiques sont lues, partition par partition
+        """
+        key = feed_key(base_path)
+        
+        with self._connect() as conn:
+            if files is None:
+                rows = conn.execute(
+                    "SELECT partition_path, file_name, statistics FROM file_statistics WHERE feed = ?",
+                    (key,)
+                ).fetchall()
+            else:
+                by_partition: Dict[str, List[str]] = {}
+                for file_path in files:
+                    partition_path = str(Path(file_path).parent.relative_to(base_path))
+                    by_partition.setdefault(partition_path, []).append(Path(file_path).name)
+                
+                rows = []
+                for partition_path, names in by_partition.items():
+                    # Limite du nombre de paramètres SQLite
+                    for offset in range(0, len(names), 500):
+                        chunk = names[offset:offset + 500]
+                        rows += conn.execute(
+                            f"""
+                            SELECT partition_path, file_name, statistics FROM file_statistics
+                            WHERE feed = ? AND partition_path = ?
+                              AND file_name IN ({", ".join("?" * len(chunk))})
+                            """,
+                            [key, partition_path, *chunk]
+                        ).fetchall()
+        
+        return {
+            base_path / row["partition_path"] / row["file_name"]: json.loads(row["statistics"])
+            for row in rows
+        }
+    
+    def has_feed(self, base_path: Path) -> bool:
+        """Indique si le catalogue référence des fichiers pour ce feed"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM files WHERE feed = ? LIMIT 1", (feed_key(base_path),)
+            ).fetchone()
+        return row is not None
+    
+    def list_feeds(self) -> List[str]:
+        """Liste les feeds référencés ("streams/<nom>", "tables/<nom>")"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT feed FROM files ORDER BY feed").fetchall()
+        return [row["feed"] for row in rows]
+    
+    def list_files(self, base_path: Path, partition_path: Optional[str] = None) -> List[Dict]:
+        """Liste les fichiers d'un feed (optionnellement d'une partition)"""
+        query = "SELECT * FROM files WHERE feed = ?"
+        params = [feed_key(base_path)]
+        if partition_path is not None:
+            query += " AND (partition_path = ? OR partition_path LIKE ?)"
+            params += [partition_path, f"{partition_path}/%"]
+        query += " ORDER BY partition_path, file_name"
+        
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+    
+    def list_partitions(self, base_path: Path, before: Optional[date] = None) -> List[Dict]:
+        """
+        Liste les partitions d'un feed avec fichiers, lignes et taille agrégés
+        
+        Args:
+            before: ne retourner que les partitions par date strictement antérieures
+        """
+        query = """
+            SELECT partition_path, year, month, day, version,
+                   COUNT(*) AS files_count,
+                   SUM(file_name LIKE ?) AS hot_files,
+                   SUM(records) AS records,
+                   SUM(size_bytes) AS size_bytes
+            FROM files
+            WHERE feed = ?
+        """
+        params = [f"%{HOT_FILE_SUFFIX}", feed_key(base_path)]
+        if before is not None:
+            query += " AND year IS NOT NULL AND (year * 10000 + month * 100 + day) < ?"
+            params.append(before.year * 10000 + before.month * 100 + before.day)
+        query += " GROUP BY partition_path ORDER BY partition_path"
+        
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        
+        # Le bucket (bucket=NN sous day=) est lu dans le chemin de partition
+        return [
+            {**dict(row), "bucket": parse_partition(row["partition_path"])["bucket"]}
+            for row in rows
+        ]
+    
+    def latest_file(self, base_path: Path) -> Optional[Dict]:
+        """Dernier fichier enregistré d'un feed (schéma le plus récent), None si aucun"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM files WHERE feed = ? ORDER BY added_at DESC LIMIT 1",
+                (feed_key(base_path),)
+            ).fetchone()
+        return dict(row) if row is not None else None
+    
+    def latest_version(self, base_path: Path) -> Optional[int]:
+        """Dernière version d'une table, None si aucune n'est cataloguée"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(version) AS version FROM files WHERE feed = ?",
+                (feed_key(base_path),)
+            ).fetchone()
+        return row["version"]
+    
+    def feed_totals(self, base_path: Path) -> Dict[str, int]:
+        """Totaux d'un feed: fichiers, lignes, taille, partitions"""
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT COUNT(*) AS files,
+                       COALESCE(SUM(records), 0) AS records,
+                       COALESCE(SUM(size_bytes), 0) AS size_bytes,
+                       COUNT(DISTINCT partition_path) AS partitions
+                FROM files WHERE feed = ?
+                """,
+                (feed_key(base_path),)
+            ).fetchone()
+        return dict(row)
+    
+    def replace_feed(
+        self,
+        base_path: Path,
+        files: List[Tuple[Path, int, int]],
+        statistics: Optional[Dict[Path, Dict]] = None
+    ):
+        """
+        Remplace en une transaction les fichiers d'un feed par (chemin, lignes, octets)
+        
+        Args:
+            statistics: statistiques des fichiers indexés ({chemin: statistiques});
+                None conserve les statistiques existantes (recomptage), sauf
+                celles des fichiers qui ne sont plus référencés
+        """
+        statistics_rows = [
+            (
+                feed_key(base_path), str(file_path.parent.relative_to(base_path)),
+                file_path.name, json.dumps(file_statistics)
+            )
+            for file_path, file_statistics in (statistics or {}).items()
+        ]
+        rows = []
+        for file_path, records, size_bytes in files:
+            partition_path = str(file_path.parent.relative_to(base_path))
+            partition = parse_partition(partition_path)
+            rows.append((
+                feed_key(base_path), partition_path, file_path.name,
+                partition["year"], partition["month"], partition["day"], partition["version"],
+                records, size_bytes,
+                datetime.fromtimestamp(file_path.stat().st_mtime).isoformat()
+            ))
+        
+        key = feed_key(base_path)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM files WHERE feed = ?", (key,))
+            if statistics is not None:
+                conn.execute("DELETE FROM file_statistics WHERE feed = ?", (key,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO file_statistics VALUES (?, ?, ?, ?)",
+                statistics_rows
+            )
+            conn.execute(
+                """
+                DELETE FROM file_statistics
+                WHERE feed = ? AND (partition_path, file_name) NOT IN (
+                    SELECT partition_path, file_name FROM files WHERE feed = ?
+                )
+                """,
+                (key, key)
+            )
+    
+    def rebuild(self, base_paths: Optional[List[Path]] = None) -> int:
+        """
+        Reconstruit le catalogue à partir des fichiers présents (migration, réparation)
+        
+        Seul cas où le data lake est parcouru; le nombre de lignes et les
+        statistiques des colonnes clés viennent des footers Parquet (et
+        Arrow IPC pour le tier chaud, sans statistiques).
+        
+        Returns:
+            Nombre de fichiers catalogués
+        """
+        import pyarrow.parquet as pq
+        from lake_metadata import extract_file_statistics
+        from lake_tiering import read_hot_footer
+        
+        if base_paths is None:
+            base_paths = [
+                path
+                for root in (STREAMS_DIR, TABLES_DIR)
+                if root.exists()
+                for path in root.iterdir() if path.is_dir()
+            ]
+        
+        count = 0
+        for base_path in base_paths:
+            files = []
+            statistics = {}
+            for dirpath, _, filenames in os.walk(base_path):
+                for filename in filenames:
+                    if filename.startswith("."):
+                        continue
+                    file_path = Path(dirpath) / filename
+                    if filename.endswith(".parquet"):
+                        records = pq.ParquetFile(file_path).metadata.num_rows
+                        try:
+                            statistics[file_path] = extract_file_statistics(file_path)
+                        except Exception as e:
+                            logger.warning(f"Statistiques non lues pour {file_path}: {e}")
+                    elif filename.endswith(HOT_FILE_SUFFIX):
+                        # Tier chaud: lignes comptées depuis le footer Arrow IPC
+                        records = read_hot_footer(file_path)["records"]
+                    else:
+                        continue
+                    files.append((file_path, records, file_path.stat().st_size))
+            
+            self.replace_feed(base_path, files, statistics)
+            logger.info(f"Catalogue reconstruit pour {feed_key(base_path)}: {len(files)} fichiers")
+            count += len(files)
+        
+        return count
+
+
+_catalog: Optional[LakeCatalog] = None
+
+
+def get_catalog() -> LakeCatalog:
+    """Catalogue partagé du processus"""
+    global _catalog
+    if _catalog is None:
+        _catalog = LakeCatalog()
+    return _catalog
+
+
+def set_catalog(catalog: LakeCatalog):
+    """Remplace le catalogue partagé du processus (catalogue hors data lake: benchmarks)"""
+    global _catalog
+    _catalog = catalog
+
+
+def main():
+    """Point d'entrée: reconstruction et consultation du catalogue"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Catalogue des fichiers du Data Lake"
+    )
+    parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Reconstruire le catalogue à partir des fichiers présents'
+    )
+    parser.add_argument(
+        '--list',
+        action='store_true',
+        help='Lister les feeds catalogués et leurs totaux'
+    )
+    
+    args = parser.parse_args()
+    catalog = get_catalog()
+    
+    if args.rebuild:
+        count = catalog.rebuild()
+        print(f"✓ Catalogue reconstruit: {count} fichiers")
+    
+    elif args.list:
+        for feed in catalog.list_feeds():
+            totals = catalog.feed_totals(DATA_LAKE_ROOT / feed)
+            print(
+                f"  {feed}: {totals['files']} fichiers, {totals['partitions']} partitions, "
+                f"{totals['records']:,} lignes, {totals['size_bytes'] / (1024 * 1024):.2f} MB"
+            )
+    
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
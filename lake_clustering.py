@@ -0,0 +1,295 @@
+"""
+Clustering des fichiers Parquet du Data Lake
+- Tri des lignes à l'écriture selon les clés du feed (option "cluster_by")
+- Méthodes: tri lexicographique (sort), Z-order ou courbe de Hilbert sur
+  plusieurs colonnes: les statistiques min/max des row groups deviennent
+  étroites et les lectures sélectives ne touchent que quelques row groups
+- Re-clustering des partitions existantes
+"""
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from data_lake_config import (
+    STREAMS_DIR, TABLES_DIR, LOG_FORMAT, LOG_LEVEL,
+    get_parquet_options, parquet_writer_kwargs
+)
+from lake_catalog import get_catalog
+from lake_metadata import metadata_lock, read_metadata, record_file_written, record_files_removed
+from lake_trash import move_to_trash
+from lake_writer import row_group_rows, write_parquet_atomic
+
+
+logger = logging.getLogger(__name__)
+
+CLUSTER_METHODS = ("sort", "zorder", "hilbert")
+
+
+def _dimension_ranks(table: pa.Table, columns: List[str], bits: int) -> np.ndarray:
+    """Rang dense de chaque colonne, ramené sur `bits` bits (matrice n x d)"""
+    coords = np.empty((table.num_rows, len(columns)), dtype=np.uint64)
+    scale = float((1 << bits) - 1)
+    
+    for i, column in enumerate(columns):
+        ranks = pc.rank(
+            table.column(column),
+            sort_keys="ascending",
+            tiebreaker="dense"
+        ).to_numpy().astype(np.float64) - 1
+        max_rank = max(ranks.max(), 1.0) if len(ranks) else 1.0
+        coords[:, i] = np.floor(ranks / max_rank * scale).astype(np.uint64)
+    
+    return coords
+
+
+def _interleave_bits(coords: np.ndarray, bits: int) -> np.ndarray:
+    """Entrelace les bits des coordonnées (première colonne = bit de poids fort)"""
+    keys = np.zeros(coords.shape[0], dtype=np.uint64)
+    one = np.uint64(1)
+    
+    for bit in range(bits - 1, -1, -1):
+        for i in range(coords.shape[1]):
+            keys = (keys << one) | ((coords[:, i] >> np.uint64(bit)) & one)
+    
+    return keys
+
+
+def _hilbert_transpose(coords: np.ndarray, bits: int) -> np.ndarray:
+    """Coordonnées -> index de Hilbert sous forme transposée (algorithme de Skilling)"""
+    x = coords.copy()
+    dims = x.shape[1]
+    m = np.uint64(1 << (bits - 1))
+    
+    q = m
+    while q > 1:
+        p = q - np.uint64(1)
+        for i in range(dims):
+            high = (x[:, i] & q) != 0
+            x[high, 0] ^= p
+            low = ~high
+            t = (x[low, 0] ^ x[low, i]) & p
+            x[low, 0] ^= t
+            x[low, i] ^= t
+        q >>= np.uint64(1)
+    
+    for i in range(1, dims):
+        x[:, i] ^= x[:, i - 1]
+    
+    t = np.zeros(x.shape[0], dtype=np.uint64)
+    q = m
+    while q > 1:
+        t[(x[:, dims - 1] & q) != 0] ^= q - np.uint64(1)
+        q >>= np.uint64(1)
+    
+    for i in range(dims):
+        x[:, i] ^= t
+    
+    return x
+
+
+def cluster_table(table: pa.Table, columns: List[str], method: str = "sort") -> pa.Table:
+    """
+    Réordonne les lignes d'une table selon les colonnes de clustering
+    
+    Une colonne absente de la table désactive le clustering (avertissement)
+    plutôt que de faire échouer l'écriture.
+    """
+    if not columns or table.num_rows < 2:
+        return table
+    
+    missing = [c for c in columns if c not in table.column_names]
+    if missing:
+        logger.warning(f"Clustering ignoré, colonnes absentes: {', '.join(missing)}")
+        return table
+    
+    if method not in CLUSTER_METHODS:
+        raise ValueError(f"Méthode de clustering inconnue: {method} ({', '.join(CLUSTER_METHODS)})")
+    
+    if method == "sort" or len(columns) == 1:
+        return table.sort_by([(c, "ascending") for c in columns])
+    
+    bits = min(64 // len(columns), 32)
+    coords = _dimension_ranks(table, columns, bits)
+    if method == "hilbert":
+        coords = _hilbert_transpose(coords, bits)
+    
+    order = np.argsort(_interleave_bits(coords, bits), kind="stable")
+    return table.take(pa.array(order))
+
+
+def recluster_partition(
+    base_path: Path,
+    partition_path: Path,
+    feed_name: str,
+    columns: Optional[List[str]] = None,
+    method: Optional[str] = None
+) -> int:
+    """
+    Réécrit les fichiers Parquet d'une partition en un fichier clusterisé et
+    met à jour métadonnées et catalogue
+    
+    La séquence lecture / écriture / remplacement se fait sous le verrou des
+    métadonnées du feed: seuls les fichiers Parquet enregistrés au début
+    (catalogue, sinon dossier) sont remplacés. Les fichiers du tier chaud
+    (Arrow) et ceux qu'un écrivain publie pendant la réécriture restent en place
+    et référencés. Les fichiers remplacés sont mis à la corbeille.
+    
+    Returns:
+        Nombre de lignes réécrites
+    """
+    options = get_parquet_options(feed_name)
+    columns = columns or options.get("cluster_by")
+    method = method or options.get("cluster_method", "sort")
+    if not columns:
+        raise ValueError(f"Aucune colonne de clustering pour {feed_name} (option cluster_by)")
+    
+    partition_key = str(partition_path.relative_to(base_path))
+    
+    with metadata_lock(base_path):
+        old_files = _partition_parquet_files(base_path, partition_path)
+        if not old_files:
+            return 0
+        
+        tables = [pq.read_table(f) for f in old_files]
+        entries = [
+            (old_file, old_table.num_rows, old_file.stat().st_size)
+            for old_file, old_table in zip(old_files, tables)
+        ]
+        table = cluster_table(pa.concat_tables(tables, promote_options="default"), columns, method)
+        
+        # Conserver l'empreinte de contenu de la partition (détection des snapshots inchangés)
+        metadata = read_metadata(base_path) or {"partitions": []}
+        previous = next((p for p in metadata["partitions"] if p["path"] == partition_key), {})
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        prefix = "snapshot" if base_path.parent == TABLES_DIR else "data"
+        file_path = partition_path / f"{prefix}_{timestamp}_clustered.parquet"
+        
+        write_parquet_atomic(
+            table,
+            file_path,
+            row_group_size=row_group_rows(table, options),
+            **parquet_writer_kwargs(options)
+        )
+        
+        # Le nouveau fichier est enregistré avant le retrait des anciens: la
+        # partition (et son bucketing) reste référencée
+        record_file_written(
+            base_path,
+            feed_name,
+            metadata.get("type", "table" if prefix == "snapshot" else "stream"),
+            metadata.get("storage_mode", "overwrite" if prefix == "snapshot" else "append"),
+            metadata.get("partitioning", "version" if prefix == "snapshot" else "date"),
+            partition_path,
+            file_path,
+            table.num_rows,
+            file_path.stat().st_size,
+            previous.get("content_hash")
+        )
+        
+        # Les fichiers remplacés passent par la corbeille (annulables pendant
+        # le délai de grâce) au lieu d'être supprimés
+        replaced = [entry for entry in entries if entry[0] != file_path]
+        for old_file, _, _ in replaced:
+            move_to_trash(old_file, base_path, "recluster")
+        record_files_removed(base_path, partition_path, replaced)
+    
+    logger.info(
+        f"✓ {partition_key} reclusterisée ({method} sur {', '.join(columns)}): "
+        f"{len(old_files)} fichier(s) -> {file_path.name}, {table.num_rows:,} lignes"
+    )
+    return table.num_rows
+
+
+def _partition_parquet_files(base_path: Path, partition_path: Path) -> List[Path]:
+    """Fichiers Parquet enregistrés d'une partition (catalogue, sinon dossier)"""
+    catalog = get_catalog()
+    if catalog.has_feed(base_path):
+        partition_key = str(partition_path.relative_to(base_path))
+        return [
+            partition_path / entry["file_name"]
+            for entry in catalog.list_files(base_path, partition_key)
+            if entry["partition_path"] == partition_key and entry["file_name"].endswith(".parquet")
+        ]
+    return sorted(f for f in partition_path.glob("*.parquet") if not f.name.startswith("."))
+
+
+def list_partitions(base_path: Path) -> List[Path]:
+    """Partitions ayant des fichiers Parquet (catalogue, sinon parcours du feed)"""
+    catalog = get_catalog()
+    if catalog.has_feed(base_path):
+        return [
+            base_path / partition["partition_path"]
+            for partition in catalog.list_partitions(base_path)
+            if partition["files_count"] > partition["hot_files"]
+        ]
+    return sorted({f.parent for f in base_path.rglob("*.parquet") if not f.name.startswith(".")})
+
+
+def main():
+    """Point d'entrée: re-clustering des partitions existantes"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Re-clustering des partitions Parquet du Data Lake"
+    )
+    parser.add_argument('feed', type=str, help='Nom du stream ou de la table')
+    parser.add_argument(
+        '--partition',
+        type=str,
+        action='append',
+        help='Partition à reclusteriser (répétable), défaut: toutes'
+    )
+    parser.add_argument(
+        '--columns',
+        type=str,
+        nargs='+',
+        help='Colonnes de clustering (défaut: option cluster_by du feed)'
+    )
+    parser.add_argument(
+        '--method',
+        choices=CLUSTER_METHODS,
+        help='Méthode de clustering (défaut: option cluster_method du feed)'
+    )
+    
+    args = parser.parse_args()
+    
+    # Module importé par les écrivains: la configuration du logging reste au CLI
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL),
+        format=LOG_FORMAT,
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    
+    base_path = STREAMS_DIR / args.feed
+    if not base_path.exists():
+        base_path = TABLES_DIR / args.feed
+    
+    try:
+        if args.partition:
+            partitions = [base_path / p for p in args.partition]
+        else:
+            partitions = list_partitions(base_path)
+        
+        total = 0
+        for partition_path in partitions:
+            total += recluster_partition(
+                base_path, partition_path, args.feed, args.columns, args.method
+            )
+        
+        print(f"✓ {len(partitions)} partition(s) reclusterisée(s), {total:,} lignes")
+    
+    except Exception as e:
+        logger.error(f"Erreur lors du re-clustering de {args.feed}: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""
+Maintenance des métadonnées (_metadata.json) des feeds du Data Lake
+- Mises à jour incrémentales en O(1) à partir des fichiers qui viennent d'être écrits
+- Écriture atomique (fichier temporaire + fsync + renommage)
+- Verrou inter-processus et inter-threads par feed
+- Chaque ajout / suppression est aussi enregistré dans le catalogue (lake_catalog)
+- Index de statistiques (table file_statistics du catalogue): min/max/nulls des
+  colonnes clés par fichier et par row group, lus dans le footer Parquet à
+  l'écriture; une ligne par fichier, retirée avec le fichier
+"""
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pyarrow.parquet as pq
+
+from data_lake_config import HOT_FILE_SUFFIX, STATISTICS_COLUMNS, STORAGE_FORMAT
+from lake_catalog import get_catalog
+
+try:
+    import fcntl
+except ImportError:  # Windows: verrou limité aux threads du processus
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILE = "_metadata.json"
+LOCK_FILE = ".metadata.lock"
+
+# Verrous des threads d'un même processus, par feed
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+# Feeds dont le thread courant tient déjà le verrou (verrou réentrant)
+_held_locks = threading.local()
+
+
+@contextmanager
+def metadata_lock(base_path: Path) -> Iterator[None]:
+    """
+    Verrouille les métadonnées d'un feed (exporteurs, consumers, rétention)
+    
+    Réentrant: un thread qui tient le verrou pendant une séquence
+    lecture / réécriture / remplacement de fichiers (re-clustering) peut
+    appeler les fonctions record_* du même feed.
+    """
+    base_path.mkdir(parents=True, exist_ok=True)
+    key = str(base_path.resolve())
+    
+    held = getattr(_held_locks, "feeds", None)
+    if held is None:
+        held = _held_locks.feeds = set()
+    if key in held:
+        yield
+        return
+    
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(key, threading.Lock())
+    
+    with thread_lock:
+        held.add(key)
+        try:
+            if fcntl is None:
+                yield
+                return
+            
+            with open(base_path / LOCK_FILE, 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        finally:
+            held.discard(key)
+
+
+def read_metadata(base_path: Path) -> Optional[Dict]:
+    """Lit le fichier de métadonnées d'un feed"""
+    metadata_file = base_path / METADATA_FILE
+    
+    if not metadata_file.exists():
+        return None
+    
+    with open(metadata_file, 'r') as f:
+        return json.load(f)
+
+
+def write_json_atomic(file_path: Path, data: Dict, indent: Optional[int] = 2):
+    """Écrit un fichier JSON de façon atomique: les lecteurs voient l'ancienne ou la nouvelle version"""
+    tmp_file = file_path.parent / f".{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    
+    os.replace(tmp_file, file_path)
+
+
+def write_metadata(base_path: Path, metadata: Dict):
+    """Écrit les métadonnées de façon atomique"""
+    write_json_atomic(base_path / METADATA_FILE, metadata)
+
+
+def normalize_statistic_value(value: Any) -> Any:
+    """Convertit une valeur min/max du footer en valeur JSON comparable"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+
+def extract_file_statistics(file_path: Path, columns: List[str] = STATISTICS_COLUMNS) -> Dict:
+    """
+    Lit min/max/nulls des colonnes clés dans le footer d'un fichier Parquet
+    
+    Seul le footer est lu. Une colonne sans min/max dans un row group
+    (statistiques absentes) a min/max à None: elle ne permet pas d'élaguer.
+    """
+    parquet_metadata = pq.ParquetFile(file_path).metadata
+    row_groups = []
+    
+    for rg_index in range(parquet_metadata.num_row_groups):
+        row_group = parquet_metadata.row_group(rg_index)
+        rg_columns = {}
+        
+        for col_index in range(row_group.num_columns):
+            column = row_group.column(col_index)
+            if column.path_in_schema not in columns:
+                continue
+            
+            stats = column.statistics
+            has_min_max = stats is not None and stats.has_min_max
+            rg_columns[column.path_in_schema] = {
+                "min": normalize_statistic_value(stats.min) if has_min_max else None,
+                "max": normalize_statistic_value(stats.max) if has_min_max else None,
+                "null_count": stats.null_count if stats is not None and stats.has_null_count else None
+            }
+        
+        row_groups.append({"num_rows": row_group.num_rows, "columns": rg_columns})
+    
+    # Agrégat fichier: min des min, max des max, somme des nulls
+    file_columns = {}
+    for column in {name for rg in row_groups for name in rg["columns"]}:
+        values = [rg["columns"].get(column) for rg in row_groups]
+        known = all(v is not None and v["min"] is not None for v in values)
+        null_counts = [v["null_count"] if v else None for v in values]
+        
+        try:
+            file_columns[column] = {
+                "min": min(v["min"] for v in values) if known else None,
+                "max": max(v["max"] for v in values) if known else None,
+                "null_count": sum(null_counts) if None not in null_counts else None
+            }
+        except TypeError:
+            # Types hétérogènes entre row groups: pas d'élagage possible
+            file_columns[column] = {"min": None, "max": None, "null_count": None}
+    
+    return {
+        "num_rows": parquet_metadata.num_rows,
+        "columns": file_columns,
+        "row_groups": row_groups
+    }
+
+
+def new_metadata(source_name: str, feed_type: str, storage_mode: str, partitioning: str) -> Dict:
+    """Métadonnées initiales d'un feed"""
+    return {
+        "source": source_name,
+        "type": feed_type,
+        "storage_mode": storage_mode,
+        "format": STORAGE_FORMAT,
+        "partitioning": partitioning,
+        "created_at": datetime.now().isoformat(),
+        "total_records": 0,
+        "total_size_mb": 0,
+        "total_size_bytes": 0,
+        "total_files": 0,
+        "partitions": []
+    }
+
+
+def record_file_written(
+    base_path: Path,
+    source_name: str,
+    feed_type: str,
+    storage_mode: str,
+    partitioning: str,
+    partition_path: Path,
+    file_path: Path,
+    records: int,
+    size_bytes: int,
+    content_hash: Optional[str] = None,
+    bucketing: Optional[Dict] = None
+) -> Dict:
+    """
+    Ajoute un fichier qui vient d'être écrit aux métadonnées du feed
+    
+    Seuls les compteurs du fichier sont ajoutés aux totaux et à la partition:
+    aucun parcours du dossier de partition n'est nécessaire. Pour une partition
+    bucket=NN, bucketing ({"column", "num_buckets"}) est conservé avec la
+    partition: l'élagage des buckets utilise le découpage de l'écriture.
+    
+    Returns:
+        Les métadonnées mises à jour
+    """
+    now = datetime.now().isoformat()
+    partition_key = str(partition_path.relative_to(base_path))
+    
+    with metadata_lock(base_path):
+        metadata = read_metadata(base_path) or new_metadata(
+            source_name, feed_type, storage_mode, partitioning
+        )
+        
+        # Anciennes métadonnées: taille totale uniquement en MB
+        if "total_size_bytes" not in metadata:
+            metadata["total_size_bytes"] = int(metadata.get("total_size_mb", 0) * 1024 * 1024)
+        
+        metadata["last_export"] = now
+        metadata["total_records"] += records
+        metadata["total_size_bytes"] += size_bytes
+        metadata["total_size_mb"] = round(metadata["total_size_bytes"] / (1024 * 1024), 4)
+        metadata["total_files"] = metadata.get("total_files", 0) + 1
+        
+        partition = next(
+            (p for p in metadata["partitions"] if p["path"] == partition_key),
+            None
+        )
+        if partition is None:
+            partition = {"path": partition_key, "records": 0, "size_bytes": 0, "files": 0}
+            metadata["partitions"].append(partition)
+        elif "size_bytes" not in partition:
+            partition["size_bytes"] = int(partition.get("size_mb", 0) * 1024 * 1024)
+        
+        partition["records"] += records
+        partition["size_bytes"] += size_bytes
+        partition["size_mb"] = round(partition["size_bytes"] / (1024 * 1024), 2)
+        partition["files"] = partition.get("files", 0) + 1
+        partition["exported_at"] = now
+        if content_hash:
+            partition["content_hash"] = content_hash
+        if bucketing:
+            partition["bucketing"] = bucketing
+        
+        get_catalog().add_file(base_path, file_path, records, size_bytes)
+        _add_file_statistics(base_path, file_path)
+        write_metadata(base_path, metadata)
+    
+    logger.debug(f"Métadonnées mises à jour: {base_path / METADATA_FILE}")
+    return metadata
+
+
+def record_partition_removed(base_path: Path, partition_path: Path) -> Optional[Dict]:
+    """
+    Retire une partition supprimée des métadonnées et décrémente les totaux
+    
+    Les sous-partitions (bucket=NN d'un jour supprimé) sont retirées avec elle.
+    
+    Returns:
+        L'entrée de partition retirée (compteurs cumulés des sous-partitions),
+        None si elle n'était pas référencée
+    """
+    partition_key = str(partition_path.relative_to(base_path))
+    prefix = f"{partition_key}/"
+    
+    with metadata_lock(base_path):
+        get_catalog().remove_partition(base_path, partition_path)
+        
+        metadata = read_metadata(base_path)
+        if metadata is None:
+            return None
+        
+        removed_partitions = [
+            p for p in metadata["partitions"]
+            if p["path"] == partition_key or p["path"].startswith(prefix)
+        ]
+        if not removed_partitions:
+            return None
+        
+        metadata["partitions"] = [p for p in metadata["partitions"] if p not in removed_partitions]
+        if len(removed_partitions) == 1 and removed_partitions[0]["path"] == partition_key:
+            partition = removed_partitions[0]
+        else:
+            partition = {
+                "path": partition_key,
+                "records": sum(p.get("records", 0) for p in removed_partitions),
+                "size_bytes": sum(
+                    p.get("size_bytes", int(p.get("size_mb", 0) * 1024 * 1024)) for p in removed_partitions
+                ),
+                "files": sum(p.get("files", 0) for p in removed_partitions)
+            }
+        size_bytes = partition.get("size_bytes", int(partition.get("size_mb", 0) * 1024 * 1024))
+        
+        metadata["total_records"] = max(0, metadata["total_records"] - partition.get("records", 0))
+        metadata["total_size_bytes"] = max(
+            0, metadata.get("total_size_bytes", int(metadata.get("total_size_mb", 0) * 1024 * 1024)) - size_bytes
+        )
+        metadata["total_size_mb"] = round(metadata["total_size_bytes"] / (1024 * 1024), 4)
+        metadata["total_files"] = max(0, metadata.get("total_files", 0) - partition.get("files", 0))
+        
+        write_metadata(base_path, metadata)
+    
+    return partition
+
+
+def record_files_removed(
+    base_path: Path,
+    partition_path: Path,
+    files: List[Tuple[Path, int, int]]
+) -> Optional[Dict]:
+    """
+    Retire des fichiers supprimés d'une partition qui reste en place
+    (conversion du tier chaud, compaction)
+    
+    Args:
+        files: (chemin, lignes, octets) des fichiers supprimés
+    
+    Returns:
+        Les métadonnées mises à jour, None si le feed n'a pas de métadonnées
+    """
+    partition_key = str(partition_path.relative_to(base_path))
+    records = sum(entry[1] for entry in files)
+    size_bytes = sum(entry[2] for entry in files)
+    
+    with metadata_lock(base_path):
+        catalog = get_catalog()
+        for file_path, _, _ in files:
+            catalog.remove_file(base_path, file_path)
+        
+        metadata = read_metadata(base_path)
+        if metadata is None:
+            return None
+        
+        metadata["total_records"] = max(0, metadata["total_records"] - records)
+        metadata["total_size_bytes"] = max(
+            0, metadata.get("total_size_bytes", int(metadata.get("total_size_mb", 0) * 1024 * 1024)) - size_bytes
+        )
+        metadata["total_size_mb"] = round(metadata["total_size_bytes"] / (1024 * 1024), 4)
+        metadata["total_files"] = max(0, metadata.get("total_files", 0) - len(files))
+        
+        partition = next(
+            (p for p in metadata["partitions"] if p["path"] == partition_key),
+            None
+        )
+        if partition is not None:
+            partition["records"] = max(0, partition.get("records", 0) - records)
+            partition["size_bytes"] = max(0, partition.get("size_bytes", 0) - size_bytes)
+            partition["size_mb"] = round(partition["size_bytes"] / (1024 * 1024), 2)
+            partition["files"] = max(0, partition.get("files", 0) - len(files))
+            if partition["files"] == 0:
+                metadata["partitions"].remove(partition)
+        
+        write_metadata(base_path, metadata)
+    
+    return metadata
+
+
+def _add_file_statistics(base_path: Path, file_path: Path):
+    """Enregistre au catalogue les statistiques d'un fichier (appelé sous verrou)"""
+    # Fichiers du tier chaud (Arrow IPC): pas de footer Parquet, toujours lus
+    if file_path.suffix == HOT_FILE_SUFFIX:
+        return
+    
+    try:
+        file_statistics = extract_file_statistics(file_path)
+    except Exception as e:
+        # L'index est une optimisation: un fichier absent de l'index est toujours lu
+        logger.warning(f"Statistiques non lues pour {file_path}: {e}")
+        return
+    
+    get_catalog().set_file_statistics(base_path, file_path, file_statistics)
+
+
+def replace_partition_counts(base_path: Path, partitions: Dict[str, Dict]) -> Dict:
+    """
+    Remplace les compteurs des partitions par des valeurs recomptées
+    
+    Args:
+        partitions: {chemin de partition: {"records", "size_bytes", "files"}}
+    
+    Les autres champs des partitions (exported_at, content_hash...) sont conservés,
+    les partitions sans fichier sont retirées.
+    
+    Returns:
+        Les métadonnées mises à jour
+    """
+    is_table = base_path.parent.name == "tables"
+    
+    with metadata_lock(base_path):
+        metadata = read_metadata(base_path) or new_metadata(
+            base_path.name,
+            "table" if is_table else "stream",
+            "overwrite" if is_table else "append",
+            "version" if is_table else "date"
+        )
+        existing = {p["path"]: p for p in metadata["partitions"]}
+        
+        metadata["partitions"] = []
+        for partition_key in sorted(partitions):
+            counts = partitions[partition_key]
+            partition = existing.get(partition_key, {"path": partition_key})
+            partition["records"] = counts["records"]
+            partition["size_bytes"] = counts["size_bytes"]
+            partition["size_mb"] = round(counts["size_bytes"] / (1024 * 1024), 2)
+            partition["files"] = counts["files"]
+            metadata["partitions"].append(partition)
+        
+        metadata["total_records"] = sum(p["records"] for p in metadata["partitions"])
+        metadata["total_size_bytes"] = sum(p["size_bytes"] for p in metadata["partitions"])
+        metadata["total_size_mb"] = round(metadata["total_size_bytes"] / (1024 * 1024), 4)
+        metadata["total_files"] = sum(p["files"] for p in metadata["partitions"])
+        metadata["recounted_at"] = datetime.now().isoformat()
+        
+        write_metadata(base_path, metadata)
+    
+    return metadata
@@ -0,0 +1,575 @@
+"""
+Lecture du Data Lake (pyarrow.dataset)
+- Layouts hive-style: year=/month=/day=[/bucket=NN] (streams) et version=vN (tables)
+- Élagage des partitions (plage de dates, version, buckets des clés filtrées)
+  à partir du catalogue
+- Projection de colonnes et filtres poussés jusqu'aux row groups Parquet
+- Tier chaud des streams (fichiers Arrow IPC récents) lu en memory-map et
+  réuni au tier froid Parquet dans un même dataset
+- Lecture en flux par record batches (mémoire bornée)
+"""
+import logging
+import re
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from data_lake_config import (
+    STREAMS_DIR, TABLES_DIR, BATCH_SIZE, LOG_FORMAT, LOG_LEVEL
+)
+from lake_bucketing import candidate_buckets
+from lake_catalog import get_catalog, parse_partition
+from lake_metadata import read_metadata
+from lake_tiering import is_hot_file, read_hot_footer
+from metadata_utils import StatisticsPruner
+
+
+logger = logging.getLogger(__name__)
+
+# Schémas des clés de partition (les valeurs sont lues dans les noms de dossiers)
+DATE_PARTITIONING = ds.partitioning(
+    pa.schema([("year", pa.int32()), ("month", pa.int32()), ("day", pa.int32()), ("bucket", pa.int32())]),
+    flavor="hive"
+)
+VERSION_PARTITIONING = ds.partitioning(
+    pa.schema([("version", pa.string())]),
+    flavor="hive"
+)
+
+# Filtres: expression pyarrow ou conjonction de tuples (colonne, opérateur, valeur)
+Filters = Union[ds.Expression, List[Tuple[str, str, Any]]]
+
+FILTER_PATTERN = re.compile(r"^\s*(\w+)\s*(==|!=|<=|>=|<|>|=)\s*(.+?)\s*$")
+
+
+class LakeReader:
+    """Lecteur des streams et tables du Data Lake"""
+    
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+    
+    @staticmethod
+    def feed_path(feed_name: str) -> Path:
+        """Chemin d'un feed (stream ou table)"""
+        for root in (STREAMS_DIR, TABLES_DIR):
+            if (root / feed_name).is_dir():
+                return root / feed_name
+        raise ValueError(f"Feed introuvable dans le data lake: {feed_name}")
+    
+    @staticmethod
+    def is_table(base_path: Path) -> bool:
+        """Indique si le feed est une table versionnée"""
+        return base_path.parent == TABLES_DIR
+    
+    @staticmethod
+    def latest_version(base_path: Path) -> Optional[int]:
+        """Dernière version d'une table (catalogue, sinon dossiers)"""
+        latest = get_catalog().latest_version(base_path)
+        if latest is not None:
+            return latest
+        
+        versions = []
+        for version_dir in base_path.glob("version=v*"):
+            try:
+                versions.append(int(version_dir.name.replace("version=v", "")))
+            except ValueError:
+                continue
+        return max(versions, default=None)
+    
+    def _partition_files(
+        self,
+        base_path: Path,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        version: Optional[int],
+        filters: Optional[Filters] = None
+    ) -> Optional[List[str]]:
+        """
+        Fichiers des partitions retenues, lus dans le catalogue
+        
+        Returns:
+            Liste de chemins, ou None si le feed n'est pas catalogué
+        """
+        catalog = get_catalog()
+        if not catalog.has_feed(base_path):
+            return None
+        
+        files = []
+        partitions = self._prune_buckets(base_path, catalog.list_partitions(base_path), filters)
+        for partition in partitions:
+            if version is not None and partition["version"] != version:
+                continue
+            if partition["year"] is not None and (start_date or end_date):
+                partition_date = date(partition["year"], partition["month"], partition["day"])
+                if start_date and partition_date < start_date:
+                    continue
+                if end_date and partition_date > end_date:
+                    continue
+            files.extend(
+                str(base_path / entry["partition_path"] / entry["file_name"])
+                for entry in catalog.list_files(base_path, partition["partition_path"])
+            )
+        return files
+    
+    @staticmethod
+    def _prune_buckets(base_path: Path, partitions: List[Dict], filters: Optional[Filters]) -> List[Dict]:
+        """
+        Écarte les partitions bucket=NN qui ne peuvent pas contenir les clés
+        filtrées (== ou in sur la colonne de bucketing)
+        
+        Le découpage (colonne, nombre de buckets) est celui enregistré avec
+        chaque partition dans _metadata.json au moment de l'écriture.
+        """
+        if not filters or isinstance(filters, ds.Expression):
+            return partitions
+        if not any(partition["bucket"] is not None for partition in partitions):
+            return partitions
+        
+        keys = {}
+        for column, op, value in filters:
+            if op == "==":
+                keys[column] = [value]
+            elif op == "in":
+                keys[column] = list(value)
+        if not keys:
+            return partitions
+        
+        metadata = read_metadata(base_path) or {"partitions": []}
+        bucketing = {p["path"]: p.get("bucketing") for p in metadata["partitions"]}
+        candidates = {}
+        kept = []
+        
+        for partition in partitions:
+            spec = bucketing.get(partition["partition_path"]) if partition["bucket"] is not None else None
+            if spec and spec["column"] in keys:
+                key = (spec["column"], spec["num_buckets"])
+                if key not in candidates:
+                    candidates[key] = candidate_buckets(keys[spec["column"]], spec["num_buckets"])
+                if partition["bucket"] not in candidates[key]:
+                    continue
+            kept.append(partition)
+        
+        return kept
+    
+    @staticmethod
+    def _date_expression(start_date: Optional[date], end_date: Optional[date]) -> Optional[ds.Expression]:
+        """Filtre de plage de dates sur les clés de partition year/month/day"""
+        day_key = ds.field("year") * 10000 + ds.field("month") * 100 + ds.field("day")
+        expression = None
+        if start_date:
+            expression = day_key >= start_date.year * 10000 + start_date.month * 100 + start_date.day
+        if end_date:
+            upper = day_key <= end_date.year * 10000 + end_date.month * 100 + end_date.day
+            expression = upper if expression is None else expression & upper
+        return expression
+    
+    @staticmethod
+    def _filter_expression(schema: pa.Schema, filters: Filters) -> ds.Expression:
+        """Convertit des tuples (colonne, opérateur, valeur) en expression typée selon le schéma"""
+        if isinstance(filters, ds.Expression):
+            return filters
+        
+        expression = None
+        for column, op, value in filters:
+            if column not in schema.names:
+                raise ValueError(f"Colonne inconnue dans le filtre: {column}")
+            column_type = schema.field(column).type
+            
+            if op == "in":
+                value_set = pa.array(value).cast(column_type)
+                term = pc.is_in(ds.field(column), value_set=value_set)
+            else:
+                scalar = pa.scalar(value).cast(column_type)
+                term = {
+                    "==": ds.field(column) == scalar,
+                    "!=": ds.field(column) != scalar,
+                    "<": ds.field(column) < scalar,
+                    "<=": ds.field(column) <= scalar,
+                    ">": ds.field(column) > scalar,
+                    ">=": ds.field(column) >= scalar
+                }[op]
+            expression = term if expression is None else expression & term
+        
+        return expression
+    
+    def dataset(
+        self,
+        feed_name: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        version: Optional[int] = None,
+        all_versions: bool = False,
+        filters: Optional[Filters] = None
+    ) -> Tuple[ds.Dataset, Optional[ds.Expression]]:
+        """
+        Construit le dataset d'un feed limité aux partitions utiles
+        
+        Pour une table, seule la dernière version est lue sauf si une version
+        est demandée ou si all_versions est vrai.
+        
+        Returns:
+            (dataset, expression de partition restant à appliquer)
+        """
+        base_path = self.feed_path(feed_name)
+        
+        if self.is_table(base_path):
+            partitioning = VERSION_PARTITIONING
+            if version is None and not all_versions:
+                version = self.latest_version(base_path)
+            partition_expression = (
+                ds.field("version") == f"v{version}" if version is not None else None
+            )
+        else:
+            partitioning = DATE_PARTITIONING
+            partition_expression = self._date_expression(start_date, end_date)
+        
+        files = self._partition_files(
+            base_path,
+            start_date if not self.is_table(base_path) else None,
+            end_date if not self.is_table(base_path) else None,
+            version,
+            filters
+        )
+        
+        remaining_expression = None
+        if files is None:
+            # Feed non catalogué: découverte des fichiers, élagage par
+            # l'expression de partition
+            files = self._discover_files(base_path)
+            remaining_expression = partition_expression
+        elif not files:
+            # Aucune partition retenue: dataset vide, sans parcours du feed
+            return self._empty_dataset(base_path, partitioning), None
+        
+        cold_files = [f for f in files if not is_hot_file(f)]
+        hot_files = [f for f in files if is_hot_file(f)]
+        
+        datasets = []
+        if cold_files or not hot_files:
+            dataset = ds.dataset(
+                cold_files,
+                format="parquet",
+                partitioning=partitioning,
+                partition_base_dir=str(base_path)
+            )
+            
+            # Élagage par l'index de statistiques (fichiers sans ligne candidate)
+            if remaining_expression is None and filters and not isinstance(filters, ds.Expression):
+                candidates = {
+                    str(path)
+                    for path in StatisticsPruner.select_row_groups(
+                        base_path, filters, [Path(f) for f in cold_files]
+                    )
+                }
+                dataset = ds.FileSystemDataset(
+                    [fragment for fragment in dataset.get_fragments() if fragment.path in candidates],
+                    dataset.schema,
+                    dataset.format,
+                    dataset.filesystem
+                )
+            datasets.append(dataset)
+        
+        if hot_files:
+            # Tier chaud: Arrow IPC non compressé, lu en memory-map
+            datasets.append(ds.dataset(
+                hot_files,
+                format="ipc",
+                partitioning=partitioning,
+                partition_base_dir=str(base_path),
+                filesystem=pafs.LocalFileSystem(use_mmap=True)
+            ))
+        
+        if len(datasets) == 1:
+            return datasets[0], remaining_expression
+        
+        schema = pa.unify_schemas([d.schema for d in datasets], promote_options="permissive")
+        dataset = ds.UnionDataset(schema, [d.replace_schema(schema) for d in datasets])
+        return dataset, remaining_expression
+    
+    @staticmethod
+    def _empty_dataset(base_path: Path, partitioning: ds.Partitioning) -> ds.Dataset:
+        """Dataset vide au schéma du feed (dernier fichier catalogué) et de ses clés de partition"""
+        schema = pa.schema([])
+        entry = get_catalog().latest_file(base_path)
+        if entry is not None:
+            file_path = base_path / entry["partition_path"] / entry["file_name"]
+            try:
+                schema = read_hot_footer(file_path)["schema"] if is_hot_file(file_path) else pq.read_schema(file_path)
+            except OSError as e:
+                logger.warning(f"Schéma non lu pour {file_path}: {e}")
+        
+        for field in partitioning.schema:
+            if field.name not in schema.names:
+                schema = schema.append(field)
+        return ds.dataset([], schema=schema, format="parquet")
+    
+    @staticmethod
+    def _discover_files(base_path: Path) -> List[str]:
+        """Fichiers Parquet et Arrow d'un feed non catalogué (fichiers temporaires exclus)"""
+        return [
+            str(file_path)
+            for file_path in sorted(base_path.rglob("*"))
+            if (file_path.suffix == ".parquet" or is_hot_file(file_path))
+            and not file_path.name.startswith(".")
+        ]
+    
+    def bucket_files(
+        self,
+        feed_name: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict[Optional[int], List[str]]:
+        """
+        Fichiers d'un stream regroupés par bucket
+        
+        Toutes les lignes d'une clé sont dans le même bucket: chaque groupe peut
+        être traité indépendamment (un worker par bucket pour les traitements
+        par utilisateur). Les fichiers de partitions non bucketées sont
+        regroupés sous None.
+        """
+        base_path = self.feed_path(feed_name)
+        files = self._partition_files(base_path, start_date, end_date, None)
+        if files is None:
+            files = []
+            for file_path in map(Path, self._discover_files(base_path)):
+                partition = parse_partition(str(file_path.parent.relative_to(base_path)))
+                if partition["year"] is None:
+                    continue
+                partition_date = date(partition["year"], partition["month"], partition["day"])
+                if (start_date and partition_date < start_date) or (end_date and partition_date > end_date):
+                    continue
+                files.append(str(file_path))
+        
+        groups: Dict[Optional[int], List[str]] = {}
+        for file_path in files:
+            bucket_dir = Path(file_path).parent.name
+            bucket = int(bucket_dir.split("=")[1]) if bucket_dir.startswith("bucket=") else None
+            groups.setdefault(bucket, []).append(file_path)
+        return groups
+    
+    def scan(
+        self,
+        feed_name: str,
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        version: Optional[int] = None,
+        all_versions: bool = False
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Lit un feed par record batches
+        
+        Args:
+            columns: projection (None = toutes les colonnes)
+            filters: expression pyarrow ou liste de (colonne, opérateur, valeur)
+            start_date / end_date: plage de partitions (streams, bornes incluses)
+            version / all_versions: version(s) lue(s) (tables)
+        """
+        dataset, partition_expression = self.dataset(
+            feed_name, start_date, end_date, version, all_versions, filters
+        )
+        
+        expression = partition_expression
+        if filters:
+            filter_expression = self._filter_expression(dataset.schema, filters)
+            expression = filter_expression if expression is None else expression & filter_expression
+        
+        # Readahead réduit: quelques batches en mémoire à la fois
+        scanner = dataset.scanner(
+            columns=columns,
+            filter=expression,
+            batch_size=self.batch_size,
+            batch_readahead=2,
+            fragment_readahead=1
+        )
+        
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch
+    
+    def read_table(self, feed_name: str, **kwargs) -> pa.Table:
+        """Lit un feed entier (après projection et filtres) en table Arrow"""
+        batches = list(self.scan(feed_name, **kwargs))
+        if not batches:
+            dataset, _ = self.dataset(feed_name)
+            columns = kwargs.get("columns")
+            schema = dataset.schema
+            if columns:
+                schema = pa.schema([schema.field(c) for c in columns])
+            return schema.empty_table()
+        return pa.Table.from_batches(batches)
+    
+    def read_pandas(self, feed_name: str, **kwargs):
+        """Lit un feed en DataFrame pandas"""
+        return self.read_table(feed_name, **kwargs).to_pandas()
+    
+    def export(
+        self,
+        feed_name: str,
+        output: Path,
+        output_format: str = "parquet",
+        limit: Optional[int] = None,
+        **kwargs
+    ) -> int:
+        """
+        Exporte le résultat d'une requête dans un fichier, batch par batch
+        
+        Returns:
+            Nombre de lignes exportées
+        """
+        import pyarrow.csv as pv
+        
+        writer = None
+        rows = 0
+        
+        try:
+            for batch in self.scan(feed_name, **kwargs):
+                if limit is not None:
+                    if rows >= limit:
+                        break
+                    batch = batch.slice(0, limit - rows)
+                
+                if writer is None:
+                    if output_format == "csv":
+                        writer = pv.CSVWriter(str(output), batch.schema)
+                    else:
+                        writer = pq.ParquetWriter(str(output), batch.schema)
+                
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        logger.info(f"✓ {rows:,} lignes exportées vers {output}")
+        return rows
+
+
+def parse_filter(expression: str) -> Tuple[str, str, Any]:
+    """Parse un filtre CLI "colonne<op>valeur" (ex: user_id==42, amount>=100)"""
+    match = FILTER_PATTERN.match(expression)
+    if not match:
+        raise ValueError(f"Filtre invalide: {expression}")
+    
+    column, op, raw_value = match.groups()
+    op = "==" if op == "=" else op
+    raw_value = raw_value.strip("'\"")
+    
+    for cast in (int, float):
+        try:
+            return column, op, cast(raw_value)
+        except ValueError:
+            continue
+    return column, op, raw_value
+
+
+def main():
+    """Point d'entrée: requêtes sur le data lake"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Lecture et export des données du Data Lake"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    
+    def add_query_arguments(subparser):
+        subparser.add_argument('feed', type=str, help='Nom du stream ou de la table')
+        subparser.add_argument(
+            '--columns',
+            type=str,
+            nargs='+',
+            help='Colonnes à lire (projection)'
+        )
+        subparser.add_argument(
+            '--filter',
+            type=str,
+            action='append',
+            default=[],
+            help='Filtre colonne<op>valeur, répétable (ex: --filter user_id==42)'
+        )
+        subparser.add_argument(
+            '--start-date',
+            type=str,
+            help='Première partition lue (YYYY-MM-DD, streams)'
+        )
+        subparser.add_argument(
+            '--end-date',
+            type=str,
+            help='Dernière partition lue (YYYY-MM-DD, streams)'
+        )
+        subparser.add_argument(
+            '--version',
+            type=int,
+            help='Version lue (tables, défaut: dernière)'
+        )
+        subparser.add_argument(
+            '--all-versions',
+            action='store_true',
+            help='Lire toutes les versions (tables)'
+        )
+    
+    export_parser = subparsers.add_parser('export', help='Exporter le résultat d\'une requête')
+    add_query_arguments(export_parser)
+    export_parser.add_argument('--output', type=str, required=True, help='Fichier de sortie')
+    export_parser.add_argument(
+        '--format',
+        type=str,
+        choices=['parquet', 'csv'],
+        default='parquet',
+        help='Format de sortie'
+    )
+    export_parser.add_argument('--limit', type=int, help='Nombre maximum de lignes')
+    
+    count_parser = subparsers.add_parser('count', help='Compter les lignes d\'une requête')
+    add_query_arguments(count_parser)
+    
+    args = parser.parse_args()
+    
+    # Module importé par lake_sql et lake_time_travel: la configuration du logging reste au CLI
+    # (stderr: les résultats sont écrits sur stdout)
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL),
+        format=LOG_FORMAT,
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+    
+    if args.command is None:
+        parser.print_help()
+        return
+    
+    try:
+        query = {
+            "columns": args.columns,
+            "filters": [parse_filter(f) for f in args.filter] or None,
+            "start_date": datetime.strptime(args.start_date, "%Y-%m-%d").date() if args.start_date else None,
+            "end_date": datetime.strptime(args.end_date, "%Y-%m-%d").date() if args.end_date else None,
+            "version": args.version,
+            "all_versions": args.all_versions
+        }
+        reader = LakeReader()
+        
+        if args.command == 'export':
+            rows = reader.export(
+                args.feed, Path(args.output), args.format, limit=args.limit, **query
+            )
+            print(f"✓ {rows:,} lignes exportées vers {args.output}")
+        
+        elif args.command == 'count':
+            rows = sum(batch.num_rows for batch in reader.scan(args.feed, **query))
+            print(f"{args.feed}: {rows:,} lignes")
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de la requête: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+SQL embarqué sur le Data Lake (DuckDB)
+- Une vue par stream et par table des configs de feeds, sur les fichiers Parquet
+  (et les fichiers Arrow IPC du tier chaud des streams)
+- Tables: vue sur la dernière version (+ vue <table>_all_versions)
+- Colonnes de partition typées (year/month/day/bucket INTEGER, version VARCHAR)
+- Scans parallèles (threads DuckDB), export Parquet/CSV
+- Cache local des résultats, clé = texte de la requête + manifeste des fichiers
+"""
+import hashlib
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from data_lake_config import (
+    STREAMS_CONFIG, TABLES_CONFIG, QUERY_CACHE_DIR,
+    get_stream_path, get_table_path,
+    LOG_FORMAT, LOG_LEVEL
+)
+from lake_catalog import get_catalog
+from lake_reader import DATE_PARTITIONING
+from lake_tiering import is_hot_file
+from lake_writer import write_parquet_atomic
+
+try:
+    import duckdb
+except ImportError:  # Dépendance optionnelle
+    duckdb = None
+
+
+logger = logging.getLogger(__name__)
+
+DATE_HIVE_TYPES = "{'year': INTEGER, 'month': INTEGER, 'day': INTEGER}"
+BUCKET_HIVE_TYPES = "{'year': INTEGER, 'month': INTEGER, 'day': INTEGER, 'bucket': INTEGER}"
+VERSION_HIVE_TYPES = "{'version': VARCHAR}"
+
+
+def _sql_list(paths: List[Path]) -> str:
+    """Liste SQL de chemins de fichiers"""
+    return "[" + ", ".join("'" + str(p).replace("'", "''") + "'" for p in paths) + "]"
+
+
+class LakeSQL:
+    """Moteur SQL DuckDB sur les fichiers Parquet du Data Lake"""
+    
+    def __init__(
+        self,
+        threads: Optional[int] = None,
+        use_cache: bool = True,
+        cache_dir: Path = QUERY_CACHE_DIR
+    ):
+        if duckdb is None:
+            raise ImportError("lake_sql nécessite duckdb: pip install duckdb")
+        
+        self.connection = duckdb.connect(database=":memory:")
+        if threads:
+            self.connection.execute(f"SET threads TO {int(threads)}")
+        
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.views: Dict[str, List[Path]] = {}
+        self.manifest_hash: Optional[str] = None
+        
+        self.register_views()
+    
+    @staticmethod
+    def _feed_files(base_path: Path) -> List[Path]:
+        """Fichiers Parquet et Arrow d'un feed (catalogue, sinon parcours)"""
+        catalog = get_catalog()
+        if catalog.has_feed(base_path):
+            return [
+                base_path / entry["partition_path"] / entry["file_name"]
+                for entry in catalog.list_files(base_path)
+            ]
+        if not base_path.exists():
+            return []
+        return sorted(
+            file_path for file_path in base_path.rglob("*")
+            if (file_path.suffix == ".parquet" or is_hot_file(file_path))
+            and not file_path.name.startswith(".")
+        )
+    
+    @staticmethod
+    def _latest_version_files(files: List[Path]) -> List[Path]:
+        """Fichiers de la dernière version d'une table"""
+        versions = {}
+        for file_path in files:
+            try:
+                version = int(file_path.parent.name.replace("version=v", ""))
+            except ValueError:
+                continue
+            versions.setdefault(version, []).append(file_path)
+        return versions[max(versions)] if versions else []
+    
+    def _create_view(self, view_name: str, files: List[Path], hive_types: str):
+        """
+        Crée (ou remplace) une vue sur une liste de fichiers Parquet
+        
+        DuckDB refuse des profondeurs de partition différentes dans un même
+        read_parquet: les fichiers bucketés (bucket=NN) d'un stream sont lus
+        séparément et réunis par nom de colonne (bucket NULL pour les autres).
+        Les fichiers du tier chaud (Arrow IPC) sont enregistrés comme dataset
+        pyarrow en memory-map et ajoutés à l'union.
+        """
+        groups = {}
+        hot_files = []
+        for file_path in files:
+            if is_hot_file(file_path):
+                hot_files.append(file_path)
+                continue
+            groups.setdefault(file_path.parent.name.startswith("bucket="), []).append(file_path)
+        
+        selects = [
+            f"""
+            SELECT * FROM read_parquet(
+                {_sql_list(group)},
+                hive_partitioning = true,
+                hive_types = {BUCKET_HIVE_TYPES if bucketed else hive_types},
+                union_by_name = true
+            )
+            """
+            for bucketed, group in sorted(groups.items())
+        ]
+        
+        if hot_files:
+            base_path = self._feed_base_path(hot_files[0])
+            hot_dataset = ds.dataset(
+                [str(f) for f in hot_files],
+                format="ipc",
+                partitioning=DATE_PARTITIONING,
+                partition_base_dir=str(base_path),
+                filesystem=pafs.LocalFileSystem(use_mmap=True)
+            )
+            self.connection.register(f"__hot_{view_name}", hot_dataset)
+            selects.append(f'SELECT * FROM "__hot_{view_name}"')
+        
+        self.connection.execute(
+            f'CREATE OR REPLACE VIEW "{view_name}" AS ' + " UNION ALL BY NAME ".join(selects)
+        )
+        self.views[view_name] = files
+    
+    @staticmethod
+    def _feed_base_path(file_path: Path) -> Path:
+        """Dossier du feed d'un fichier (parent du premier dossier de partition)"""
+        for parent in file_path.parents:
+            if "=" not in parent.name:
+                return parent
+        return file_path.parent
+    
+    def register_views(self):
+        """Enregistre une vue par stream et table configurés ayant des fichiers"""
+        self.views = {}
+        
+        for stream_name, config in STREAMS_CONFIG.items():
+            if not config.get("enabled", True):
+                continue
+            files = self._feed_files(get_stream_path(stream_name))
+            if files:
+                self._create_view(stream_name, files, DATE_HIVE_TYPES)
+        
+        for table_name, config in TABLES_CONFIG.items():
+            if not config.get("enabled", True):
+                continue
+            files = self._feed_files(get_table_path(table_name))
+            if files:
+                self._create_view(table_name, self._latest_version_files(files), VERSION_HIVE_TYPES)
+                self._create_view(f"{table_name}_all_versions", files, VERSION_HIVE_TYPES)
+        
+        self.manifest_hash = self._compute_manifest_hash()
+        logger.info(f"{len(self.views)} vues enregistrées")
+    
+    def _compute_manifest_hash(self) -> str:
+        """Empreinte des fichiers sous les vues (chemin, taille, date de modification)"""
+        digest = hashlib.sha256()
+        for view_name in sorted(self.views):
+            digest.update(view_name.encode())
+            for file_path in sorted(self.views[view_name]):
+                try:
+                    stat = file_path.stat()
+                except FileNotFoundError:
+                    continue
+                digest.update(f"{file_path}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+    
+    def _cache_path(self, query: str) -> Path:
+        """Fichier de cache d'une requête pour le manifeste courant"""
+        normalized = " ".join(query.split())
+        key = hashlib.sha256(f"{normalized}\n{self.manifest_hash}".encode()).hexdigest()
+        return self.cache_dir / f"{key}.parquet"
+    
+    def query(self, query: str) -> pa.Table:
+        """Exécute une requête SQL (résultat servi par le cache si les fichiers n'ont pas changé)"""
+        cache_path = self._cache_path(query)
+        
+        if self.use_cache and cache_path.exists():
+            logger.info(f"Résultat servi depuis le cache: {cache_path.name}")
+            return pq.read_table(cache_path)
+        
+        result = self.connection.execute(query).fetch_arrow_table()
+        
+        if self.use_cache:
+            write_parquet_atomic(result, cache_path)
+        
+        return result
+    
+    def export(self, query: str, output: Path, output_format: str = "parquet") -> int:
+        """
+        Exporte le résultat d'une requête en Parquet ou CSV
+        
+        Returns:
+            Nombre de lignes exportées
+        """
+        result = self.query(query)
+        
+        if output_format == "csv":
+            pv.write_csv(result, str(output))
+        else:
+            pq.write_table(result, str(output))
+        
+        logger.info(f"✓ {result.num_rows:,} lignes exportées vers {output}")
+        return result.num_rows
+    
+    def clear_cache(self) -> int:
+        """Supprime les résultats en cache"""
+        removed = 0
+        if self.cache_dir.exists():
+            for cache_file in self.cache_dir.glob("*.parquet"):
+                cache_file.unlink()
+                removed += 1
+        return removed
+    
+    def close(self):
+        """Ferme la connexion DuckDB"""
+        self.connection.close()
+
+
+def main():
+    """Point d'entrée: requêtes SQL sur le data lake"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="SQL sur le Data Lake (DuckDB)"
+    )
+    parser.add_argument(
+        'query',
+        type=str,
+        nargs='?',
+        help='Requête SQL (les streams et tables sont des vues)'
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Exporter le résultat dans un fichier'
+    )
+    parser.add_argument(
+        '--format',
+        type=str,
+        choices=['parquet', 'csv'],
+        default='parquet',
+        help='Format d\'export'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        help='Nombre de threads DuckDB (défaut: tous les coeurs)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignorer le cache des résultats'
+    )
+    parser.add_argument(
+        '--views',
+        action='store_true',
+        help='Lister les vues disponibles'
+    )
+    parser.add_argument(
+        '--clear-cache',
+        action='store_true',
+        help='Vider le cache des résultats'
+    )
+    
+    args = parser.parse_args()
+    
+    # Module utilisable comme bibliothèque (LakeSQL): la configuration du logging reste au CLI
+    # (stderr: les résultats sont écrits sur stdout)
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL),
+        format=LOG_FORMAT,
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+    
+    try:
+        lake_sql = LakeSQL(threads=args.threads, use_cache=not args.no_cache)
+        
+        if args.clear_cache:
+            print(f"✓ {lake_sql.clear_cache()} résultats supprimés du cache")
+        
+        elif args.views:
+            for view_name, files in sorted(lake_sql.views.items()):
+                print(f"  {view_name}: {len(files)} fichiers")
+        
+        elif args.query:
+            if args.output:
+                rows = lake_sql.export(args.query, Path(args.output), args.format)
+                print(f"✓ {rows:,} lignes exportées vers {args.output}")
+            else:
+                print(lake_sql.query(args.query).to_pandas().to_string())
+        
+        else:
+            parser.print_help()
+        
+        lake_sql.close()
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de la requête SQL: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
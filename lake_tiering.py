@@ -0,0 +1,330 @@
+"""
+Tier chaud (Arrow IPC) et tier froid (Parquet) des streams du Data Lake
+- Les flushs récents du consumer Kafka sont écrits en Arrow IPC (Feather V2)
+  non compressé: les lectures répétées des dernières données se font en
+  memory-map, sans décompression ni décodage
+- Une partition fermée (jour passé, aucune écriture depuis
+  HOT_TIER_GRACE_MINUTES) est convertie en un fichier Parquet compressé selon
+  les options du feed, puis ses fichiers Arrow sont mis à la corbeille
+- La lecture des deux tiers passe par LakeReader (et les vues de lake_sql)
+"""
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_lake_config import (
+    STREAMS_DIR, HOT_FILE_SUFFIX, HOT_TIER_GRACE_MINUTES, LOG_FORMAT, LOG_LEVEL,
+    get_parquet_options, parquet_writer_kwargs
+)
+from lake_catalog import get_catalog, parse_partition
+from lake_clustering import cluster_table
+from lake_metadata import metadata_lock, read_metadata, record_file_written, record_files_removed
+from lake_trash import move_to_trash
+from lake_writer import atomic_path, cleanup_orphans, row_group_rows, write_parquet_atomic
+
+
+logger = logging.getLogger(__name__)
+
+# Clé des métadonnées Parquet listant les fichiers Arrow convertis (reprise
+# d'une conversion interrompue entre publication du Parquet et suppression)
+CONVERTED_FROM_KEY = b"lake.converted_from"
+
+
+def write_hot_file(table: pa.Table, file_path: Path):
+    """Écrit une table en Arrow IPC non compressé (publication atomique)"""
+    with atomic_path(file_path) as tmp_path:
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=None)) as writer:
+                writer.write_table(table)
+
+
+def read_hot_file(file_path: Path, columns: Optional[List[str]] = None) -> pa.Table:
+    """
+    Lit un fichier Arrow IPC en memory-map
+    
+    Zéro copie: les buffers de la table pointent dans le fichier mappé, seules
+    les pages effectivement touchées sont lues.
+    """
+    source = pa.memory_map(str(file_path), "r")
+    table = pa.ipc.open_file(source).read_all()
+    return table.select(columns) if columns else table
+
+
+def read_hot_footer(file_path: Path) -> Dict:
+    """Lignes, nombre de batches, taille et schéma d'un fichier Arrow IPC (sans lire les données)"""
+    with pa.memory_map(str(file_path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        return {
+            "records": sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches)),
+            "batches": reader.num_record_batches,
+            "size_bytes": source.size(),
+            "schema": reader.schema
+        }
+
+
+def is_hot_file(file_path) -> bool:
+    """Indique si un fichier appartient au tier chaud"""
+    return str(file_path).endswith(HOT_FILE_SUFFIX)
+
+
+def hot_partitions(base_path: Path) -> Dict[Path, List[Path]]:
+    """Partitions d'un stream ayant des fichiers du tier chaud (catalogue, sinon parcours)"""
+    catalog = get_catalog()
+    if catalog.has_feed(base_path):
+        files = [
+            base_path / entry["partition_path"] / entry["file_name"]
+            for entry in catalog.list_files(base_path)
+            if is_hot_file(entry["file_name"])
+        ]
+    else:
+        files = [f for f in base_path.rglob(f"*{HOT_FILE_SUFFIX}") if not f.name.startswith(".")]
+    
+    partitions: Dict[Path, List[Path]] = {}
+    for file_path in sorted(files):
+        partitions.setdefault(file_path.parent, []).append(file_path)
+    return partitions
+
+
+def is_partition_closed(
+    partition_path: Path,
+    files: List[Path],
+    now: Optional[datetime] = None,
+    grace_minutes: int = HOT_TIER_GRACE_MINUTES
+) -> bool:
+    """Une partition est fermée quand son jour est passé et qu'elle n'est plus écrite"""
+    now = now or datetime.now()
+    partition = parse_partition(str(partition_path))
+    if partition["year"] is None:
+        return False
+    
+    partition_day = datetime(partition["year"], partition["month"], partition["day"])
+    if partition_day.date() >= now.date():
+        return False
+    
+    last_write = max(
+        (datetime.fromtimestamp(f.stat().st_mtime) for f in files if f.exists()),
+        default=partition_day
+    )
+    return now - last_write >= timedelta(minutes=grace_minutes)
+
+
+def _record_cold_file(base_path: Path, partition_path: Path, feed_name: str, file_path: Path, records: int):
+    """Enregistre un fichier Parquet converti (métadonnées, catalogue, statistiques)"""
+    metadata = read_metadata(base_path) or {}
+    record_file_written(
+        base_path,
+        feed_name,
+        metadata.get("type", "stream"),
+        metadata.get("storage_mode", "append"),
+        metadata.get("partitioning", "date"),
+        partition_path,
+        file_path,
+        records,
+        file_path.stat().st_size
+    )
+
+
+def _finish_interrupted_conversion(base_path: Path, partition_path: Path, feed_name: str) -> int:
+    """Termine une conversion interrompue: Parquet publié mais fichiers Arrow encore présents"""
+    partition_key = str(partition_path.relative_to(base_path))
+    cataloged = {
+        entry["file_name"] for entry in get_catalog().list_files(base_path, partition_key)
+    }
+    removed = []
+    
+    with metadata_lock(base_path):
+        for parquet_path in partition_path.glob("*_cold.parquet"):
+            parquet_metadata = pq.read_metadata(parquet_path)
+            key_value = parquet_metadata.metadata or {}
+            if CONVERTED_FROM_KEY not in key_value:
+                continue
+            if parquet_path.name not in cataloged:
+                _record_cold_file(base_path, partition_path, feed_name, parquet_path, parquet_metadata.num_rows)
+            for name in json.loads(key_value[CONVERTED_FROM_KEY]):
+                hot_path = partition_path / name
+                if hot_path.exists():
+                    footer = read_hot_footer(hot_path)
+                    removed.append((hot_path, footer["records"], footer["size_bytes"]))
+        
+        if removed:
+            for hot_path, _, _ in removed:
+                move_to_trash(hot_path, base_path, "tiering")
+            record_files_removed(base_path, partition_path, removed)
+    
+    if removed:
+        logger.warning(
+            f"Conversion interrompue terminée pour {partition_path}: {len(removed)} fichier(s) Arrow mis à la corbeille"
+        )
+    return len(removed)
+
+
+def convert_partition(base_path: Path, partition_path: Path, feed_name: str) -> int:
+    """
+    Convertit les fichiers Arrow d'une partition en un fichier Parquet
+    
+    Le Parquet (compression, clustering et row groups du feed) est publié
+    avant le retrait des fichiers Arrow; la liste des fichiers convertis est
+    gardée dans ses métadonnées pour reprendre une conversion interrompue.
+    L'enregistrement du Parquet et le retrait des fichiers Arrow (mis à la
+    corbeille) se font sous le verrou des métadonnées du feed: un lecteur du
+    catalogue ne voit jamais les deux tiers à la fois.
+    
+    Returns:
+        Nombre de lignes converties
+    """
+    _finish_interrupted_conversion(base_path, partition_path, feed_name)
+    
+    hot_files = sorted(
+        f for f in partition_path.glob(f"*{HOT_FILE_SUFFIX}") if not f.name.startswith(".")
+    )
+    if not hot_files:
+        return 0
+    
+    entries = []
+    tables = []
+    for hot_path in hot_files:
+        table = read_hot_file(hot_path)
+        tables.append(table)
+        entries.append((hot_path, table.num_rows, hot_path.stat().st_size))
+    
+    options = get_parquet_options(feed_name)
+    table = cluster_table(
+        pa.concat_tables(tables, promote_options="default"),
+        options["cluster_by"],
+        options["cluster_method"]
+    )
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        CONVERTED_FROM_KEY: json.dumps([f.name for f in hot_files]).encode()
+    })
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_path = partition_path / f"data_{timestamp}_cold.parquet"
+    
+    write_parquet_atomic(
+        table,
+        file_path,
+        row_group_size=row_group_rows(table, options),
+        **parquet_writer_kwargs(options)
+    )
+    with metadata_lock(base_path):
+        _record_cold_file(base_path, partition_path, feed_name, file_path, table.num_rows)
+        for hot_path in hot_files:
+            move_to_trash(hot_path, base_path, "tiering")
+        record_files_removed(base_path, partition_path, entries)
+    
+    hot_bytes = sum(entry[2] for entry in entries)
+    logger.info(
+        f"✓ {partition_path.relative_to(base_path)}: {len(hot_files)} fichier(s) Arrow "
+        f"({hot_bytes / (1024 * 1024):.2f} MB) -> {file_path.name} "
+        f"({file_path.stat().st_size / (1024 * 1024):.2f} MB, {table.num_rows:,} lignes)"
+    )
+    return table.num_rows
+
+
+def convert_closed_partitions(
+    feed_name: str,
+    now: Optional[datetime] = None,
+    grace_minutes: int = HOT_TIER_GRACE_MINUTES,
+    force: bool = False
+) -> Dict[str, int]:
+    """
+    Convertit en Parquet les partitions fermées du tier chaud d'un stream
+    
+    Args:
+        force: convertir aussi les partitions encore ouvertes
+    
+    Returns:
+        {"partitions": n, "records": n}
+    """
+    base_path = STREAMS_DIR / feed_name
+    result = {"partitions": 0, "records": 0}
+    
+    for partition_path, files in hot_partitions(base_path).items():
+        if not force and not is_partition_closed(partition_path, files, now, grace_minutes):
+            continue
+        result["records"] += convert_partition(base_path, partition_path, feed_name)
+        result["partitions"] += 1
+    
+    return result
+
+
+def main():
+    """Point d'entrée: conversion du tier chaud en Parquet (job de fond)"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Conversion des partitions fermées du tier chaud (Arrow IPC) en Parquet"
+    )
+    parser.add_argument(
+        'feeds',
+        type=str,
+        nargs='*',
+        help='Streams à traiter (défaut: tous les streams du data lake)'
+    )
+    parser.add_argument(
+        '--grace-minutes',
+        type=int,
+        default=HOT_TIER_GRACE_MINUTES,
+        help='Délai sans écriture avant conversion d\'une partition de jour passé'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Convertir aussi les partitions ouvertes (jour courant)'
+    )
+    parser.add_argument(
+        '--watch',
+        type=int,
+        metavar='SECONDES',
+        help='Tourner en continu, une passe toutes les N secondes'
+    )
+    
+    args = parser.parse_args()
+    
+    # Module importé par les écrivains et lecteurs: la configuration du logging reste au CLI
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL),
+        format=LOG_FORMAT,
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    
+    try:
+        cleanup_orphans([STREAMS_DIR])
+        
+        while True:
+            feeds = args.feeds
+            if not feeds and STREAMS_DIR.exists():
+                feeds = sorted(path.name for path in STREAMS_DIR.iterdir() if path.is_dir())
+            
+            for feed_name in feeds:
+                result = convert_closed_partitions(
+                    feed_name, grace_minutes=args.grace_minutes, force=args.force
+                )
+                if result["partitions"]:
+                    print(
+                        f"✓ {feed_name}: {result['partitions']} partition(s) convertie(s), "
+                        f"{result['records']:,} lignes"
+                    )
+            
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    
+    except KeyboardInterrupt:
+        logger.info("Arrêt demandé par l'utilisateur")
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de la conversion du tier chaud: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
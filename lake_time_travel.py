@@ -0,0 +1,287 @@
+"""
+Time travel sur les tables versionnées du Data Lake
+- Résout "version N" ou "état au timestamp T" en ensemble de fichiers
+  à partir des partitions de _metadata.json et de leur exported_at
+- Retourne un dataset Arrow sur la version résolue
+- Index de résolution en cache (invalidé quand _metadata.json change)
+"""
+import logging
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from data_lake_config import get_table_path, LOG_FORMAT, LOG_LEVEL
+from lake_catalog import get_catalog, parse_partition
+from lake_metadata import METADATA_FILE, read_metadata
+from lake_reader import VERSION_PARTITIONING
+
+
+logger = logging.getLogger(__name__)
+
+
+def to_local_naive(value: datetime) -> datetime:
+    """
+    Ramène un datetime à l'heure locale sans fuseau
+    
+    Les exported_at des métadonnées sont naïfs (heure locale de l'exporteur):
+    un as_of avec fuseau (ex: 2026-10-18T12:00+02:00) est converti avant comparaison.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+class TimeTravelReader:
+    """Lecture d'une table telle qu'elle était à une version ou une date donnée"""
+    
+    def __init__(self):
+        # table -> (mtime de _metadata.json, index trié par version)
+        self._indexes: Dict[str, Tuple[int, List[Dict]]] = {}
+        # (table, version) -> fichiers résolus
+        self._files: Dict[Tuple[str, int], List[str]] = {}
+        self._lock = threading.Lock()
+    
+    def resolution_index(self, table_name: str) -> List[Dict]:
+        """
+        Index des versions d'une table: [{"version", "exported_at", "path"}]
+        
+        Reconstruit uniquement si _metadata.json a été modifié depuis le dernier appel.
+        """
+        base_path = get_table_path(table_name)
+        metadata_file = base_path / METADATA_FILE
+        if not metadata_file.exists():
+            raise ValueError(f"Aucune métadonnée pour la table {table_name}")
+        
+        mtime = metadata_file.stat().st_mtime_ns
+        
+        with self._lock:
+            cached = self._indexes.get(table_name)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        
+        metadata = read_metadata(base_path) or {"partitions": []}
+        index = []
+        for partition in metadata["partitions"]:
+            version = parse_partition(partition["path"])["version"]
+            if version is None:
+                continue
+            
+            exported_at = partition.get("exported_at")
+            if exported_at is None and (base_path / partition["path"]).exists():
+                # Anciennes métadonnées: date de modification du dossier
+                exported_at = datetime.fromtimestamp(
+                    (base_path / partition["path"]).stat().st_mtime
+                ).isoformat()
+            
+            index.append({
+                "version": version,
+                "exported_at": exported_at,
+                "path": partition["path"]
+            })
+        
+        index.sort(key=lambda entry: entry["version"])
+        
+        with self._lock:
+            self._indexes[table_name] = (mtime, index)
+            self._files = {key: files for key, files in self._files.items() if key[0] != table_name}
+        
+        return index
+    
+    def resolve_version(
+        self,
+        table_name: str,
+        version: Optional[int] = None,
+        as_of: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Résout une version explicite, ou la dernière version exportée au plus tard à as_of
+        
+        Sans argument: dernière version disponible.
+        """
+        index = self.resolution_index(table_name)
+        if not index:
+            raise ValueError(f"Aucune version disponible pour la table {table_name}")
+        
+        if version is not None:
+            entry = next((e for e in index if e["version"] == version), None)
+            if entry is None:
+                available = ", ".join(f"v{e['version']}" for e in index)
+                raise ValueError(
+                    f"Version v{version} indisponible pour {table_name} (disponibles: {available})"
+                )
+            return entry
+        
+        if as_of is None:
+            return index[-1]
+        
+        as_of = to_local_naive(as_of)
+        candidates = [
+            e for e in index
+            if e["exported_at"] and to_local_naive(datetime.fromisoformat(e["exported_at"])) <= as_of
+        ]
+        if not candidates:
+            raise ValueError(
+                f"Aucune version de {table_name} exportée avant {as_of.isoformat()} "
+                f"(plus ancienne conservée: {index[0]['exported_at']})"
+            )
+        return max(candidates, key=lambda e: to_local_naive(datetime.fromisoformat(e["exported_at"])))
+    
+    def resolve_files(
+        self,
+        table_name: str,
+        version: Optional[int] = None,
+        as_of: Optional[datetime] = None
+    ) -> Tuple[int, List[str]]:
+        """
+        Résout une version ou un timestamp en liste de fichiers
+        
+        Returns:
+            (version résolue, fichiers Parquet)
+        """
+        entry = self.resolve_version(table_name, version, as_of)
+        key = (table_name, entry["version"])
+        
+        with self._lock:
+            if key in self._files:
+                return entry["version"], self._files[key]
+        
+        base_path = get_table_path(table_name)
+        catalog = get_catalog()
+        if catalog.has_feed(base_path):
+            files = [
+                str(base_path / e["partition_path"] / e["file_name"])
+                for e in catalog.list_files(base_path, entry["path"])
+            ]
+        else:
+            files = sorted(str(f) for f in (base_path / entry["path"]).glob("*.parquet"))
+        
+        if not files:
+            raise ValueError(f"Fichiers de {table_name} v{entry['version']} introuvables")
+        
+        with self._lock:
+            self._files[key] = files
+        
+        return entry["version"], files
+    
+    def dataset(
+        self,
+        table_name: str,
+        version: Optional[int] = None,
+        as_of: Optional[datetime] = None
+    ) -> ds.Dataset:
+        """Dataset Arrow de la table à la version (ou date) demandée"""
+        resolved_version, files = self.resolve_files(table_name, version, as_of)
+        logger.info(f"{table_name}: lecture de la version v{resolved_version} ({len(files)} fichiers)")
+        
+        return ds.dataset(
+            files,
+            format="parquet",
+            partitioning=VERSION_PARTITIONING,
+            partition_base_dir=str(get_table_path(table_name))
+        )
+
+
+_reader: Optional[TimeTravelReader] = None
+
+
+def get_time_travel_reader() -> TimeTravelReader:
+    """Lecteur partagé du processus (index de résolution commun)"""
+    global _reader
+    if _reader is None:
+        _reader = TimeTravelReader()
+    return _reader
+
+
+def main():
+    """Point d'entrée: lecture d'une table à une version ou une date"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Time travel sur les tables du Data Lake"
+    )
+    parser.add_argument('table', type=str, help='Nom de la table')
+    parser.add_argument(
+        '--version',
+        type=int,
+        help='Version à lire (ex: 3 pour version=v3)'
+    )
+    parser.add_argument(
+        '--as-of',
+        type=str,
+        help='Lire la table telle qu\'exportée à cette date (ISO, ex: 2026-10-18T12:00)'
+    )
+    parser.add_argument(
+        '--list',
+        action='store_true',
+        help='Lister les versions disponibles'
+    )
+    parser.add_argument(
+        '--columns',
+        type=str,
+        nargs='+',
+        help='Colonnes à lire'
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Exporter la version résolue dans un fichier'
+    )
+    parser.add_argument(
+        '--format',
+        type=str,
+        choices=['parquet', 'csv'],
+        default='parquet',
+        help='Format d\'export'
+    )
+    
+    args = parser.parse_args()
+    
+    # Module utilisable comme bibliothèque: la configuration du logging reste au CLI
+    # (stderr: les résultats sont écrits sur stdout)
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL),
+        format=LOG_FORMAT,
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+    reader = get_time_travel_reader()
+    
+    try:
+        if args.list:
+            for entry in reader.resolution_index(args.table):
+                print(f"  v{entry['version']}: exportée le {entry['exported_at']}")
+            return
+        
+        as_of = to_local_naive(datetime.fromisoformat(args.as_of)) if args.as_of else None
+        dataset = reader.dataset(args.table, version=args.version, as_of=as_of)
+        
+        if args.output:
+            writer = None
+            rows = 0
+            try:
+                for batch in dataset.to_batches(columns=args.columns):
+                    if writer is None:
+                        if args.format == "csv":
+                            writer = pv.CSVWriter(args.output, batch.schema)
+                        else:
+                            writer = pq.ParquetWriter(args.output, batch.schema)
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+            finally:
+                if writer is not None:
+                    writer.close()
+            print(f"✓ {rows:,} lignes exportées vers {args.output}")
+        else:
+            print(dataset.to_table(columns=args.columns).to_pandas().to_string())
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de la lecture de {args.table}: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
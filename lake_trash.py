@@ -0,0 +1,353 @@
+"""
+Corbeille du Data Lake: suppressions différées
+- Supprimer une partition ou une version = la renommer dans
+  data_lake/_trash/<horodatage>_<pid>/ (O(1), même système de fichiers):
+  le consumer et la rétention ne paient plus la suppression des fichiers
+- Purge en arrière-plan des entrées plus anciennes que TRASH_GRACE_HOURS, au
+  débit limité de TRASH_PURGE_DELETES_PER_SECOND fichiers par seconde
+- Annulation pendant le délai de grâce: la partition est remise en place et
+  ses fichiers réenregistrés (métadonnées, catalogue, statistiques)
+"""
+import errno
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pyarrow.parquet as pq
+
+from data_lake_config import (
+    DATA_LAKE_ROOT, TABLES_DIR, TRASH_DIR, HOT_FILE_SUFFIX,
+    TRASH_GRACE_HOURS, TRASH_PURGE_DELETES_PER_SECOND, LOG_FORMAT, LOG_LEVEL,
+    get_bucketing
+)
+from lake_catalog import parse_partition
+from lake_metadata import read_metadata, record_file_written, write_json_atomic
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "_trash.json"
+
+
+class DeleteThrottle:
+    """
+    Limiteur du débit de suppression partagé par les threads
+    
+    Chaque appel réserve des créneaux à 1/rate seconde d'intervalle et attend
+    le premier: le débit global reste sous rate fichiers par seconde.
+    """
+    
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+    
+    def wait(self, count: int = 1):
+        """Attend le droit de supprimer count fichiers"""
+        if not self.rate or count <= 0:
+            return
+        
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + count / self.rate
+        
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def remove_tree(path: Path, throttle: Optional[DeleteThrottle] = None):
+    """
+    Supprime un sous-arbre au débit limité (fichiers puis dossiers, des feuilles vers la racine)
+    
+    Les erreurs sont journalisées sans interrompre la suppression, comme
+    shutil.rmtree(ignore_errors=True).
+    """
+    for dirpath, _, filenames in os.walk(path, topdown=False):
+        if throttle is not None:
+            throttle.wait(len(filenames))
+        for filename in filenames:
+            try:
+                os.unlink(os.path.join(dirpath, filename))
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Suppression impossible de {os.path.join(dirpath, filename)}: {e}")
+        try:
+            os.rmdir(dirpath)
+        except OSError as e:
+            logger.warning(f"Suppression impossible du dossier {dirpath}: {e}")
+
+
+def move_to_trash(path: Path, base_path: Path, reason: str = "") -> Optional[Path]:
+    """
+    Met une partition, une version ou un fichier à la corbeille par simple renommage
+    
+    Les métadonnées du feed ne sont pas modifiées ici: l'appelant retire la
+    partition (record_partition_removed) ou les fichiers (record_files_removed)
+    comme pour une suppression.
+    
+    Args:
+        base_path: dossier du feed (nécessaire à l'annulation)
+        reason: motif conservé dans le manifeste (retention, old_version...)
+    
+    Returns:
+        Dossier de l'entrée de corbeille, None si la corbeille est sur un autre
+        système de fichiers (suppression immédiate à la place)
+    """
+    entry = TRASH_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{os.getpid()}_{threading.get_ident()}"
+    entry.mkdir(parents=True)
+    
+    try:
+        os.rename(path, entry / path.name)
+    except OSError as e:
+        entry.rmdir()
+        if e.errno != errno.EXDEV:
+            raise
+        logger.warning(f"Corbeille sur un autre système de fichiers, suppression immédiate de {path}")
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+        return None
+    
+    write_json_atomic(entry / MANIFEST_FILE, {
+        "original_path": str(path.relative_to(DATA_LAKE_ROOT)),
+        "feed_path": str(base_path.relative_to(DATA_LAKE_ROOT)),
+        "reason": reason,
+        "trashed_at": datetime.now().isoformat()
+    })
+    return entry
+
+
+def read_manifest(entry: Path) -> Optional[Dict]:
+    """Manifeste d'une entrée de corbeille (None si absent: mise à la corbeille interrompue)"""
+    try:
+        with open(entry / MANIFEST_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_trash() -> List[Dict]:
+    """Entrées de la corbeille, des plus anciennes aux plus récentes"""
+    if not TRASH_DIR.exists():
+        return []
+    
+    entries = []
+    for entry in sorted(TRASH_DIR.iterdir()):
+        if not entry.is_dir():
+            continue
+        manifest = read_manifest(entry) or {}
+        entries.append({"entry": entry.name, **manifest})
+    return entries
+
+
+def _trashed_at(entry: Path, manifest: Optional[Dict]) -> datetime:
+    """Date de mise à la corbeille (manifeste, sinon date de modification du dossier)"""
+    if manifest and manifest.get("trashed_at"):
+        return datetime.fromisoformat(manifest["trashed_at"])
+    return datetime.fromtimestamp(entry.stat().st_mtime)
+
+
+def purge_trash(
+    grace_hours: float = TRASH_GRACE_HOURS,
+    max_deletes_per_second: Optional[float] = TRASH_PURGE_DELETES_PER_SECOND,
+    now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """
+    Supprime définitivement les entrées plus anciennes que le délai de grâce
+    
+    Returns:
+        {"entries": n, "files": n}
+    """
+    now = now or datetime.now()
+    cutoff = now - timedelta(hours=grace_hours)
+    throttle = DeleteThrottle(max_deletes_per_second)
+    result = {"entries": 0, "files": 0}
+    
+    if not TRASH_DIR.exists():
+        return result
+    
+    for entry in sorted(TRASH_DIR.iterdir()):
+        if not entry.is_dir():
+            continue
+        manifest = read_manifest(entry)
+        if _trashed_at(entry, manifest) > cutoff:
+            continue
+        
+        files = sum(len(filenames) for _, _, filenames in os.walk(entry))
+        remove_tree(entry, throttle)
+        result["entries"] += 1
+        result["files"] += files
+        logger.info(f"✓ Purgé: {entry.name} ({(manifest or {}).get('original_path', '?')}, {files} fichiers)")
+    
+    return result
+
+
+def _register_restored_files(base_path: Path, restored: Path):
+    """Réenregistre les fichiers d'une partition (ou le fichier) restaurée (nombre de lignes lu dans les footers)"""
+    # Import local: lake_tiering et lake_clustering mettent leurs fichiers remplacés à la corbeille
+    from lake_tiering import read_hot_footer
+    
+    is_table = base_path.parent == TABLES_DIR
+    metadata = read_metadata(base_path) or {}
+    feed_name = metadata.get("source", base_path.name)
+    bucketing = None if is_table else get_bucketing(feed_name)
+    
+    if restored.is_file():
+        walk = [(str(restored.parent), [], [restored.name])]
+    else:
+        walk = os.walk(restored)
+    
+    for dirpath, _, filenames in walk:
+        for filename in sorted(filenames):
+            if filename.startswith("."):
+                continue
+            file_path = Path(dirpath) / filename
+            if filename.endswith(".parquet"):
+                records = pq.ParquetFile(file_path).metadata.num_rows
+            elif filename.endswith(HOT_FILE_SUFFIX):
+                records = read_hot_footer(file_path)["records"]
+            else:
+                continue
+            
+            partition_key = str(file_path.parent.relative_to(base_path))
+            record_file_written(
+                base_path,
+                feed_name,
+                metadata.get("type", "table" if is_table else "stream"),
+                metadata.get("storage_mode", "overwrite" if is_table else "append"),
+                metadata.get("partitioning", "version" if is_table else "date"),
+                file_path.parent,
+                file_path,
+                records,
+                file_path.stat().st_size,
+                bucketing=bucketing if parse_partition(partition_key)["bucket"] is not None else None
+            )
+
+
+def restore(entry_name: str) -> Path:
+    """
+    Annule une suppression: remet l'entrée à son emplacement d'origine
+    
+    Returns:
+        Chemin restauré
+    
+    Raises:
+        ValueError: entrée inconnue ou emplacement d'origine de nouveau occupé
+    """
+    entry = TRASH_DIR / entry_name
+    manifest = read_manifest(entry)
+    if manifest is None:
+        raise ValueError(f"Entrée de corbeille inconnue ou incomplète: {entry_name}")
+    
+    original = DATA_LAKE_ROOT / manifest["original_path"]
+    base_path = DATA_LAKE_ROOT / manifest["feed_path"]
+    if original.exists():
+        raise ValueError(f"Emplacement d'origine occupé: {original}")
+    
+    if manifest.get("reason") in ("retention_rewrite", "recluster", "tiering"):
+        # Fichier réécrit par la rétention ligne à ligne, le clustering ou la
+        # conversion en Parquet: ses lignes sont aussi dans le fichier réécrit
+        # (doublons à supprimer à la main)
+        logger.warning(f"{original.name} a été remplacé par une réécriture: lignes récentes en double")
+    
+    original.parent.mkdir(parents=True, exist_ok=True)
+    os.rename(entry / original.name, original)
+    _register_restored_files(base_path, original)
+    
+    (entry / MANIFEST_FILE).unlink()
+    entry.rmdir()
+    
+    logger.info(f"✓ Restauré: {original}")
+    return original
+
+
+def main():
+    """Point d'entrée: purge, liste et restauration de la corbeille"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Corbeille du Data Lake (suppressions différées)"
+    )
+    subparsers = parser.add_subparsers(dest='command', help='Commandes disponibles')
+    
+    subparsers.add_parser('list', help='Lister les entrées de la corbeille')
+    
+    purge_parser = subparsers.add_parser('purge', help='Purger les entrées expirées')
+    purge_parser.add_argument(
+        '--grace-hours',
+        type=float,
+        default=TRASH_GRACE_HOURS,
+        help='Délai avant purge définitive (annulation possible pendant ce délai)'
+    )
+    purge_parser.add_argument(
+        '--max-deletes-per-second',
+        type=float,
+        default=TRASH_PURGE_DELETES_PER_SECOND,
+        help='Débit maximal de suppression en fichiers par seconde (0 = illimité)'
+    )
+    purge_parser.add_argument(
+        '--watch',
+        type=int,
+        metavar='SECONDES',
+        help='Tourner en continu, une passe toutes les N secondes'
+    )
+    
+    restore_parser = subparsers.add_parser('restore', help='Annuler une suppression')
+    restore_parser.add_argument('entry', help='Entrée de corbeille (cf. list)')
+    
+    args = parser.parse_args()
+    
+    # Module importé par les écrivains: la configuration du logging reste au CLI
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL),
+        format=LOG_FORMAT,
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    
+    if not args.command:
+        parser.print_help()
+        return
+    
+    try:
+        if args.command == 'list':
+            now = datetime.now()
+            for entry in list_trash():
+                trashed_at = entry.get("trashed_at")
+                age = (
+                    f"{(now - datetime.fromisoformat(trashed_at)).total_seconds() / 3600:.1f} h"
+                    if trashed_at else "?"
+                )
+                print(f"{entry['entry']}  {entry.get('original_path', '?')}  ({entry.get('reason', '')}, {age})")
+        
+        elif args.command == 'purge':
+            while True:
+                result = purge_trash(args.grace_hours, args.max_deletes_per_second)
+                if result["entries"]:
+                    print(f"✓ {result['entries']} entrée(s) purgée(s), {result['files']} fichiers")
+                if not args.watch:
+                    break
+                time.sleep(args.watch)
+        
+        elif args.command == 'restore':
+            print(f"✓ Restauré: {restore(args.entry)}")
+    
+    except KeyboardInterrupt:
+        logger.info("Arrêt demandé par l'utilisateur")
+    
+    except Exception as e:
+        logger.error(f"Erreur de la corbeille: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
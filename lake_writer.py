@@ -0,0 +1,271 @@
+"""
+Publication atomique des fichiers du Data Lake
+- Écriture sous un nom temporaire dans <feed>/_tmp/, fsync puis renommage:
+  un lecteur (ou le job de rétention) voit le fichier complet ou ne le voit
+  pas, jamais un fichier tronqué
+- Un crash ne laisse qu'un fichier temporaire dans _tmp/, hors des partitions,
+  supprimé au démarrage des écrivains (cleanup_orphans ne liste que les _tmp/)
+- Row groups dimensionnés (row_group_size du feed, sinon ~TARGET_ROW_GROUP_BYTES)
+  et encodage parallèle des gros snapshots en plusieurs fichiers part
+"""
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_lake_config import (
+    ORPHAN_TMP_MAX_AGE_MINUTES, PARALLEL_WRITE_MIN_ROWS, PARQUET_WRITE_WORKERS,
+    TARGET_ROW_GROUP_BYTES, parquet_writer_kwargs
+)
+
+
+logger = logging.getLogger(__name__)
+
+TMP_SUFFIX = ".tmp"
+TMP_DIR = "_tmp"
+
+
+def feed_root(file_path: Path) -> Path:
+    """Dossier du feed d'un fichier: premier ancêtre qui n'est pas une partition (clé=valeur)"""
+    root = file_path.parent
+    while "=" in root.name:
+        root = root.parent
+    return root
+
+
+def temp_path(file_path: Path) -> Path:
+    """
+    Nom temporaire dans <feed>/_tmp/, propre au processus et au thread écrivain
+    
+    Même système de fichiers que le fichier final (renommage atomique). Le
+    chemin dans le feed est repris dans le nom: deux partitions peuvent
+    écrire en même temps un fichier du même nom.
+    """
+    root = feed_root(file_path)
+    relative = str(file_path.relative_to(root)).replace(os.sep, "__")
+    return root / TMP_DIR / f".{relative}.{os.getpid()}.{threading.get_ident()}{TMP_SUFFIX}"
+
+
+def _fsync_path(path: Path):
+    """Force l'écriture sur disque d'un fichier ou d'un dossier"""
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def publish(tmp_path: Path, file_path: Path):
+    """Publie un fichier temporaire complet: fsync, renommage, fsync du dossier"""
+    _fsync_path(tmp_path)
+    os.replace(tmp_path, file_path)
+    _fsync_path(file_path.parent)
+
+
+@contextmanager
+def atomic_path(file_path: Path) -> Iterator[Path]:
+    """
+    Chemin temporaire à écrire, publié sous file_path en sortie du bloc
+    
+    En cas d'exception le fichier temporaire est supprimé et file_path
+    (éventuellement préexistant) n'est pas modifié.
+    """
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = temp_path(file_path)
+    tmp_path.parent.mkdir(exist_ok=True)
+    try:
+        yield tmp_path
+        publish(tmp_path, file_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_parquet_atomic(table: pa.Table, file_path: Path, **kwargs):
+    """pq.write_table avec publication atomique (mêmes arguments)"""
+    with atomic_path(file_path) as tmp_path:
+        pq.write_table(table, tmp_path, **kwargs)
+
+
+class AtomicParquetWriter:
+    """
+    pq.ParquetWriter écrivant sous un nom temporaire
+    
+    close() publie le fichier, abort() l'abandonne; utilisable comme context
+    manager (abandon si le bloc lève une exception).
+    """
+    
+    def __init__(self, file_path: Path, schema: pa.Schema, **kwargs):
+        self.file_path = file_path
+        self.tmp_path = temp_path(file_path)
+        self.tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = pq.ParquetWriter(self.tmp_path, schema, **kwargs)
+    
+    def write_batch(self, batch: pa.RecordBatch, row_group_size: Optional[int] = None):
+        self._writer.write_batch(batch, row_group_size=row_group_size)
+    
+    def write_table(self, table: pa.Table, row_group_size: Optional[int] = None):
+        self._writer.write_table(table, row_group_size=row_group_size)
+    
+    def close(self):
+        """Termine le fichier et le publie sous son nom définitif"""
+        self._writer.close()
+        # Partition créée à la publication: un fichier abandonné n'en laisse pas de vide
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        publish(self.tmp_path, self.file_path)
+    
+    def abort(self):
+        """Abandonne le fichier (rien n'est publié)"""
+        try:
+            self._writer.close()
+        finally:
+            self.tmp_path.unlink(missing_ok=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def row_group_rows(table: pa.Table, options: Dict) -> int:
+    """Lignes par row group: option du feed, sinon ~TARGET_ROW_GROUP_BYTES non compressés"""
+    if options.get("row_group_size"):
+        return options["row_group_size"]
+    if table.num_rows == 0 or table.nbytes == 0:
+        return max(table.num_rows, 1)
+    return max(1, int(table.num_rows * TARGET_ROW_GROUP_BYTES / table.nbytes))
+
+
+def row_group_full(rows: int, nbytes: int, options: Dict) -> bool:
+    """Indique si des lignes accumulées forment un row group complet (écritures en flux)"""
+    if options.get("row_group_size"):
+        return rows >= options["row_group_size"]
+    return nbytes >= TARGET_ROW_GROUP_BYTES
+
+
+def part_file_path(file_path: Path, index: int) -> Path:
+    """Fichier part d'une écriture parallèle: <nom>_partNNN.parquet"""
+    return file_path.with_name(f"{file_path.stem}_part{index:03d}{file_path.suffix}")
+
+
+def write_parquet_parallel(
+    table: pa.Table,
+    file_path: Path,
+    options: Dict,
+    workers: Optional[int] = None
+) -> Dict[Path, int]:
+    """
+    Écrit une table en row groups dimensionnés, encodée sur plusieurs threads
+    
+    L'écrivain Parquet de pyarrow encode un fichier sur un seul thread: une
+    table d'au moins PARALLEL_WRITE_MIN_ROWS lignes est découpée en tranches
+    contiguës (frontières de row groups), une par thread, chacune publiée
+    atomiquement comme fichier part. L'ordre des lignes (clustering) est
+    conservé d'une part à l'autre. En cas d'échec, aucune part ne reste publiée.
+    
+    Returns:
+        {fichier écrit: nombre de lignes}
+    """
+    workers = workers or options.get("write_workers") or PARQUET_WRITE_WORKERS
+    rows_per_group = row_group_rows(table, options)
+    num_groups = max(1, math.ceil(table.num_rows / rows_per_group))
+    kwargs = parquet_writer_kwargs(options)
+    
+    parts = 1
+    if table.num_rows >= PARALLEL_WRITE_MIN_ROWS:
+        parts = min(workers, num_groups)
+    
+    start = time.perf_counter()
+    
+    if parts <= 1:
+        write_parquet_atomic(table, file_path, row_group_size=rows_per_group, **kwargs)
+        written = {file_path: table.num_rows}
+    else:
+        rows_per_part = math.ceil(num_groups / parts) * rows_per_group
+        slices = {
+            part_file_path(file_path, index): table.slice(offset, rows_per_part)
+            for index, offset in enumerate(range(0, table.num_rows, rows_per_part))
+        }
+        
+        with ThreadPoolExecutor(max_workers=len(slices)) as executor:
+            futures = {
+                path: executor.submit(write_parquet_atomic, part, path, row_group_size=rows_per_group, **kwargs)
+                for path, part in slices.items()
+            }
+            errors = [future.exception() for future in futures.values() if future.exception()]
+        
+        if errors:
+            for path in slices:
+                path.unlink(missing_ok=True)
+            raise errors[0]
+        
+        written = {path: part.num_rows for path, part in slices.items()}
+    
+    elapsed = time.perf_counter() - start
+    size_mb = table.nbytes / (1024 * 1024)
+    logger.info(
+        f"Encodage Parquet {file_path.name}: {size_mb:.1f} MB en {elapsed:.2f}s "
+        f"({size_mb / max(elapsed, 1e-9):.1f} MB/s, {len(written)} fichier(s), "
+        f"{num_groups} row group(s) de {rows_per_group:,} lignes)"
+    )
+    return written
+
+
+def is_temp_file(name: str) -> bool:
+    """Indique si un nom de fichier est un fichier temporaire d'écriture"""
+    return name.startswith(".") and name.endswith(TMP_SUFFIX)
+
+
+def cleanup_orphans(
+    roots: Iterable[Path],
+    max_age_minutes: int = ORPHAN_TMP_MAX_AGE_MINUTES
+) -> int:
+    """
+    Supprime les fichiers temporaires abandonnés (écrivain interrompu)
+    
+    Seuls les dossiers _tmp/ des feeds de chaque racine (streams, tables)
+    sont listés: le coût dépend du nombre de feeds, pas du nombre de fichiers
+    du lake. Un fichier temporaire est modifié à chaque écriture: seuls ceux
+    non modifiés depuis max_age_minutes sont supprimés, ce qui épargne les
+    écritures en cours des autres processus.
+    
+    Args:
+        roots: dossiers contenant les feeds
+    
+    Returns:
+        Nombre de fichiers supprimés
+    """
+    cutoff = time.time() - max_age_minutes * 60
+    removed = 0
+    
+    for root in roots:
+        if not root.exists():
+            continue
+        for feed_dir in root.iterdir():
+            tmp_dir = feed_dir / TMP_DIR
+            if not tmp_dir.is_dir():
+                continue
+            for file_path in tmp_dir.iterdir():
+                if not is_temp_file(file_path.name):
+                    continue
+                try:
+                    if file_path.stat().st_mtime < cutoff:
+                        file_path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+    
+    if removed:
+        logger.warning(f"{removed} fichier(s) temporaire(s) orphelin(s) supprimé(s)")
+    return removed
@@ -0,0 +1,195 @@
+"""
+Benchmark des recherches ponctuelles: bloom filters + index de pages vs scan
+- Génère un stream synthétique (transaction_id, hash_user, amount, currency,
+  timestamp) en deux exemplaires: sans et avec bloom filters / index de pages
+- Mesure le temps moyen d'une recherche par transaction_id (valeurs présentes
+  et absentes) et le nombre de row groups lus
+"""
+import logging
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from data_lake_config import LOG_FORMAT, LOG_LEVEL
+from lake_catalog import LakeCatalog, get_catalog, set_catalog
+from lake_metadata import extract_file_statistics
+from metadata_utils import BloomFilterLookup
+
+
+logging.basicConfig(
+    level=getattr(logging, LOG_LEVEL),
+    format=LOG_FORMAT,
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 1_000_000
+
+
+def generate_chunk(rows: int, rng: np.random.Generator) -> pa.Table:
+    """Lot de transactions synthétiques (identifiants aléatoires, ordre d'arrivée)"""
+    ids = rng.integers(0, 2 ** 63, size=rows, dtype=np.int64)
+    users = rng.integers(0, 2 ** 63, size=rows, dtype=np.int64)
+    return pa.table({
+        "transaction_id": np.char.mod("tx-%016x", ids),
+        "hash_user": np.char.mod("%032x", users),
+        "amount": np.round(rng.uniform(1.0, 500.0, size=rows), 2),
+        "currency": rng.choice(np.array(["EUR", "USD", "GBP"]), size=rows),
+        "timestamp": pa.array(
+            np.datetime64("2026-01-01") + rng.integers(0, 86400 * 1000, size=rows).astype("timedelta64[ms]")
+        )
+    })
+
+
+def write_stream(
+    target: Path,
+    rows: int,
+    rows_per_file: int,
+    row_group_size: int,
+    bloom: bool,
+    seed: int
+) -> List[str]:
+    """Écrit le stream synthétique et l'enregistre au catalogue (avec statistiques); retourne un échantillon d'ids"""
+    rng = np.random.default_rng(seed)
+    target.mkdir(parents=True, exist_ok=True)
+    sample_ids = []
+    catalog = get_catalog()
+    
+    written = 0
+    file_index = 0
+    while written < rows:
+        file_rows = min(rows_per_file, rows - written)
+        file_path = target / f"data_{file_index:05d}.parquet"
+        writer = None
+        
+        for offset in range(0, file_rows, CHUNK_ROWS):
+            chunk = generate_chunk(min(CHUNK_ROWS, file_rows - offset), rng)
+            if writer is None:
+                kwargs = {"compression": "zstd"}
+                if bloom:
+                    kwargs["write_page_index"] = True
+                    kwargs["bloom_filter_options"] = {
+                        "transaction_id": {"ndv": row_group_size, "fpp": 0.01},
+                        "hash_user": {"ndv": row_group_size, "fpp": 0.01}
+                    }
+                writer = pq.ParquetWriter(file_path, chunk.schema, **kwargs)
+            writer.write_table(chunk, row_group_size=row_group_size)
+            sample_ids.extend(random.Random(seed + offset).sample(chunk.column("transaction_id").to_pylist(), 5))
+        
+        writer.close()
+        catalog.add_file(target, file_path, file_rows, file_path.stat().st_size)
+        catalog.set_file_statistics(target, file_path, extract_file_statistics(file_path, ["transaction_id"]))
+        written += file_rows
+        file_index += 1
+    
+    return sample_ids
+
+
+def directory_size(path: Path) -> int:
+    """Taille des fichiers Parquet d'un dossier"""
+    return sum(f.stat().st_size for f in path.glob("*.parquet"))
+
+
+def time_scan(path: Path, values: List[str]) -> float:
+    """Temps moyen d'une recherche par scan filtré (élagage min/max de pyarrow uniquement)"""
+    dataset = ds.dataset(path, format="parquet")
+    start = time.perf_counter()
+    for value in values:
+        dataset.to_table(filter=ds.field("transaction_id") == value)
+    return (time.perf_counter() - start) / len(values)
+
+
+def time_lookup(path: Path, values: List[str]) -> Dict:
+    """Temps moyen d'une recherche via BloomFilterLookup et row groups lus"""
+    row_groups = 0
+    start = time.perf_counter()
+    for value in values:
+        row_groups += sum(
+            len(groups) for groups in BloomFilterLookup.candidate_row_groups(path, "transaction_id", [value]).values()
+        )
+        BloomFilterLookup.lookup(path, "transaction_id", [value])
+    return {
+        "seconds": (time.perf_counter() - start) / len(values),
+        "row_groups": row_groups / len(values)
+    }
+
+
+def main():
+    """Point d'entrée: benchmark des recherches ponctuelles"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Benchmark recherches ponctuelles (bloom filters / index de pages)"
+    )
+    parser.add_argument('--rows', type=int, default=20_000_000, help='Lignes générées (~2 Go avec le défaut)')
+    parser.add_argument('--rows-per-file', type=int, default=2_000_000, help='Lignes par fichier')
+    parser.add_argument('--row-group-size', type=int, default=128 * 1024, help='Lignes par row group')
+    parser.add_argument('--lookups', type=int, default=20, help='Recherches par scénario')
+    parser.add_argument('--work-dir', type=str, help='Dossier de travail (défaut: temporaire, supprimé)')
+    parser.add_argument('--seed', type=int, default=42)
+    
+    args = parser.parse_args()
+    
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="lookup_bench_"))
+    
+    # Catalogue propre au benchmark (hors catalogue du data lake)
+    set_catalog(LakeCatalog(work_dir / "catalog.db"))
+    
+    try:
+        plain_dir = work_dir / "plain"
+        bloom_dir = work_dir / "bloom"
+        
+        logger.info(f"Génération de {args.rows:,} lignes (sans bloom filters)...")
+        sample_ids = write_stream(plain_dir, args.rows, args.rows_per_file, args.row_group_size, False, args.seed)
+        logger.info("Génération avec bloom filters et index de pages...")
+        write_stream(bloom_dir, args.rows, args.rows_per_file, args.row_group_size, True, args.seed)
+        
+        rng = random.Random(args.seed)
+        present = rng.sample(sample_ids, min(args.lookups, len(sample_ids)))
+        # Identifiants absents mais compris dans les bornes min/max (seul le bloom filter les écarte)
+        missing_ids = np.random.default_rng(args.seed + 1).integers(0, 2 ** 63, size=args.lookups, dtype=np.int64)
+        missing = [f"tx-{value:016x}" for value in missing_ids.tolist()]
+        
+        total_row_groups = sum(pq.ParquetFile(f).num_row_groups for f in bloom_dir.glob("*.parquet"))
+        plain_size = directory_size(plain_dir)
+        bloom_size = directory_size(bloom_dir)
+        
+        print("\n🔎 Recherche ponctuelle par transaction_id")
+        print("-" * 72)
+        print(f"Données: {args.rows:,} lignes, {total_row_groups} row groups")
+        print(f"Taille sans bloom: {plain_size / 1024 ** 3:.2f} Go, "
+              f"avec bloom + index de pages: {bloom_size / 1024 ** 3:.2f} Go "
+              f"(+{(bloom_size - plain_size) / plain_size * 100:.1f}%)")
+        
+        for label, values in (("présentes", present), ("absentes", missing)):
+            scan_seconds = time_scan(plain_dir, values)
+            stats_only = time_lookup(plain_dir, values)
+            with_bloom = time_lookup(bloom_dir, values)
+            print(f"\nValeurs {label}:")
+            print(f"  scan filtré:              {scan_seconds * 1000:9.1f} ms")
+            print(f"  min/max seuls:            {stats_only['seconds'] * 1000:9.1f} ms "
+                  f"({stats_only['row_groups']:.1f} row groups lus)")
+            print(f"  min/max + bloom filters:  {with_bloom['seconds'] * 1000:9.1f} ms "
+                  f"({with_bloom['row_groups']:.1f} row groups lus, "
+                  f"x{scan_seconds / with_bloom['seconds']:.1f} vs scan)")
+    
+    except Exception as e:
+        logger.error(f"Erreur lors du benchmark: {e}")
+        sys.exit(1)
+    
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,10 @@ from typing import Optional
 
 from data_lake_config import (
     FEEDS_DIR, FeedType, PartitioningType, StorageMode,
-    STREAMS_CONFIG, TABLES_CONFIG, STORAGE_FORMAT,
-    get_stream_path, get_table_path, ensure_directories
+    STREAMS_CONFIG, TABLES_CONFIG, STORAGE_FORMAT, DEFAULT_NUM_BUCKETS,
+    RETENTION_MODES,
+    get_stream_path, get_table_path, ensure_directories,
+    save_parquet_options
 )
 
 
@@ -58,8 +60,17 @@ class FeedManager:
         print(f"    Source: {feed['ksqldb_source']}")
         print(f"    Description: {feed['description']}")
         print(f"    Partitionnement: {feed['partitioning']['type']}")
+        if feed['partitioning'].get('bucket_by'):
+            print(
+                f"    Buckets: {feed['partitioning'].get('num_buckets', DEFAULT_NUM_BUCKETS)} "
+                f"sur {feed['partitioning']['bucket_by']}"
+            )
         print(f"    Mode de stockage: {feed['storage_mode']}")
         print(f"    Rétention: {feed.get('retention_days', 'N/A')} jours")
+        if feed.get('retention'):
+            print(f"    Rétention (options): {', '.join(f'{k}={v}' for k, v in feed['retention'].items())}")
+        if feed.get('parquet'):
+            print(f"    Parquet: {', '.join(f'{k}={v}' for k, v in feed['parquet'].items())}")
         print(f"    Créé le: {feed['created_at']}")
     
     def add_feed(
@@ -179,6 +190,106 @@ class FeedManager:
             print(f"⚠ Aucune modification apportée au feed '{name}'")
             return False
     
+    def set_parquet_options(self, name: str, **options):
+        """Met à jour les options d'écriture Parquet d'un feed (section "parquet")"""
+        options = {key: value for key, value in options.items() if value is not None}
+        if not options:
+            print(f"⚠ Aucune option Parquet fournie pour le feed '{name}'")
+            return False
+        
+        try:
+            parquet_options = save_parquet_options(name, options)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        
+        for key, value in parquet_options.items():
+            print(f"  ✓ {key}: {value}")
+        print(f"✓ Options Parquet du feed '{name}' mises à jour")
+        return True
+    
+    def set_bucketing(self, name: str, column: Optional[str], num_buckets: int = DEFAULT_NUM_BUCKETS):
+        """
+        Configure le bucketing d'un stream (partition bucket=NN sous day=)
+        
+        Ne concerne que les nouvelles écritures; column=None désactive le bucketing.
+        """
+        feed_file = self.active_dir / f"{name}.json"
+        
+        if not feed_file.exists():
+            print(f"❌ Le feed '{name}' n'existe pas")
+            return False
+        
+        with open(feed_file, 'r') as f:
+            feed_config = json.load(f)
+        
+        if feed_config['partitioning']['type'] != PartitioningType.DATE.value:
+            print("❌ Le bucketing ne s'applique qu'aux feeds partitionnés par date")
+            return False
+        
+        if not 1 <= num_buckets <= 100:
+            print(f"❌ Nombre de buckets invalide: {num_buckets} (1 à 100)")
+            return False
+        
+        partitioning = feed_config['partitioning']
+        columns = [c for c in partitioning.get('columns', []) if c != 'bucket']
+        if column:
+            partitioning['bucket_by'] = column
+            partitioning['num_buckets'] = num_buckets
+            partitioning['columns'] = columns + ['bucket']
+            print(f"  ✓ bucket_by: {column} ({num_buckets} buckets)")
+        else:
+            partitioning.pop('bucket_by', None)
+            partitioning.pop('num_buckets', None)
+            partitioning['columns'] = columns
+            print("  ✓ bucketing désactivé")
+        
+        feed_config['updated_at'] = datetime.now().isoformat()
+        
+        with open(feed_file, 'w') as f:
+            json.dump(feed_config, f, indent=2)
+        
+        print(f"✓ Bucketing du feed '{name}' mis à jour (nouvelles partitions uniquement)")
+        return True
+    
+    def set_retention(self, name: str, mode: Optional[str] = None, time_column: Optional[str] = None):
+        """
+        Configure le mode de rétention d'un stream (section "retention")
+        
+        mode="row" supprime les lignes antérieures au cutoff sur time_column,
+        fichiers à cheval sur le cutoff compris (réécrits).
+        """
+        feed_file = self.active_dir / f"{name}.json"
+        
+        if not feed_file.exists():
+            print(f"❌ Le feed '{name}' n'existe pas")
+            return False
+        
+        with open(feed_file, 'r') as f:
+            feed_config = json.load(f)
+        
+        if feed_config['feed_type'] != FeedType.STREAM.value:
+            print("❌ Le mode de rétention ne s'applique qu'aux streams")
+            return False
+        
+        options = {key: value for key, value in (("mode", mode), ("time_column", time_column)) if value is not None}
+        if not options:
+            print(f"⚠ Aucune option de rétention fournie pour le feed '{name}'")
+            return False
+        
+        retention = feed_config.setdefault('retention', {})
+        retention.update(options)
+        for key, value in options.items():
+            print(f"  ✓ {key}: {value}")
+        
+        feed_config['updated_at'] = datetime.now().isoformat()
+        
+        with open(feed_file, 'w') as f:
+            json.dump(feed_config, f, indent=2)
+        
+        print(f"✓ Rétention du feed '{name}' mise à jour")
+        return True
+    
     def enable_feed(self, name: str):
         """Active un feed"""
         return self.update_feed(name, enabled=True)
@@ -357,6 +468,73 @@ def main():
     update_parser.add_argument('--description', help='Nouvelle description')
     update_parser.add_argument('--retention-days', type=int, help='Nouvelle rétention')
     
+    # Commande: parquet
+    parquet_parser = subparsers.add_parser('parquet', help='Options d\'écriture Parquet d\'un feed')
+    parquet_parser.add_argument('name', help='Nom du feed')
+    parquet_parser.add_argument(
+        '--compression',
+        choices=['snappy', 'zstd', 'lz4', 'gzip', 'brotli', 'none'],
+        help='Codec de compression'
+    )
+    parquet_parser.add_argument('--compression-level', type=int, help='Niveau de compression')
+    parquet_parser.add_argument(
+        '--dictionary',
+        choices=['on', 'off'],
+        help='Encodage dictionnaire'
+    )
+    parquet_parser.add_argument('--row-group-size', type=int, help='Lignes par row group')
+    parquet_parser.add_argument('--data-page-size', type=int, help='Octets par page de données')
+    parquet_parser.add_argument(
+        '--write-workers',
+        type=int,
+        help='Threads d\'encodage des gros snapshots (un fichier part par thread)'
+    )
+    parquet_parser.add_argument(
+        '--cluster-by',
+        type=str,
+        nargs='+',
+        help='Colonnes de clustering à l\'écriture'
+    )
+    parquet_parser.add_argument(
+        '--bloom-filter',
+        type=str,
+        nargs='+',
+        help='Colonnes avec bloom filter (recherches ponctuelles)'
+    )
+    parquet_parser.add_argument(
+        '--page-index',
+        choices=['on', 'off'],
+        help='Écrire les index de pages'
+    )
+    parquet_parser.add_argument(
+        '--cluster-method',
+        choices=['sort', 'zorder', 'hilbert'],
+        help='Méthode de clustering'
+    )
+    
+    # Commande: bucket
+    bucket_parser = subparsers.add_parser('bucket', help='Bucketing d\'un stream par hash d\'une clé')
+    bucket_parser.add_argument('name', help='Nom du feed')
+    bucket_group = bucket_parser.add_mutually_exclusive_group(required=True)
+    bucket_group.add_argument('--by', type=str, help='Colonne clé (ex: user_id)')
+    bucket_group.add_argument('--off', action='store_true', help='Désactiver le bucketing')
+    bucket_parser.add_argument(
+        '--buckets',
+        type=int,
+        default=DEFAULT_NUM_BUCKETS,
+        help='Nombre de buckets'
+    )
+    
+    # Commande: retention
+    retention_parser = subparsers.add_parser('retention', help='Mode de rétention d\'un stream')
+    retention_parser.add_argument('name', help='Nom du feed')
+    retention_parser.add_argument(
+        '--mode',
+        choices=list(RETENTION_MODES),
+        help='partition: jours entiers expirés, row: lignes expirées (fichiers à cheval réécrits)'
+    )
+    retention_parser.add_argument('--time-column', type=str, help='Colonne horodatée des lignes (mode row)')
+    
     # Commande: enable
     enable_parser = subparsers.add_parser('enable', help='Active un feed')
     enable_parser.add_argument('name', help='Nom du feed')
@@ -413,6 +591,27 @@ def main():
                 retention_days=args.retention_days
             )
         
+        elif args.command == 'parquet':
+            manager.set_parquet_options(
+                args.name,
+                compression=args.compression,
+                compression_level=args.compression_level,
+                use_dictionary=None if args.dictionary is None else args.dictionary == 'on',
+                row_group_size=args.row_group_size,
+                data_page_size=args.data_page_size,
+                cluster_by=args.cluster_by,
+                cluster_method=args.cluster_method,
+                bloom_filter_columns=args.bloom_filter,
+                write_page_index=None if args.page_index is None else args.page_index == 'on',
+                write_workers=args.write_workers
+            )
+        
+        elif args.command == 'bucket':
+            manager.set_bucketing(args.name, None if args.off else args.by, args.buckets)
+        
+        elif args.command == 'retention':
+            manager.set_retention(args.name, args.mode, args.time_column)
+        
         elif args.command == 'enable':
             manager.enable_feed(args.name)
         
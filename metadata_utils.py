@@ -1,15 +1,388 @@
 """
 Utilitaires pour la gestion des métadonnées du Data Lake
 """
+import hashlib
 import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 from data_lake_config import (
-    STREAMS_DIR, TABLES_DIR, DATA_LAKE_ROOT
+    STREAMS_DIR, TABLES_DIR, DATA_LAKE_ROOT, SCAN_WORKERS, SCAN_CACHE_FILE
 )
+from lake_catalog import LakeCatalog, get_catalog
+from lake_metadata import (
+    normalize_statistic_value, read_metadata, replace_partition_counts, write_json_atomic
+)
+from lake_tiering import is_hot_file, read_hot_file, read_hot_footer
+import parquet_bloom
+
+
+class PartitionScanner:
+    """
+    Parcours parallèle des partitions (os.scandir + pool de threads)
+    
+    Les résultats sont mis en cache par dossier, avec la date de modification
+    (mtime) du dossier comme clé: une partition dont le dossier n'a pas changé
+    n'est pas reparcourue. Le cache est persisté sous data_lake/_catalog.
+    """
+    
+    def __init__(self, workers: int = SCAN_WORKERS, cache_file: Path = SCAN_CACHE_FILE):
+        self.workers = workers
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._cache: Dict[str, Dict] = {}
+        
+        if cache_file.exists():
+            try:
+                with open(cache_file, 'r') as f:
+                    self._cache = json.load(f)
+            except (OSError, ValueError):
+                self._cache = {}
+    
+    def _cached(self, directory: str, mtime_ns: int) -> Optional[Dict]:
+        with self._lock:
+            entry = self._cache.get(directory)
+        return entry if entry and entry["mtime_ns"] == mtime_ns else None
+    
+    def _store(self, directory: str, entry: Dict):
+        with self._lock:
+            self._cache[directory] = entry
+            self._dirty = True
+    
+    def _list_subdirs(self, directory: str, prefix: str) -> List[str]:
+        """Sous-dossiers "<prefix>*" d'un dossier (liste en cache selon le mtime)"""
+        mtime_ns = os.stat(directory).st_mtime_ns
+        cached = self._cached(directory, mtime_ns)
+        if cached is None or "subdirs" not in cached:
+            with os.scandir(directory) as entries:
+                names = sorted(
+                    entry.name for entry in entries
+                    if entry.is_dir(follow_symlinks=False) and not entry.name.startswith(".")
+                )
+            cached = {**(cached or {}), "mtime_ns": mtime_ns, "subdirs": names}
+            self._store(directory, cached)
+        return [name for name in cached["subdirs"] if name.startswith(prefix)]
+    
+    def _scan_leaf(self, directory: str) -> Dict:
+        """Nombre et taille des fichiers d'une partition (Parquet et tier chaud Arrow)"""
+        mtime_ns = os.stat(directory).st_mtime_ns
+        cached = self._cached(directory, mtime_ns)
+        if cached is not None and "hot_files" in cached:
+            return cached
+        
+        files_count = 0
+        hot_files = 0
+        size_bytes = 0
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.name.endswith(".parquet") or is_hot_file(entry.name):
+                    files_count += 1
+                    hot_files += is_hot_file(entry.name)
+                    size_bytes += entry.stat(follow_symlinks=False).st_size
+        
+        # Un dossier de jour bucketé porte aussi la liste de ses sous-dossiers
+        result = {
+            **(cached or {}),
+            "mtime_ns": mtime_ns,
+            "files_count": files_count,
+            "hot_files": hot_files,
+            "size_bytes": size_bytes
+        }
+        self._store(directory, result)
+        return result
+    
+    def _scan_year(self, path: Path, year_name: str) -> List[Dict]:
+        """Partitions par jour d'une année (et par bucket pour les jours bucketés)"""
+        partitions = []
+        year = int(year_name.split("=")[1])
+        year_dir = os.path.join(path, year_name)
+        
+        for month_name in self._list_subdirs(year_dir, "month="):
+            month = int(month_name.split("=")[1])
+            month_dir = os.path.join(year_dir, month_name)
+            
+            for day_name in self._list_subdirs(month_dir, "day="):
+                day = int(day_name.split("=")[1])
+                day_dir = os.path.join(month_dir, day_name)
+                day_path = os.path.join(year_name, month_name, day_name)
+                bucket_names = self._list_subdirs(day_dir, "bucket=")
+                
+                leaves = [(None, day_dir, day_path)] + [
+                    (int(name.split("=")[1]), os.path.join(day_dir, name), os.path.join(day_path, name))
+                    for name in bucket_names
+                ]
+                for bucket, directory, partition_path in leaves:
+                    leaf = self._scan_leaf(directory)
+                    if bucket is None and bucket_names and not leaf["files_count"]:
+                        continue
+                    partition = {
+                        "type": "date",
+                        "year": year,
+                        "month": month,
+                        "day": day,
+                        "path": partition_path,
+                        "files_count": leaf["files_count"],
+                        "hot_files": leaf["hot_files"],
+                        "size_mb": round(leaf["size_bytes"] / (1024 * 1024), 2)
+                    }
+                    if bucket is not None:
+                        partition["bucket"] = bucket
+                    partitions.append(partition)
+        
+        return partitions
+    
+    def _scan_versions(self, path: Path, version_names: List[str]) -> List[Dict]:
+        """Partitions par version d'une table"""
+        partitions = []
+        for version_name in version_names:
+            leaf = self._scan_leaf(os.path.join(path, version_name))
+            partitions.append({
+                "type": "version",
+                "version": int(version_name.split("=v")[1]),
+                "path": version_name,
+                "files_count": leaf["files_count"],
+                "hot_files": leaf["hot_files"],
+                "size_mb": round(leaf["size_bytes"] / (1024 * 1024), 2)
+            })
+        return partitions
+    
+    def scan(self, paths: List[Path]) -> Dict[Path, List[Dict]]:
+        """
+        Parcourt plusieurs feeds en parallèle (une tâche par année de stream
+        et par table)
+        
+        Returns:
+            {chemin du feed: partitions}
+        """
+        results: Dict[Path, List[Dict]] = {path: [] for path in paths}
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {}
+            for path in paths:
+                if not path.is_dir():
+                    continue
+                for year_name in self._list_subdirs(str(path), "year="):
+                    futures[executor.submit(self._scan_year, path, year_name)] = path
+                version_names = self._list_subdirs(str(path), "version=v")
+                if version_names:
+                    futures[executor.submit(self._scan_versions, path, version_names)] = path
+            
+            for future in as_completed(futures):
+                results[futures[future]].extend(future.result())
+        
+        for partitions in results.values():
+            partitions.sort(key=lambda p: (p["type"], p.get("version", 0), p["path"]))
+        
+        self.save()
+        return results
+    
+    def scan_feed(self, path: Path) -> List[Dict]:
+        """Partitions d'un feed"""
+        return self.scan([path])[path]
+    
+    def save(self):
+        """Persiste le cache s'il a été modifié"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._cache)
+            self._dirty = False
+        
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(self.cache_file, snapshot, indent=None)
+        except OSError as e:
+            # Le cache n'est qu'une optimisation
+            logging.getLogger(__name__).warning(f"Cache de parcours non sauvegardé: {e}")
+
+
+_scanner: Optional[PartitionScanner] = None
+
+
+def get_partition_scanner() -> PartitionScanner:
+    """Scanner partagé du processus"""
+    global _scanner
+    if _scanner is None:
+        _scanner = PartitionScanner()
+    return _scanner
+
+
+class FooterVerifier:
+    """
+    Recomptage exact à partir des footers Parquet (sans lire les données)
+    
+    Chaque fichier est ouvert en memory-map: seul le footer est lu (quelques Ko).
+    Les fichiers du tier chaud (Arrow IPC) sont comptés depuis leur footer IPC.
+    Produit par partition le nombre de lignes, la taille en octets et les
+    empreintes de schéma, et les compare à _metadata.json.
+    """
+    
+    def __init__(self, workers: int = SCAN_WORKERS):
+        self.workers = workers
+    
+    @staticmethod
+    def read_footer(file_path: Path) -> Dict:
+        """Lignes, taille et empreinte de schéma d'un fichier Parquet ou Arrow IPC"""
+        if is_hot_file(file_path):
+            footer = read_hot_footer(file_path)
+            schema = footer["schema"].remove_metadata()
+            return {
+                "records": footer["records"],
+                "row_groups": footer["batches"],
+                "size_bytes": footer["size_bytes"],
+                "schema_fingerprint": hashlib.sha256(schema.to_string().encode()).hexdigest()[:16]
+            }
+        
+        with pa.memory_map(str(file_path), 'r') as source:
+            parquet_file = pq.ParquetFile(source)
+            schema = parquet_file.schema_arrow.remove_metadata()
+            return {
+                "records": parquet_file.metadata.num_rows,
+                "row_groups": parquet_file.metadata.num_row_groups,
+                "size_bytes": source.size(),
+                "schema_fingerprint": hashlib.sha256(schema.to_string().encode()).hexdigest()[:16]
+            }
+    
+    @staticmethod
+    def _list_files(path: Path) -> List[Path]:
+        """Fichiers Parquet et Arrow présents sur disque (source de vérité du recomptage)"""
+        files = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [d for d in dirnames if not d.startswith((".", "_"))]
+            files.extend(
+                Path(dirpath) / filename for filename in filenames
+                if (filename.endswith(".parquet") or is_hot_file(filename)) and not filename.startswith(".")
+            )
+        return files
+    
+    def count_feed(self, path: Path) -> Dict[str, Dict]:
+        """
+        Compte exactement les partitions d'un feed
+        
+        Returns:
+            {chemin de partition: {"records", "size_bytes", "files", "schemas",
+                                   "unreadable", "entries"}}
+        """
+        files = self._list_files(path)
+        partitions: Dict[str, Dict] = {}
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            footers = dict(zip(files, executor.map(self._safe_read_footer, files)))
+        
+        for file_path, footer in footers.items():
+            partition_key = str(file_path.parent.relative_to(path))
+            partition = partitions.setdefault(
+                partition_key,
+                {
+                    "records": 0, "size_bytes": 0, "files": 0,
+                    "schemas": set(), "unreadable": [], "entries": []
+                }
+            )
+            if footer is None:
+                partition["unreadable"].append(file_path.name)
+                continue
+            partition["records"] += footer["records"]
+            partition["size_bytes"] += footer["size_bytes"]
+            partition["files"] += 1
+            partition["schemas"].add(footer["schema_fingerprint"])
+            partition["entries"].append((file_path, footer["records"], footer["size_bytes"]))
+        
+        return partitions
+    
+    @staticmethod
+    def _safe_read_footer(file_path: Path) -> Optional[Dict]:
+        try:
+            return FooterVerifier.read_footer(file_path)
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Footer illisible {file_path}: {e}")
+            return None
+    
+    def verify_feed(self, path: Path, update: bool = False) -> Dict:
+        """
+        Compare les compteurs de _metadata.json aux footers Parquet
+        
+        Args:
+            update: réécrire les compteurs des métadonnées (et du catalogue)
+                    avec les valeurs exactes
+        
+        Returns:
+            Rapport: totaux exacts, écarts par partition, schémas distincts
+        """
+        actual = self.count_feed(path)
+        metadata = read_metadata(path) or {"partitions": [], "total_records": 0}
+        expected = {p["path"]: p for p in metadata["partitions"]}
+        
+        mismatches = []
+        for partition_key in sorted(set(actual) | set(expected)):
+            found = actual.get(partition_key)
+            recorded = expected.get(partition_key)
+            
+            if found is None:
+                mismatches.append({"partition": partition_key, "issue": "absente du disque"})
+                continue
+            if recorded is None:
+                mismatches.append({
+                    "partition": partition_key,
+                    "issue": "absente des métadonnées",
+                    "records": found["records"]
+                })
+                continue
+            if recorded.get("records") != found["records"]:
+                mismatches.append({
+                    "partition": partition_key,
+                    "issue": "lignes",
+                    "expected": recorded.get("records"),
+                    "actual": found["records"]
+                })
+            if "size_bytes" in recorded and recorded["size_bytes"] != found["size_bytes"]:
+                mismatches.append({
+                    "partition": partition_key,
+                    "issue": "octets",
+                    "expected": recorded["size_bytes"],
+                    "actual": found["size_bytes"]
+                })
+            if found["unreadable"]:
+                mismatches.append({
+                    "partition": partition_key,
+                    "issue": "fichiers illisibles",
+                    "files": found["unreadable"]
+                })
+        
+        schemas = set().union(*(p["schemas"] for p in actual.values())) if actual else set()
+        result = {
+            "path": str(path),
+            "partitions": len(actual),
+            "files": sum(p["files"] for p in actual.values()),
+            "records": sum(p["records"] for p in actual.values()),
+            "size_bytes": sum(p["size_bytes"] for p in actual.values()),
+            "recorded_records": metadata.get("total_records", 0),
+            "schema_fingerprints": sorted(schemas),
+            "mismatches": mismatches
+        }
+        
+        if update and (mismatches or not (path / "_metadata.json").exists()):
+            replace_partition_counts(path, {
+                key: {"records": p["records"], "size_bytes": p["size_bytes"], "files": p["files"]}
+                for key, p in actual.items() if p["files"]
+            })
+            get_catalog().replace_feed(
+                path, [entry for p in actual.values() for entry in p["entries"]]
+            )
+            result["updated"] = True
+        
+        return result
 
 
 class MetadataReader:
@@ -18,13 +391,7 @@ class MetadataReader:
     @staticmethod
     def read_metadata(path: Path) -> Optional[Dict]:
         """Lit le fichier de métadonnées d'un stream ou table"""
-        metadata_file = path / "_metadata.json"
-        
-        if not metadata_file.exists():
-            return None
-        
-        with open(metadata_file, 'r') as f:
-            return json.load(f)
+        return read_metadata(path)
     
     @staticmethod
     def list_all_metadata() -> Dict[str, Dict]:
@@ -34,6 +401,17 @@ class MetadataReader:
             "tables": {}
         }
         
+        # Feeds référencés dans le catalogue (sans parcourir les dossiers)
+        catalog_feeds = get_catalog().list_feeds()
+        if catalog_feeds:
+            for feed in catalog_feeds:
+                kind, name = feed.split("/", 1)
+                base_dir = STREAMS_DIR if kind == "streams" else TABLES_DIR
+                metadata = MetadataReader.read_metadata(base_dir / name)
+                if metadata:
+                    all_metadata[kind][name] = metadata
+            return all_metadata
+        
         # Lire les métadonnées des streams
         if STREAMS_DIR.exists():
             for stream_dir in STREAMS_DIR.iterdir():
@@ -103,51 +481,319 @@ class MetadataReader:
     @staticmethod
     def get_partition_info(path: Path) -> List[Dict]:
         """Récupère les informations des partitions d'un stream ou table"""
+        catalog = get_catalog()
+        if catalog.has_feed(path):
+            return MetadataReader._partition_info_from_catalog(catalog, path)
+        
+        # Feed absent du catalogue (données antérieures): parcours des dossiers
+        return get_partition_scanner().scan_feed(path)
+    
+    @staticmethod
+    def get_all_partition_info(paths: List[Path]) -> Dict[Path, List[Dict]]:
+        """
+        Informations des partitions de plusieurs feeds
+        
+        Les feeds catalogués sont lus dans le catalogue; les autres sont
+        parcourus en un seul passage parallèle.
+        """
+        catalog = get_catalog()
+        results = {}
+        to_scan = []
+        
+        for path in paths:
+            if catalog.has_feed(path):
+                results[path] = MetadataReader._partition_info_from_catalog(catalog, path)
+            else:
+                to_scan.append(path)
+        
+        if to_scan:
+            results.update(get_partition_scanner().scan(to_scan))
+        
+        return results
+    
+    @staticmethod
+    def _partition_info_from_catalog(catalog: LakeCatalog, path: Path) -> List[Dict]:
+        """Informations des partitions lues dans le catalogue (sans accès aux fichiers)"""
         partitions = []
         
-        # Chercher les partitions par date (year=YYYY/month=MM/day=DD)
-        for year_dir in path.glob("year=*"):
-            year = int(year_dir.name.split("=")[1])
+        for partition in catalog.list_partitions(path):
+            info = {
+                "path": partition["partition_path"],
+                "files_count": partition["files_count"],
+                "hot_files": partition["hot_files"],
+                "size_mb": round(partition["size_bytes"] / (1024 * 1024), 2)
+            }
             
-            for month_dir in year_dir.glob("month=*"):
-                month = int(month_dir.name.split("=")[1])
-                
-                for day_dir in month_dir.glob("day=*"):
-                    day = int(day_dir.name.split("=")[1])
-                    
-                    # Compter les fichiers et calculer la taille
-                    files = list(day_dir.glob("*.parquet"))
-                    total_size = sum(f.stat().st_size for f in files)
-                    
-                    partitions.append({
-                        "type": "date",
-                        "year": year,
-                        "month": month,
-                        "day": day,
-                        "path": str(day_dir.relative_to(path)),
-                        "files_count": len(files),
-                        "size_mb": round(total_size / (1024 * 1024), 2)
-                    })
-        
-        # Chercher les partitions par version (version=vX)
-        for version_dir in path.glob("version=v*"):
-            version = int(version_dir.name.split("=v")[1])
+            if partition["version"] is not None:
+                info = {"type": "version", "version": partition["version"], **info}
+            else:
+                info = {
+                    "type": "date",
+                    "year": partition["year"],
+                    "month": partition["month"],
+                    "day": partition["day"],
+                    **info
+                }
+                if partition["bucket"] is not None:
+                    info["bucket"] = partition["bucket"]
             
-            # Compter les fichiers et calculer la taille
-            files = list(version_dir.glob("*.parquet"))
-            total_size = sum(f.stat().st_size for f in files)
-            
-            partitions.append({
-                "type": "version",
-                "version": version,
-                "path": str(version_dir.relative_to(path)),
-                "files_count": len(files),
-                "size_mb": round(total_size / (1024 * 1024), 2)
-            })
+            partitions.append(info)
         
         return partitions
 
 
+class StatisticsPruner:
+    """
+    Élagage des fichiers et row groups à partir des statistiques du catalogue
+    
+    Les filtres sont une conjonction de tuples (colonne, opérateur, valeur) avec
+    les opérateurs ==, !=, <, <=, >, >= et in. Un fichier ou row group n'est
+    écarté que si ses min/max prouvent qu'aucune ligne ne peut correspondre.
+    """
+    
+    OPERATORS = ("==", "!=", "<", "<=", ">", ">=", "in")
+    
+    @staticmethod
+    def _may_match(column_stats: Optional[Dict], op: str, value: Any) -> bool:
+        """Indique si des lignes de min/max donnés peuvent satisfaire le filtre"""
+        if not column_stats or column_stats.get("min") is None or column_stats.get("max") is None:
+            return True
+        
+        low, high = column_stats["min"], column_stats["max"]
+        try:
+            if op == "==":
+                return low <= value <= high
+            if op == "!=":
+                return not (low == high == value)
+            if op == "<":
+                return low < value
+            if op == "<=":
+                return low <= value
+            if op == ">":
+                return high > value
+            if op == ">=":
+                return high >= value
+            if op == "in":
+                return any(low <= v <= high for v in value)
+        except TypeError:
+            # Types non comparables (ex: chaîne vs nombre): pas d'élagage
+            return True
+        
+        return True
+    
+    @staticmethod
+    def _normalize_filters(filters: List[Tuple[str, str, Any]]) -> List[Tuple[str, str, Any]]:
+        """Valide les filtres et convertit les valeurs au format de l'index"""
+        normalized = []
+        for column, op, value in filters:
+            if op not in StatisticsPruner.OPERATORS:
+                raise ValueError(f"Opérateur non supporté: {op}")
+            if op == "in":
+                value = [normalize_statistic_value(v) for v in value]
+            else:
+                value = normalize_statistic_value(value)
+            normalized.append((column, op, value))
+        return normalized
+    
+    @staticmethod
+    def _list_files(path: Path) -> List[Path]:
+        """Fichiers du feed (catalogue, sinon parcours)"""
+        catalog = get_catalog()
+        if catalog.has_feed(path):
+            return [
+                path / entry["partition_path"] / entry["file_name"]
+                for entry in catalog.list_files(path)
+            ]
+        return sorted(path.rglob("*.parquet"))
+    
+    @staticmethod
+    def select_row_groups(
+        path: Path,
+        filters: List[Tuple[str, str, Any]],
+        files: Optional[List[Path]] = None
+    ) -> Dict[Path, Optional[List[int]]]:
+        """
+        Sélectionne les fichiers et row groups pouvant contenir des lignes filtrées
+        
+        Args:
+            files: fichiers candidats (partitions déjà élaguées), défaut: tout le
+                feed; seules leurs statistiques sont lues dans le catalogue
+        
+        Returns:
+            {fichier: [indices des row groups]} ; None = fichier absent de l'index
+            (ou du tier chaud), à lire entièrement
+        """
+        filters = StatisticsPruner._normalize_filters(filters)
+        if files is None:
+            files = StatisticsPruner._list_files(path)
+        statistics = get_catalog().get_file_statistics(path, files)
+        selected = {}
+        
+        for file_path in files:
+            file_stats = statistics.get(Path(file_path))
+            if file_stats is None:
+                selected[Path(file_path)] = None
+                continue
+            
+            if not all(
+                StatisticsPruner._may_match(file_stats["columns"].get(column), op, value)
+                for column, op, value in filters
+            ):
+                continue
+            
+            row_groups = [
+                index for index, rg in enumerate(file_stats["row_groups"])
+                if all(
+                    StatisticsPruner._may_match(rg["columns"].get(column), op, value)
+                    for column, op, value in filters
+                )
+            ]
+            if row_groups:
+                selected[Path(file_path)] = row_groups
+        
+        return selected
+    
+    @staticmethod
+    def read_filtered(
+        path: Path,
+        filters: List[Tuple[str, str, Any]],
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Lit uniquement les row groups candidats puis applique les filtres ligne à ligne
+        
+        Les colonnes filtrées sont lues même si elles ne sont pas projetées,
+        puis retirées du résultat.
+        """
+        frames = []
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys([*columns, *(column for column, _, _ in filters)]))
+        
+        for file_path, row_groups in StatisticsPruner.select_row_groups(path, filters).items():
+            if is_hot_file(file_path):
+                frames.append(read_hot_file(file_path, read_columns).to_pandas())
+                continue
+            parquet_file = pq.ParquetFile(file_path)
+            if row_groups is None:
+                table = parquet_file.read(columns=read_columns)
+            else:
+                table = parquet_file.read_row_groups(row_groups, columns=read_columns)
+            frames.append(table.to_pandas())
+        
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        
+        df = pd.concat(frames, ignore_index=True)
+        for column, op, value in filters:
+            series = df[column]
+            if op == "in":
+                mask = series.isin(value)
+            else:
+                mask = {
+                    "==": series.__eq__, "!=": series.__ne__,
+                    "<": series.__lt__, "<=": series.__le__,
+                    ">": series.__gt__, ">=": series.__ge__
+                }[op](value)
+            df = df[mask]
+        
+        if columns is not None:
+            df = df[list(columns)]
+        return df.reset_index(drop=True)
+
+
+class BloomFilterLookup:
+    """
+    Recherche ponctuelle par valeur(s) d'une colonne
+    
+    Les row groups sont d'abord élagués par les min/max de l'index de
+    statistiques, puis par les bloom filters Parquet de la colonne (si le feed
+    les écrit, option bloom_filter_columns). Seuls les row groups restants sont lus.
+    """
+    
+    @staticmethod
+    def candidate_row_groups(path: Path, column: str, values: List[Any]) -> Dict[Path, Optional[List[int]]]:
+        """Row groups pouvant contenir au moins une des valeurs (None: fichier du tier chaud, lu entièrement)"""
+        candidates = {}
+        selected = StatisticsPruner.select_row_groups(path, [(column, "in", values)])
+        
+        for file_path, row_groups in selected.items():
+            if is_hot_file(file_path):
+                candidates[file_path] = None
+                continue
+            
+            parquet_file = pq.ParquetFile(file_path)
+            metadata = parquet_file.metadata
+            if row_groups is None:
+                row_groups = list(range(metadata.num_row_groups))
+            
+            column_index = parquet_file.schema_arrow.get_field_index(column)
+            if column_index < 0:
+                continue
+            
+            kept = []
+            with open(file_path, 'rb') as source:
+                for rg_index in row_groups:
+                    column_chunk = metadata.row_group(rg_index).column(column_index)
+                    bitset = parquet_bloom.read_bitset(source, column_chunk)
+                    if bitset is None:
+                        kept.append(rg_index)
+                        continue
+                    
+                    for value in values:
+                        # Type non supporté: pas d'élagage
+                        if not parquet_bloom.plain_encodable(value, column_chunk.physical_type):
+                            kept.append(rg_index)
+                            break
+                        # None: valeur hors de la plage du type, absente de la colonne
+                        encoded = parquet_bloom.plain_encode(value, column_chunk.physical_type)
+                        if encoded is not None and parquet_bloom.might_contain(
+                            bitset, parquet_bloom.xxh64(encoded)
+                        ):
+                            kept.append(rg_index)
+                            break
+            
+            if kept:
+                candidates[file_path] = kept
+        
+        return candidates
+    
+    @staticmethod
+    def _value_set(values: List[Any], value_type: pa.DataType) -> pa.Array:
+        """Valeurs recherchées converties au type de la colonne (valeurs hors plage écartées)"""
+        kept = []
+        for value in values:
+            try:
+                kept.append(pa.scalar(value).cast(value_type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, OverflowError):
+                continue
+        return pa.array([scalar.as_py() for scalar in kept], type=value_type)
+    
+    @staticmethod
+    def lookup(
+        path: Path,
+        column: str,
+        values: List[Any],
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Lignes dont la colonne vaut une des valeurs, en ne lisant que les row groups candidats"""
+        frames = []
+        
+        for file_path, row_groups in BloomFilterLookup.candidate_row_groups(path, column, values).items():
+            read_columns = columns if columns is None or column in columns else columns + [column]
+            if row_groups is None:
+                table = read_hot_file(file_path, read_columns)
+            else:
+                table = pq.ParquetFile(file_path).read_row_groups(row_groups, columns=read_columns)
+            value_set = BloomFilterLookup._value_set(values, table.schema.field(column).type)
+            frames.append(table.filter(pc.is_in(table.column(column), value_set=value_set)).to_pandas())
+        
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        
+        return pd.concat(frames, ignore_index=True)
+
+
 class MetadataAnalyzer:
     """Analyseur de métadonnées pour générer des rapports"""
     
@@ -157,6 +803,12 @@ class MetadataAnalyzer:
         stats = MetadataReader.get_statistics()
         all_metadata = MetadataReader.list_all_metadata()
         
+        # Partitions sur disque de tous les feeds, en un passage parallèle
+        partition_info = MetadataReader.get_all_partition_info(
+            [STREAMS_DIR / name for name in all_metadata["streams"]] +
+            [TABLES_DIR / name for name in all_metadata["tables"]]
+        )
+        
         report = []
         report.append("=" * 80)
         report.append("📊 RAPPORT DU DATA LAKE")
@@ -192,7 +844,12 @@ class MetadataAnalyzer:
                 report.append(f"    Description: {metadata.get('description', 'N/A')}")
                 report.append(f"    Enregistrements: {metadata.get('total_records', 0):,}")
                 report.append(f"    Taille: {metadata.get('total_size_mb', 0):.2f} MB")
-                report.append(f"    Partitions: {len(metadata.get('partitions', []))}")
+                partitions = partition_info.get(STREAMS_DIR / stream_name, [])
+                report.append(f"    Partitions: {len(partitions)}")
+                report.append(f"    Taille sur disque: {sum(p['size_mb'] for p in partitions):.2f} MB")
+                hot_files = sum(p.get("hot_files", 0) for p in partitions)
+                if hot_files:
+                    report.append(f"    Tier chaud: {hot_files} fichier(s) Arrow en attente de conversion")
                 report.append(f"    Dernier export: {metadata.get('last_export', 'N/A')}")
             report.append("")
         
@@ -205,7 +862,9 @@ class MetadataAnalyzer:
                 report.append(f"    Description: {metadata.get('description', 'N/A')}")
                 report.append(f"    Enregistrements: {metadata.get('total_records', 0):,}")
                 report.append(f"    Taille: {metadata.get('total_size_mb', 0):.2f} MB")
-                report.append(f"    Versions: {len(metadata.get('partitions', []))}")
+                partitions = partition_info.get(TABLES_DIR / table_name, [])
+                report.append(f"    Versions: {len(partitions)}")
+                report.append(f"    Taille sur disque: {sum(p['size_mb'] for p in partitions):.2f} MB")
                 report.append(f"    Dernier export: {metadata.get('last_export', 'N/A')}")
             report.append("")
         
@@ -213,6 +872,21 @@ class MetadataAnalyzer:
         
         return "\n".join(report)
     
+    @staticmethod
+    def verify_lake(update: bool = False) -> List[Dict]:
+        """Vérifie (et optionnellement recompte) tous les feeds à partir des footers Parquet"""
+        verifier = FooterVerifier()
+        results = []
+        
+        for root in (STREAMS_DIR, TABLES_DIR):
+            if not root.exists():
+                continue
+            for feed_dir in sorted(root.iterdir()):
+                if feed_dir.is_dir():
+                    results.append(verifier.verify_feed(feed_dir, update=update))
+        
+        return results
+    
     @staticmethod
     def export_to_csv(output_file: str = "data_lake_report.csv"):
         """Exporte les métadonnées en CSV"""
@@ -276,6 +950,16 @@ def main():
         action='store_true',
         help='Afficher les statistiques globales'
     )
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='Comparer les métadonnées aux footers Parquet (comptes exacts)'
+    )
+    parser.add_argument(
+        '--recount',
+        action='store_true',
+        help='Comme --verify, puis corriger les métadonnées et le catalogue'
+    )
     
     args = parser.parse_args()
     
@@ -297,6 +981,26 @@ def main():
         print(f"Taille totale: {stats['total_size_mb']:.2f} MB")
         print(f"Partitions: {stats['total_partitions']}")
     
+    elif args.verify or args.recount:
+        results = MetadataAnalyzer.verify_lake(update=args.recount)
+        print("\n🔎 Vérification des footers Parquet")
+        print("-" * 40)
+        for result in results:
+            status = "✓" if not result["mismatches"] else "✗"
+            print(
+                f"{status} {result['path']}: {result['records']:,} lignes "
+                f"(métadonnées: {result['recorded_records']:,}), {result['files']} fichiers, "
+                f"{result['size_bytes'] / (1024 * 1024):.2f} MB, "
+                f"{len(result['schema_fingerprints'])} schéma(s)"
+            )
+            for mismatch in result["mismatches"]:
+                details = {k: v for k, v in mismatch.items() if k not in ("partition", "issue")}
+                print(f"    ✗ {mismatch['partition']}: {mismatch['issue']} {details}")
+            if len(result["schema_fingerprints"]) > 1:
+                print(f"    ⚠ Schémas différents: {', '.join(result['schema_fingerprints'])}")
+            if result.get("updated"):
+                print("    ✓ Métadonnées et catalogue mis à jour")
+    
     else:
         parser.print_help()
 
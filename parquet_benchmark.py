@@ -0,0 +1,262 @@
+"""
+Benchmark des options d'écriture Parquet sur une partition réelle du Data Lake
+- Rejoue un échantillon de partition avec chaque combinaison de codec
+  (snappy, zstd:niveau, lz4, gzip), dictionnaire on/off, taille de row group
+  et taille de page
+- Mesure débit d'écriture, débit de lecture et taille du fichier
+- Peut enregistrer la meilleure combinaison dans le JSON du feed (--apply)
+"""
+import itertools
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_lake_config import (
+    STREAMS_DIR, TABLES_DIR, LOG_FORMAT, LOG_LEVEL,
+    parquet_writer_kwargs, save_parquet_options
+)
+from lake_catalog import get_catalog
+
+
+logging.basicConfig(
+    level=getattr(logging, LOG_LEVEL),
+    format=LOG_FORMAT,
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CODECS = ["snappy", "zstd:1", "zstd:3", "zstd:9", "lz4", "gzip"]
+DEFAULT_ROW_GROUP_SIZES = [128 * 1024, 1024 * 1024]
+DEFAULT_PAGE_SIZES = [64 * 1024, 1024 * 1024]
+
+
+def parse_codec(codec: str) -> Dict:
+    """"zstd:3" -> {"compression": "zstd", "compression_level": 3}"""
+    name, _, level = codec.partition(":")
+    return {"compression": name, "compression_level": int(level) if level else None}
+
+
+def find_sample_partition(base_path: Path, partition: Optional[str] = None) -> Path:
+    """Partition à rejouer: celle demandée, sinon la plus récente"""
+    if partition:
+        return base_path / partition
+    
+    catalog = get_catalog()
+    if catalog.has_feed(base_path):
+        partitions = catalog.list_partitions(base_path)
+        latest = max(partitions, key=lambda p: (p["version"] or 0, p["partition_path"]))
+        return base_path / latest["partition_path"]
+    
+    candidates = sorted(
+        {f.parent for f in base_path.rglob("*.parquet")},
+        key=lambda p: (int(p.name.replace("version=v", "")) if p.name.startswith("version=v") else 0, str(p))
+    )
+    if not candidates:
+        raise ValueError(f"Aucune partition dans {base_path}")
+    return candidates[-1]
+
+
+def load_sample(partition_path: Path, max_rows: int) -> pa.Table:
+    """Charge jusqu'à max_rows lignes d'une partition"""
+    tables = []
+    rows = 0
+    for file_path in sorted(partition_path.glob("*.parquet")):
+        table = pq.read_table(file_path)
+        tables.append(table.slice(0, max_rows - rows))
+        rows += tables[-1].num_rows
+        if rows >= max_rows:
+            break
+    
+    if not tables:
+        raise ValueError(f"Aucun fichier Parquet dans {partition_path}")
+    return pa.concat_tables(tables, promote_options="default")
+
+
+def benchmark_options(table: pa.Table, options: Dict, work_dir: Path, repeat: int) -> Dict:
+    """Écrit puis relit l'échantillon avec des options données (meilleur temps sur repeat essais)"""
+    file_path = work_dir / "sample.parquet"
+    megabytes = table.nbytes / (1024 * 1024)
+    write_times = []
+    read_times = []
+    
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pq.write_table(
+            table,
+            file_path,
+            row_group_size=options["row_group_size"],
+            **parquet_writer_kwargs(options)
+        )
+        write_times.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        pq.read_table(file_path)
+        read_times.append(time.perf_counter() - start)
+    
+    size_bytes = file_path.stat().st_size
+    file_path.unlink()
+    
+    return {
+        "options": options,
+        "size_bytes": size_bytes,
+        "ratio": table.nbytes / size_bytes if size_bytes else 0,
+        "write_mb_s": megabytes / min(write_times),
+        "read_mb_s": megabytes / min(read_times)
+    }
+
+
+def run_benchmark(
+    table: pa.Table,
+    codecs: List[str],
+    dictionary: List[bool],
+    row_group_sizes: List[int],
+    page_sizes: List[int],
+    repeat: int = 3
+) -> List[Dict]:
+    """Mesure toutes les combinaisons d'options"""
+    results = []
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for codec, use_dictionary, row_group_size, page_size in itertools.product(
+            codecs, dictionary, row_group_sizes, page_sizes
+        ):
+            options = {
+                **parse_codec(codec),
+                "use_dictionary": use_dictionary,
+                "row_group_size": row_group_size,
+                "data_page_size": page_size
+            }
+            result = benchmark_options(table, options, Path(tmp_dir), repeat)
+            results.append(result)
+            logger.info(
+                f"{codec:8s} dict={'on' if use_dictionary else 'off':3s} "
+                f"rg={row_group_size:>8,} page={page_size:>8,}: "
+                f"{result['size_bytes'] / 1024:,.0f} KB"
+            )
+    
+    return results
+
+
+def best_result(results: List[Dict], criterion: str) -> Dict:
+    """Meilleure combinaison selon le critère (size, write, read ou balanced)"""
+    if criterion == "size":
+        return min(results, key=lambda r: r["size_bytes"])
+    if criterion == "write":
+        return max(results, key=lambda r: r["write_mb_s"])
+    if criterion == "read":
+        return max(results, key=lambda r: r["read_mb_s"])
+    
+    # balanced: somme des rangs sur les trois mesures
+    ranks = {id(r): 0 for r in results}
+    for key, reverse in (("size_bytes", False), ("write_mb_s", True), ("read_mb_s", True)):
+        for rank, result in enumerate(sorted(results, key=lambda r: r[key], reverse=reverse)):
+            ranks[id(result)] += rank
+    return min(results, key=lambda r: ranks[id(r)])
+
+
+def format_results(results: List[Dict], uncompressed_bytes: int) -> str:
+    """Tableau des résultats trié par taille"""
+    lines = [
+        f"{'codec':10s} {'dict':4s} {'row group':>10s} {'page':>9s} "
+        f"{'taille KB':>10s} {'ratio':>6s} {'écriture MB/s':>14s} {'lecture MB/s':>13s}",
+        "-" * 84
+    ]
+    for result in sorted(results, key=lambda r: r["size_bytes"]):
+        options = result["options"]
+        codec = options["compression"]
+        if options["compression_level"] is not None:
+            codec += f":{options['compression_level']}"
+        lines.append(
+            f"{codec:10s} {'on' if options['use_dictionary'] else 'off':4s} "
+            f"{options['row_group_size']:>10,} {options['data_page_size']:>9,} "
+            f"{result['size_bytes'] / 1024:>10,.0f} {result['ratio']:>6.2f} "
+            f"{result['write_mb_s']:>14,.1f} {result['read_mb_s']:>13,.1f}"
+        )
+    lines.append(f"\nÉchantillon non compressé (Arrow): {uncompressed_bytes / (1024 * 1024):,.2f} MB")
+    return "\n".join(lines)
+
+
+def main():
+    """Point d'entrée: benchmark des options Parquet d'un feed"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Benchmark compression / encodage Parquet sur une partition du Data Lake"
+    )
+    parser.add_argument('feed', type=str, help='Nom du stream ou de la table')
+    parser.add_argument(
+        '--partition',
+        type=str,
+        help='Partition à rejouer (ex: year=2026/month=10/day=18), défaut: la plus récente'
+    )
+    parser.add_argument('--max-rows', type=int, default=1_000_000, help='Taille max de l\'échantillon')
+    parser.add_argument(
+        '--codecs',
+        type=str,
+        nargs='+',
+        default=DEFAULT_CODECS,
+        help='Codecs à tester (codec ou codec:niveau)'
+    )
+    parser.add_argument(
+        '--dictionary',
+        choices=['on', 'off', 'both'],
+        default='both',
+        help='Encodage dictionnaire à tester'
+    )
+    parser.add_argument(
+        '--row-group-sizes',
+        type=int,
+        nargs='+',
+        default=DEFAULT_ROW_GROUP_SIZES,
+        help='Tailles de row group (lignes)'
+    )
+    parser.add_argument(
+        '--page-sizes',
+        type=int,
+        nargs='+',
+        default=DEFAULT_PAGE_SIZES,
+        help='Tailles de page de données (octets)'
+    )
+    parser.add_argument('--repeat', type=int, default=3, help='Essais par combinaison')
+    parser.add_argument(
+        '--apply',
+        choices=['size', 'write', 'read', 'balanced'],
+        help='Enregistrer la meilleure combinaison (selon ce critère) dans le JSON du feed'
+    )
+    
+    args = parser.parse_args()
+    
+    try:
+        base_path = STREAMS_DIR / args.feed
+        if not base_path.exists():
+            base_path = TABLES_DIR / args.feed
+        
+        partition_path = find_sample_partition(base_path, args.partition)
+        table = load_sample(partition_path, args.max_rows)
+        logger.info(f"Échantillon: {partition_path} ({table.num_rows:,} lignes)")
+        
+        dictionary = {"on": [True], "off": [False], "both": [True, False]}[args.dictionary]
+        results = run_benchmark(
+            table, args.codecs, dictionary, args.row_group_sizes, args.page_sizes, args.repeat
+        )
+        
+        print(format_results(results, table.nbytes))
+        
+        if args.apply:
+            best = best_result(results, args.apply)
+            saved = save_parquet_options(args.feed, best["options"])
+            print(f"\n✓ Options enregistrées pour {args.feed} ({args.apply}): {saved}")
+    
+    except Exception as e:
+        logger.error(f"Erreur lors du benchmark: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Lecture des bloom filters Parquet (split block bloom filter, xxHash64)
+pyarrow sait écrire les bloom filters mais pas les interroger: ce module lit le
+bitset d'une colonne d'un row group et teste l'appartenance de valeurs.
+"""
+import struct
+from typing import Any, BinaryIO, Optional
+
+import pyarrow.parquet as pq
+
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+PRIME64_1 = 0x9E3779B185EBCA87
+PRIME64_2 = 0xC2B2AE3D27D4EB4F
+PRIME64_3 = 0x165667B19E3779F9
+PRIME64_4 = 0x85EBCA77C2B2AE63
+PRIME64_5 = 0x27D4EB2F165667C5
+
+# Constantes du split block bloom filter (spécification Parquet)
+SALT = (
+    0x47B6137B, 0x44974D91, 0x8824AD5B, 0xA2B7289D,
+    0x705495C7, 0x2DF1424B, 0x9EFC4947, 0x5C6BFB31
+)
+BLOCK_BYTES = 32
+
+PLAIN_FORMATS = {"INT32": "<i", "INT64": "<q", "FLOAT": "<f", "DOUBLE": "<d"}
+
+
+def _rotl(value: int, bits: int) -> int:
+    return ((value << bits) | (value >> (64 - bits))) & MASK64
+
+
+def _round(acc: int, lane: int) -> int:
+    acc = (acc + lane * PRIME64_2) & MASK64
+    return (_rotl(acc, 31) * PRIME64_1) & MASK64
+
+
+def _merge_round(acc: int, value: int) -> int:
+    acc ^= _round(0, value)
+    return (acc * PRIME64_1 + PRIME64_4) & MASK64
+
+
+def xxh64(data: bytes, seed: int = 0) -> int:
+    """xxHash64 (seed 0 pour les bloom filters Parquet)"""
+    length = len(data)
+    offset = 0
+    
+    if length >= 32:
+        v1 = (seed + PRIME64_1 + PRIME64_2) & MASK64
+        v2 = (seed + PRIME64_2) & MASK64
+        v3 = seed
+        v4 = (seed - PRIME64_1) & MASK64
+        while offset <= length - 32:
+            l1, l2, l3, l4 = struct.unpack_from("<4Q", data, offset)
+            v1, v2, v3, v4 = _round(v1, l1), _round(v2, l2), _round(v3, l3), _round(v4, l4)
+            offset += 32
+        h = (_rotl(v1, 1) + _rotl(v2, 7) + _rotl(v3, 12) + _rotl(v4, 18)) & MASK64
+        for v in (v1, v2, v3, v4):
+            h = _merge_round(h, v)
+    else:
+        h = (seed + PRIME64_5) & MASK64
+    
+    h = (h + length) & MASK64
+    
+    while offset <= length - 8:
+        h ^= _round(0, struct.unpack_from("<Q", data, offset)[0])
+        h = (_rotl(h, 27) * PRIME64_1 + PRIME64_4) & MASK64
+        offset += 8
+    
+    if offset <= length - 4:
+        h ^= (struct.unpack_from("<I", data, offset)[0] * PRIME64_1) & MASK64
+        h = (_rotl(h, 23) * PRIME64_2 + PRIME64_3) & MASK64
+        offset += 4
+    
+    while offset < length:
+        h ^= (data[offset] * PRIME64_5) & MASK64
+        h = (_rotl(h, 11) * PRIME64_1) & MASK64
+        offset += 1
+    
+    h ^= h >> 33
+    h = (h * PRIME64_2) & MASK64
+    h ^= h >> 29
+    h = (h * PRIME64_3) & MASK64
+    h ^= h >> 32
+    return h
+
+
+def plain_encodable(value: Any, physical_type: str) -> bool:
+    """Indique si le type Python d'une valeur est supporté pour le type physique de la colonne"""
+    if physical_type in PLAIN_FORMATS:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if physical_type in ("BYTE_ARRAY", "FIXED_LEN_BYTE_ARRAY"):
+        return isinstance(value, (str, bytes))
+    return False
+
+
+def plain_encode(value: Any, physical_type: str) -> Optional[bytes]:
+    """
+    Encodage PLAIN d'une valeur (ce qui est haché dans le bloom filter)
+    
+    None si la valeur n'est pas supportée (cf. plain_encodable) ou hors de la
+    plage du type physique (ex: entier > 2^31 pour INT32): une telle valeur ne
+    peut pas figurer dans la colonne.
+    """
+    if not plain_encodable(value, physical_type):
+        return None
+    if physical_type in PLAIN_FORMATS:
+        try:
+            return struct.pack(PLAIN_FORMATS[physical_type], value)
+        except (struct.error, OverflowError):
+            return None
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return value
+
+
+def _read_varint(data: bytes, offset: int):
+    result = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, offset
+        shift += 7
+
+
+def read_bitset(source: BinaryIO, column: pq.ColumnChunkMetaData) -> Optional[bytes]:
+    """
+    Lit le bitset du bloom filter d'une colonne de row group
+    
+    Returns:
+        Le bitset, ou None si la colonne n'a pas de bloom filter exploitable
+    """
+    offset = column.bloom_filter_offset
+    length = column.bloom_filter_length
+    if not offset or not length:
+        return None
+    
+    source.seek(offset)
+    data = source.read(length)
+    
+    # En-tête Thrift compact: premier champ = numBytes (i32, zigzag varint)
+    if not data or data[0] != 0x15:
+        return None
+    zigzag, _ = _read_varint(data, 1)
+    num_bytes = (zigzag >> 1) ^ -(zigzag & 1)
+    if num_bytes <= 0 or num_bytes % BLOCK_BYTES or num_bytes > len(data):
+        return None
+    
+    return data[-num_bytes:]
+
+
+def might_contain(bitset: bytes, value_hash: int) -> bool:
+    """Test d'appartenance (faux positifs possibles, jamais de faux négatif)"""
+    num_blocks = len(bitset) // BLOCK_BYTES
+    block = (((value_hash >> 32) * num_blocks) >> 32) * BLOCK_BYTES
+    key = value_hash & 0xFFFFFFFF
+    
+    for i, salt in enumerate(SALT):
+        bit = ((key * salt) & 0xFFFFFFFF) >> 27
+        word = struct.unpack_from("<I", bitset, block + 4 * i)[0]
+        if not word & (1 << bit):
+            return False
+    return True
@@ -6,8 +6,6 @@ import logging
 import sys
 from datetime import datetime, date
 from typing import List, Dict, Any, Optional
-import requests
-import pandas as pd
 import mysql.connector
 from mysql.connector import Error
 
@@ -15,6 +13,7 @@ from data_lake_config import (
     KSQLDB_CONFIG, TABLES_CONFIG,
     LOG_FORMAT, LOG_LEVEL, LOGS_DIR, ensure_directories
 )
+from ksqldb_client import KsqlDBClient
 
 
 # Configuration du logging
@@ -43,49 +42,6 @@ MYSQL_CONFIG = {
 }
 
 
-class KsqlDBClient:
-    """Client pour interagir avec ksqlDB"""
-    
-    def __init__(self, host: str, port: int, timeout: int = 30):
-        self.base_url = f"http://{host}:{port}"
-        self.timeout = timeout
-        logger.info(f"Initialisation du client ksqlDB: {self.base_url}")
-    
-    def get_table_data(self, table_name: str) -> pd.DataFrame:
-        """Récupère les données d'une table ksqlDB"""
-        url = f"{self.base_url}/query"
-        query = f"SELECT * FROM {table_name}"
-        payload = {
-            "ksql": query,
-            "streamsProperties": {}
-        }
-        
-        try:
-            logger.debug(f"Exécution de la requête: {query}")
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=self.timeout,
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
-            
-            # Parser la réponse
-            results = []
-            for line in response.text.strip().split('\n'):
-                if line:
-                    data = json.loads(line)
-                    if 'row' in data:
-                        results.append(data['row']['columns'])
-            
-            logger.info(f"Requête réussie: {len(results)} lignes récupérées")
-            return pd.DataFrame(results) if results else pd.DataFrame()
-        
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération des données: {e}")
-            raise
-
-
 class MySQLWarehouse:
     """Gestionnaire du Data Warehouse MySQL"""
     
@@ -113,8 +69,8 @@ class MySQLWarehouse:
             self.connection.close()
         logger.info("Connexion à MySQL fermée")
     
-    def upsert_user(self, user_data: dict):
-        """Insert ou update un utilisateur dans dim_users"""
+    def upsert_users(self, users: List[dict]):
+        """Insert ou update un lot d'utilisateurs dans dim_users"""
         query = """
         INSERT INTO dim_users (user_id, user_name, user_email, user_country, user_city)
         VALUES (%(user_id)s, %(user_name)s, %(user_email)s, %(user_country)s, %(user_city)s)
@@ -127,7 +83,7 @@ class MySQLWarehouse:
         """
         
         try:
-            self.cursor.execute(query, user_data)
+            self.cursor.executemany(query, users)
             self.connection.commit()
         except Error as e:
             logger.error(f"Erreur lors de l'upsert utilisateur: {e}")
@@ -146,8 +102,8 @@ class MySQLWarehouse:
             logger.error(f"Erreur lors de la récupération de la méthode de paiement: {e}")
             return None
     
-    def insert_user_transaction_summary(self, data: dict):
-        """Insère un résumé de transactions utilisateur"""
+    def insert_user_transaction_summary(self, rows: List[dict]):
+        """Insère un lot de résumés de transactions utilisateur"""
         query = """
         INSERT INTO fact_user_transaction_summary (
             user_id, transaction_type, total_amount, transaction_count,
@@ -169,15 +125,15 @@ class MySQLWarehouse:
         """
         
         try:
-            self.cursor.execute(query, data)
+            self.cursor.executemany(query, rows)
             self.connection.commit()
         except Error as e:
             logger.error(f"Erreur lors de l'insertion du résumé: {e}")
             self.connection.rollback()
             raise
     
-    def insert_user_transaction_summary_eur(self, data: dict):
-        """Insère un résumé de transactions en EUR"""
+    def insert_user_transaction_summary_eur(self, rows: List[dict]):
+        """Insère un lot de résumés de transactions en EUR"""
         query = """
         INSERT INTO fact_user_transaction_summary_eur (
             user_id, transaction_type, total_amount_eur, transaction_count,
@@ -195,15 +151,15 @@ class MySQLWarehouse:
         """
         
         try:
-            self.cursor.execute(query, data)
+            self.cursor.executemany(query, rows)
             self.connection.commit()
         except Error as e:
             logger.error(f"Erreur lors de l'insertion du résumé EUR: {e}")
             self.connection.rollback()
             raise
     
-    def insert_payment_method_totals(self, data: dict):
-        """Insère les totaux par méthode de paiement"""
+    def insert_payment_method_totals(self, rows: List[dict]):
+        """Insère un lot de totaux par méthode de paiement"""
         query = """
         INSERT INTO fact_payment_method_totals (
             payment_method_id, payment_method_name, total_amount,
@@ -220,15 +176,15 @@ class MySQLWarehouse:
         """
         
         try:
-            self.cursor.execute(query, data)
+            self.cursor.executemany(query, rows)
             self.connection.commit()
         except Error as e:
             logger.error(f"Erreur lors de l'insertion des totaux paiement: {e}")
             self.connection.rollback()
             raise
     
-    def insert_product_purchase_counts(self, data: dict):
-        """Insère les compteurs d'achats par produit"""
+    def insert_product_purchase_counts(self, rows: List[dict]):
+        """Insère un lot de compteurs d'achats par produit"""
         query = """
         INSERT INTO fact_product_purchase_counts (
             product_id, product_name, product_category, purchase_count,
@@ -246,7 +202,7 @@ class MySQLWarehouse:
         """
         
         try:
-            self.cursor.execute(query, data)
+            self.cursor.executemany(query, rows)
             self.connection.commit()
         except Error as e:
             logger.error(f"Erreur lors de l'insertion des compteurs produit: {e}")
@@ -304,134 +260,159 @@ class DataWarehouseSyncer:
         """Synchronise user_transaction_summary"""
         logger.info("Synchronisation de user_transaction_summary")
         
-        # Récupérer les données de ksqlDB
-        df = self.ksqldb.get_table_data("user_transaction_summary")
+        total_rows = 0
         
-        if df.empty:
+        # Récupérer les données de ksqlDB et charger chaque batch dès sa réception
+        for batch in self.ksqldb.iter_table_data("user_transaction_summary"):
+            users = []
+            summaries = []
+            
+            for row in batch.to_pylist():
+                # Utilisateur pour dim_users
+                users.append({
+                    "user_id": row.get("user_id"),
+                    "user_name": row.get("user_name"),
+                    "user_email": row.get("user_email"),
+                    "user_country": row.get("user_country"),
+                    "user_city": row.get("user_city")
+                })
+                
+                # Résumé
+                summaries.append({
+                    "user_id": row.get("user_id"),
+                    "transaction_type": row.get("transaction_type"),
+                    "total_amount": row.get("total_amount"),
+                    "transaction_count": row.get("transaction_count"),
+                    "avg_amount": row.get("avg_amount"),
+                    "min_amount": row.get("min_amount"),
+                    "max_amount": row.get("max_amount"),
+                    "last_transaction_date": row.get("last_transaction_date"),
+                    "snapshot_date": self.snapshot_date,
+                    "snapshot_version": self.snapshot_version
+                })
+            
+            self.mysql.upsert_users(users)
+            self.mysql.insert_user_transaction_summary(summaries)
+            total_rows += batch.num_rows
+        
+        if total_rows == 0:
             logger.warning("Aucune donnée à synchroniser")
             return
         
-        # Insérer chaque ligne
-        for _, row in df.iterrows():
-            # Upsert utilisateur dans dim_users
-            user_data = {
-                "user_id": row.get("user_id"),
-                "user_name": row.get("user_name"),
-                "user_email": row.get("user_email"),
-                "user_country": row.get("user_country"),
-                "user_city": row.get("user_city")
-            }
-            self.mysql.upsert_user(user_data)
-            
-            # Insérer le résumé
-            summary_data = {
-                "user_id": row.get("user_id"),
-                "transaction_type": row.get("transaction_type"),
-                "total_amount": row.get("total_amount"),
-                "transaction_count": row.get("transaction_count"),
-                "avg_amount": row.get("avg_amount"),
-                "min_amount": row.get("min_amount"),
-                "max_amount": row.get("max_amount"),
-                "last_transaction_date": row.get("last_transaction_date"),
-                "snapshot_date": self.snapshot_date,
-                "snapshot_version": self.snapshot_version
-            }
-            self.mysql.insert_user_transaction_summary(summary_data)
-        
-        logger.info(f"✓ {len(df)} lignes synchronisées")
+        logger.info(f"✓ {total_rows} lignes synchronisées")
     
     def sync_user_transaction_summary_eur(self):
         """Synchronise user_transaction_summary_eur"""
         logger.info("Synchronisation de user_transaction_summary_eur")
         
-        df = self.ksqldb.get_table_data("user_transaction_summary_eur")
+        total_rows = 0
+        
+        for batch in self.ksqldb.iter_table_data("user_transaction_summary_eur"):
+            users = []
+            summaries = []
+            
+            for row in batch.to_pylist():
+                # Utilisateur
+                users.append({
+                    "user_id": row.get("user_id"),
+                    "user_name": row.get("user_name"),
+                    "user_email": row.get("user_email"),
+                    "user_country": row.get("user_country"),
+                    "user_city": row.get("user_city")
+                })
+                
+                # Résumé EUR
+                summaries.append({
+                    "user_id": row.get("user_id"),
+                    "transaction_type": row.get("transaction_type"),
+                    "total_amount_eur": row.get("total_amount_eur"),
+                    "transaction_count": row.get("transaction_count"),
+                    "avg_amount_eur": row.get("avg_amount_eur"),
+                    "exchange_rate": row.get("exchange_rate", 1.0),
+                    "snapshot_date": self.snapshot_date,
+                    "snapshot_version": self.snapshot_version
+                })
+            
+            self.mysql.upsert_users(users)
+            self.mysql.insert_user_transaction_summary_eur(summaries)
+            total_rows += batch.num_rows
         
-        if df.empty:
+        if total_rows == 0:
             logger.warning("Aucune donnée à synchroniser")
             return
         
-        for _, row in df.iterrows():
-            # Upsert utilisateur
-            user_data = {
-                "user_id": row.get("user_id"),
-                "user_name": row.get("user_name"),
-                "user_email": row.get("user_email"),
-                "user_country": row.get("user_country"),
-                "user_city": row.get("user_city")
-            }
-            self.mysql.upsert_user(user_data)
-            
-            # Insérer le résumé EUR
-            summary_data = {
-                "user_id": row.get("user_id"),
-                "transaction_type": row.get("transaction_type"),
-                "total_amount_eur": row.get("total_amount_eur"),
-                "transaction_count": row.get("transaction_count"),
-                "avg_amount_eur": row.get("avg_amount_eur"),
-                "exchange_rate": row.get("exchange_rate", 1.0),
-                "snapshot_date": self.snapshot_date,
-                "snapshot_version": self.snapshot_version
-            }
-            self.mysql.insert_user_transaction_summary_eur(summary_data)
-        
-        logger.info(f"✓ {len(df)} lignes synchronisées")
+        logger.info(f"✓ {total_rows} lignes synchronisées")
     
     def sync_payment_method_totals(self):
         """Synchronise payment_method_totals"""
         logger.info("Synchronisation de payment_method_totals")
         
-        df = self.ksqldb.get_table_data("payment_method_totals")
+        total_rows = 0
+        payment_method_ids = {}
         
-        if df.empty:
-            logger.warning("Aucune donnée à synchroniser")
-            return
-        
-        for _, row in df.iterrows():
-            payment_method_name = row.get("payment_method")
-            payment_method_id = self.mysql.get_payment_method_id(payment_method_name)
+        for batch in self.ksqldb.iter_table_data("payment_method_totals"):
+            totals = []
             
-            if not payment_method_id:
-                logger.warning(f"Méthode de paiement inconnue: {payment_method_name}")
-                continue
+            for row in batch.to_pylist():
+                payment_method_name = row.get("payment_method")
+                if payment_method_name not in payment_method_ids:
+                    payment_method_ids[payment_method_name] = self.mysql.get_payment_method_id(payment_method_name)
+                payment_method_id = payment_method_ids[payment_method_name]
+                
+                if not payment_method_id:
+                    logger.warning(f"Méthode de paiement inconnue: {payment_method_name}")
+                    continue
+                
+                totals.append({
+                    "payment_method_id": payment_method_id,
+                    "payment_method_name": payment_method_name,
+                    "total_amount": row.get("total_amount"),
+                    "transaction_count": row.get("transaction_count"),
+                    "avg_amount": row.get("avg_amount"),
+                    "snapshot_date": self.snapshot_date,
+                    "snapshot_version": self.snapshot_version
+                })
             
-            totals_data = {
-                "payment_method_id": payment_method_id,
-                "payment_method_name": payment_method_name,
-                "total_amount": row.get("total_amount"),
-                "transaction_count": row.get("transaction_count"),
-                "avg_amount": row.get("avg_amount"),
-                "snapshot_date": self.snapshot_date,
-                "snapshot_version": self.snapshot_version
-            }
-            self.mysql.insert_payment_method_totals(totals_data)
+            if totals:
+                self.mysql.insert_payment_method_totals(totals)
+            total_rows += batch.num_rows
+        
+        if total_rows == 0:
+            logger.warning("Aucune donnée à synchroniser")
+            return
         
-        logger.info(f"✓ {len(df)} lignes synchronisées")
+        logger.info(f"✓ {total_rows} lignes synchronisées")
     
     def sync_product_purchase_counts(self):
         """Synchronise product_purchase_counts"""
         logger.info("Synchronisation de product_purchase_counts")
         
-        df = self.ksqldb.get_table_data("product_purchase_counts")
+        total_rows = 0
+        
+        for batch in self.ksqldb.iter_table_data("product_purchase_counts"):
+            products = [
+                {
+                    "product_id": row.get("product_id"),
+                    "product_name": row.get("product_name"),
+                    "product_category": row.get("product_category"),
+                    "purchase_count": row.get("purchase_count"),
+                    "total_revenue": row.get("total_revenue"),
+                    "avg_price": row.get("avg_price"),
+                    "unique_buyers": row.get("unique_buyers"),
+                    "snapshot_date": self.snapshot_date,
+                    "snapshot_version": self.snapshot_version
+                }
+                for row in batch.to_pylist()
+            ]
+            
+            self.mysql.insert_product_purchase_counts(products)
+            total_rows += batch.num_rows
         
-        if df.empty:
+        if total_rows == 0:
             logger.warning("Aucune donnée à synchroniser")
             return
         
-        for _, row in df.iterrows():
-            product_data = {
-                "product_id": row.get("product_id"),
-                "product_name": row.get("product_name"),
-                "product_category": row.get("product_category"),
-                "purchase_count": row.get("purchase_count"),
-                "total_revenue": row.get("total_revenue"),
-                "avg_price": row.get("avg_price"),
-                "unique_buyers": row.get("unique_buyers"),
-                "snapshot_date": self.snapshot_date,
-                "snapshot_version": self.snapshot_version
-            }
-            self.mysql.insert_product_purchase_counts(product_data)
-        
-        logger.info(f"✓ {len(df)} lignes synchronisées")
+        logger.info(f"✓ {total_rows} lignes synchronisées")
 
 
 def main():
@@ -472,11 +453,7 @@ def main():
     
     # Initialiser les clients
     try:
-        ksqldb_client = KsqlDBClient(
-            KSQLDB_CONFIG['host'],
-            KSQLDB_CONFIG['port'],
-            KSQLDB_CONFIG['timeout']
-        )
+        ksqldb_client = KsqlDBClient.from_config(KSQLDB_CONFIG)
         
         mysql_warehouse = MySQLWarehouse(MYSQL_CONFIG)
         
@@ -0,0 +1,61 @@
+"""
+Tests des options Parquet par feed (défauts, JSON du feed, arguments d'écriture)
+"""
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_lake_config import (
+    DEFAULT_PARQUET_OPTIONS, get_feed_file, get_parquet_options, parquet_writer_kwargs,
+    save_parquet_options
+)
+
+
+FEED = "transaction_stream"
+
+
+@pytest.fixture
+def feed_file(lake):
+    feed_file = get_feed_file(FEED)
+    feed_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(feed_file, "w") as f:
+        json.dump({"name": FEED, "parquet": {"compression": "zstd"}}, f)
+    return feed_file
+
+
+def test_feed_options_override_defaults(feed_file):
+    assert get_parquet_options("unknown_feed") == DEFAULT_PARQUET_OPTIONS
+    
+    options = get_parquet_options(FEED)
+    assert options["compression"] == "zstd"
+    assert options["use_dictionary"] == DEFAULT_PARQUET_OPTIONS["use_dictionary"]
+
+
+def test_save_merges_known_options(feed_file):
+    assert save_parquet_options(FEED, {"compression_level": 9, "data_page_size": 65536}) == {
+        "compression": "zstd", "compression_level": 9, "data_page_size": 65536
+    }
+    with open(feed_file) as f:
+        assert json.load(f)["name"] == FEED
+    
+    with pytest.raises(ValueError, match="inconnues: codec"):
+        save_parquet_options(FEED, {"codec": "zstd"})
+    with pytest.raises(ValueError, match="Feed inconnu"):
+        save_parquet_options("unknown_feed", {"compression": "lz4"})
+
+
+def test_writer_kwargs_apply_the_feed_codec(feed_file, tmp_path):
+    save_parquet_options(FEED, {"compression_level": 3, "use_dictionary": ["currency"]})
+    kwargs = parquet_writer_kwargs(get_parquet_options(FEED))
+    assert kwargs == {
+        "compression": "zstd", "compression_level": 3, "use_dictionary": ["currency"], "write_statistics": True
+    }
+    
+    file_path = tmp_path / "data.parquet"
+    pq.write_table(pa.table({"currency": ["EUR"] * 10, "amount": [1.0] * 10}), file_path, **kwargs)
+    row_group = pq.ParquetFile(file_path).metadata.row_group(0)
+    assert row_group.column(0).compression == "ZSTD"
+    assert "RLE_DICTIONARY" in row_group.column(0).encodings
+    assert "RLE_DICTIONARY" not in row_group.column(1).encodings
@@ -0,0 +1,241 @@
+"""
+Tests de la rétention des streams et des tables (le serveur MySQL n'est
+utilisé que pour les politiques et le journal des suppressions)
+"""
+from datetime import date, datetime
+
+import json
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import data_retention_manager
+from data_lake_config import (
+    get_date_partition_path, get_feed_file, get_stream_path, get_table_path, get_version_partition_path
+)
+from data_retention_manager import DataRetentionManager
+from lake_catalog import get_catalog
+from lake_metadata import read_metadata, record_file_written
+from lake_trash import list_trash
+
+
+STREAM = "transaction_stream"
+# Jours du stream: avec une rétention de 12 jours au 15/10/2026, le cutoff
+# est le 03/10/2026 (2025 entière, septembre, puis les 1er et 2 octobre expirés)
+DAYS = [(2025, 12, 31), (2026, 9, 10), (2026, 9, 20), (2026, 10, 1), (2026, 10, 2), (2026, 10, 3), (2026, 10, 14)]
+
+
+class FrozenDateTime(datetime):
+    """datetime dont now() est fixé au 15/10/2026 à midi"""
+    
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 10, 15, 12, 0)
+
+
+@pytest.fixture
+def frozen_now(lake, monkeypatch):
+    monkeypatch.setattr(data_retention_manager, "datetime", FrozenDateTime)
+
+
+class FakeCursor:
+    """Curseur MySQL simulé: politiques renvoyées par fetchall, requêtes enregistrées"""
+    
+    def __init__(self, policies):
+        self.policies = policies
+        self.queries = []
+    
+    def execute(self, query, params=None):
+        self.queries.append((" ".join(query.split()), params))
+    
+    def fetchall(self):
+        return self.policies
+    
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.commits = 0
+    
+    def commit(self):
+        self.commits += 1
+    
+    def rollback(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+def write_stream_file(base_path, partition_path, name: str, table: pa.Table, register: bool = True):
+    """Écrit un fichier Parquet de stream, enregistré dans les métadonnées sauf register=False"""
+    partition_path.mkdir(parents=True, exist_ok=True)
+    file_path = partition_path / name
+    pq.write_table(table, file_path)
+    if register:
+        record_file_written(
+            base_path, base_path.name, "stream", "append", "date",
+            partition_path, file_path, table.num_rows, file_path.stat().st_size
+        )
+    return file_path
+
+
+def write_days(base_path, register: bool = True):
+    for year, month, day in DAYS:
+        write_stream_file(
+            base_path, get_date_partition_path(base_path, year, month, day), "data.parquet",
+            pa.table({"amount": [float(day)] * day}), register
+        )
+
+
+def trashed_paths():
+    return sorted(entry["original_path"] for entry in list_trash())
+
+
+EXPIRED = [
+    f"streams/{STREAM}/year=2025",
+    f"streams/{STREAM}/year=2026/month=09",
+    f"streams/{STREAM}/year=2026/month=10/day=01",
+    f"streams/{STREAM}/year=2026/month=10/day=02",
+]
+
+
+def test_expired_years_and_months_are_trashed_as_whole_subtrees(frozen_now):
+    stream = get_stream_path(STREAM)
+    write_days(stream)
+    
+    files, size_mb = DataRetentionManager({}).cleanup_stream_data(STREAM, 12)
+    
+    assert files == 5 and size_mb > 0
+    assert trashed_paths() == EXPIRED
+    assert [p["path"] for p in read_metadata(stream)["partitions"]] == [
+        "year=2026/month=10/day=03", "year=2026/month=10/day=14"
+    ]
+    assert read_metadata(stream)["total_records"] == 3 + 14
+    assert [p["day"] for p in get_catalog().list_partitions(stream)] == [3, 14]
+
+
+def test_uncataloged_stream_is_pruned_from_the_directory_tree(frozen_now):
+    stream = get_stream_path(STREAM)
+    write_days(stream, register=False)
+    manager = DataRetentionManager({})
+    
+    assert [str(p.relative_to(stream.parent.parent)) for p in manager._expired_subtrees_from_disk(
+        stream, date(2026, 10, 3)
+    )] == EXPIRED
+    
+    files, _ = manager.cleanup_stream_data(STREAM, 12)
+    
+    assert files == 5
+    assert trashed_paths() == EXPIRED
+    assert sorted(p.name for p in (stream / "year=2026" / "month=10").iterdir()) == ["day=03", "day=14"]
+
+
+def test_dry_run_only_reports(frozen_now):
+    stream = get_stream_path(STREAM)
+    write_days(stream)
+    
+    assert DataRetentionManager({}, dry_run=True).cleanup_stream_data(STREAM, 12)[0] == 5
+    
+    assert not list_trash()
+    assert len(read_metadata(stream)["partitions"]) == len(DAYS)
+
+
+def test_run_cleanup_isolates_failures_and_logs_in_one_insert(frozen_now, monkeypatch):
+    write_days(get_stream_path(STREAM))
+    write_days(get_stream_path("click_stream"))
+    write_days(get_stream_path("broken_stream"))
+    table = get_table_path("user_transaction_summary")
+    for version in (1, 2, 3):
+        partition_path = get_version_partition_path(table, version)
+        partition_path.mkdir(parents=True)
+        pq.write_table(pa.table({"total": [float(version)]}), partition_path / "snapshot.parquet")
+    
+    policies = [
+        {"policy_id": 1, "feed_name": STREAM, "feed_type": "stream", "retention_days": 12, "retention_versions": None},
+        {"policy_id": 2, "feed_name": "click_stream", "feed_type": "stream", "retention_days": 12, "retention_versions": None},
+        # Politique invalide: son échec n'interrompt pas les autres feeds
+        {"policy_id": 3, "feed_name": "broken_stream", "feed_type": "stream", "retention_days": None, "retention_versions": None},
+        {"policy_id": 4, "feed_name": "user_transaction_summary", "feed_type": "table", "retention_days": None, "retention_versions": 1},
+        # Rien à supprimer: pas de ligne dans le journal
+        {"policy_id": 5, "feed_name": "missing_stream", "feed_type": "stream", "retention_days": 12, "retention_versions": None},
+    ]
+    manager = DataRetentionManager({}, workers=4)
+    cursor, connection = FakeCursor(policies), FakeConnection()
+    
+    def connect_mysql():
+        manager.mysql_cursor, manager.mysql_connection = cursor, connection
+    
+    monkeypatch.setattr(manager, "connect_mysql", connect_mysql)
+    
+    manager.run_cleanup()
+    
+    assert len(list_trash()) == 2 * len(EXPIRED) + 2
+    assert len(read_metadata(get_stream_path("broken_stream"))["partitions"]) == len(DAYS)
+    assert sorted(p.name for p in table.iterdir() if p.is_dir()) == ["version=v3"]
+    
+    inserts = [params for query, params in cursor.queries if query.startswith("INSERT INTO data_deletion_log")]
+    updates = [params for query, params in cursor.queries if query.startswith("UPDATE data_retention_policies")]
+    assert len(inserts) == 1 and len(updates) == 1
+    # 6 valeurs par suppression, triées par (type, feed)
+    assert [inserts[0][i:i + 6][0] for i in range(0, len(inserts[0]), 6)] == [
+        "click_stream", STREAM, "user_transaction_summary"
+    ]
+    assert [inserts[0][i + 3] for i in range(0, len(inserts[0]), 6)] == [5, 5, 2]
+    assert updates[0] == [2, 1, 4]
+    assert connection.commits == 1
+
+
+def events(*times) -> pa.Table:
+    return pa.table({"event_time": pa.array(list(times), type=pa.timestamp("ms")), "amount": [1.0] * len(times)})
+
+
+def test_row_retention_rewrites_only_straddling_files(frozen_now, monkeypatch):
+    stream = get_stream_path(STREAM)
+    feed_file = get_feed_file(STREAM)
+    feed_file.parent.mkdir(parents=True)
+    feed_file.write_text(json.dumps({"retention": {"mode": "row", "time_column": "event_time"}}))
+    day1, day2, day3 = (get_date_partition_path(stream, 2026, 10, day) for day in (1, 2, 3))
+    write_stream_file(stream, day1, "data.parquet", events(datetime(2026, 10, 1, 8), datetime(2026, 10, 1, 9)))
+    expired = write_stream_file(stream, day2, "data_1.parquet", events(datetime(2026, 10, 2, 8)))
+    # Flush tardif: lignes du 4 rangées dans la partition du 2
+    late = write_stream_file(stream, day2, "data_2.parquet", events(datetime(2026, 10, 4, 1)))
+    straddling = write_stream_file(stream, day3, "data.parquet", events(
+        datetime(2026, 10, 3, 8), datetime(2026, 10, 3, 11), datetime(2026, 10, 3, 13), None
+    ))
+    
+    read = []
+    dataset = ds.dataset
+    
+    def recording_dataset(source, **kwargs):
+        read.append(source)
+        return dataset(source, **kwargs)
+    
+    monkeypatch.setattr(ds, "dataset", recording_dataset)
+    policy = {"policy_id": 1, "feed_name": STREAM, "feed_type": "stream", "retention_days": 12, "retention_versions": None}
+    
+    result = DataRetentionManager({}).cleanup_policy(policy)
+    
+    # Fichiers expirés mis à la corbeille sans être lus; seul le fichier à cheval est filtré
+    assert read == [straddling]
+    assert result["files"] == 3
+    assert not day1.exists() and not expired.exists() and late.exists()
+    assert sorted((e["reason"], e["original_path"].split("/", 2)[-1]) for e in list_trash()) == [
+        ("retention", "year=2026/month=10/day=01"),
+        ("retention", "year=2026/month=10/day=02/data_1.parquet"),
+        ("retention_rewrite", "year=2026/month=10/day=03/data.parquet"),
+    ]
+    
+    [rewritten] = day3.glob("*.parquet")
+    assert rewritten.name == "data_r20261015_120000.parquet"
+    assert pq.read_table(rewritten).column("event_time").to_pylist() == [datetime(2026, 10, 3, 13), None]
+    assert read_metadata(stream)["total_records"] == 3
+    assert sorted(f["file_name"] for f in get_catalog().list_files(stream)) == [
+        "data_2.parquet", "data_r20261015_120000.parquet"
+    ]
@@ -0,0 +1,233 @@
+"""
+Tests de l'export ksqlDB -> Data Lake (DataLakeExporter) contre un ksqlDB simulé
+"""
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_lake_config import STREAMS_CONFIG, TABLES_CONFIG, get_feed_file, get_stream_path, get_table_path
+from export_to_data_lake import DataLakeExporter, export_all, hold_back
+from lake_bucketing import candidate_buckets
+from ksqldb_client import KsqlQueryError
+from lake_catalog import get_catalog
+from lake_metadata import read_metadata
+from lake_reader import LakeReader
+from lake_writer import TMP_DIR
+
+
+TABLE = "user_transaction_summary"
+
+
+@pytest.fixture
+def exporter(lake, ksqldb) -> DataLakeExporter:
+    ksqldb.columns = {"USER_ID": "STRING", "TOTAL": "DOUBLE"}
+    return DataLakeExporter(ksqldb.client)
+
+
+def test_table_export_aborted_by_ksqldb_error_publishes_nothing(exporter, ksqldb):
+    ksqldb.rows = [(0, [f"u{i}", float(i)]) for i in range(10)]
+    ksqldb.error_after = 4
+    
+    with pytest.raises(KsqlQueryError):
+        exporter.export_table(TABLE, TABLES_CONFIG[TABLE])
+    
+    base_path = get_table_path(TABLE)
+    assert not list(base_path.rglob("*.parquet"))
+    assert get_catalog().latest_version(base_path) is None
+    
+    # Snapshot complet au run suivant: la version 1 est publiée
+    ksqldb.error_after = None
+    stats = exporter.export_table(TABLE, TABLES_CONFIG[TABLE])
+    assert stats["records"] == 10
+    assert get_catalog().latest_version(base_path) == 1
+
+
+def test_unchanged_table_snapshot_is_not_published(exporter, ksqldb):
+    ksqldb.rows = [(0, [f"u{i}", float(i)]) for i in range(10)]
+    base_path = get_table_path(TABLE)
+    assert exporter.export_table(TABLE, TABLES_CONFIG[TABLE])["records"] == 10
+    
+    # Même contenu: ni nouvelle version, ni dossier de version, ni fichier temporaire
+    assert exporter.export_table(TABLE, TABLES_CONFIG[TABLE]) is None
+    assert get_catalog().latest_version(base_path) == 1
+    assert [p.name for p in base_path.glob("version=v*")] == ["version=v1"]
+    assert not list((base_path / TMP_DIR).iterdir())
+    
+    # Contenu modifié: nouvelle version
+    ksqldb.rows[3] = (0, ["u3", 99.0])
+    assert exporter.export_table(TABLE, TABLES_CONFIG[TABLE])["records"] == 10
+    assert get_catalog().latest_version(base_path) == 2
+
+
+STREAM = "transaction_stream"
+
+
+def epoch_ms(value: datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def read_watermark(stream_name: str) -> dict:
+    with open(get_stream_path(stream_name) / "_watermark.json") as f:
+        return json.load(f)
+
+
+def test_incremental_stream_export_end_to_end(exporter, ksqldb):
+    ksqldb.columns = {"USER_ID": "STRING", "AMOUNT": "DOUBLE"}
+    config = dict(STREAMS_CONFIG[STREAM], safety_lag_seconds=300)
+    recent = epoch_ms(datetime.now()) - 60 * 1000
+    ksqldb.rows = [
+        (epoch_ms(datetime(2026, 10, 17, 23, 50)), ["u1", 10.0]),
+        (epoch_ms(datetime(2026, 10, 18, 0, 5)), ["u2", 20.0]),
+        # Dans la marge de sécurité: retenue, relue au run suivant
+        (recent, ["u3", 30.0])
+    ]
+    
+    stats = exporter.export_stream(STREAM, config, incremental=True)
+    
+    base_path = get_stream_path(STREAM)
+    assert stats["records"] == 2
+    assert ksqldb.queries[-1].startswith("SELECT ROWTIME, * FROM transaction_stream")
+    
+    # Chaque ligne dans la partition du jour de son ROWTIME, sans la colonne rowtime
+    day17 = pq.read_table(next((base_path / "year=2026" / "month=10" / "day=17").glob("*.parquet")))
+    day18 = pq.read_table(next((base_path / "year=2026" / "month=10" / "day=18").glob("*.parquet")))
+    assert day17.to_pydict() == {"user_id": ["u1"], "amount": [10.0]}
+    assert day18.to_pydict() == {"user_id": ["u2"], "amount": [20.0]}
+    
+    watermark = read_watermark(STREAM)
+    assert ksqldb.rows[1][0] <= watermark["rowtime"] < recent
+    assert watermark["max_rowtime_received"] == recent
+    assert "pending" not in watermark
+    assert get_catalog().feed_totals(base_path)["records"] == 2
+    
+    # Run suivant: lecture depuis le watermark, la ligne retenue est exportée
+    # une fois la marge écoulée (stream inactif)
+    stats = exporter.export_stream(STREAM, dict(config, safety_lag_seconds=30), incremental=True)
+    
+    assert f"ROWTIME > {watermark['rowtime']}" in ksqldb.queries[-1]
+    assert stats["records"] == 1
+    assert read_watermark(STREAM)["rowtime"] == recent
+    assert get_catalog().feed_totals(base_path)["records"] == 3
+    
+    # Plus rien de nouveau
+    assert exporter.export_stream(STREAM, config, incremental=True) is None
+    assert f"ROWTIME > {recent}" in ksqldb.queries[-1]
+
+
+def test_hold_back_releases_rows_older_than_the_safety_lag():
+    state = {}
+    batches = [
+        pa.RecordBatch.from_pydict({"rowtime": [1000, 9000], "v": [1, 2]}),
+        pa.RecordBatch.from_pydict({"rowtime": [2000, 12000], "v": [3, 4]})
+    ]
+    
+    released = pa.Table.from_batches(list(hold_back(batches, 5000, state)))
+    
+    assert sorted(released.column("v").to_pylist()) == [1, 3]
+    assert state == {"max_rowtime": 12000, "until": 7000}
+
+
+def test_hold_back_flushes_an_idle_window():
+    state = {}
+    batches = [pa.RecordBatch.from_pydict({"rowtime": [1000, 9000], "v": [1, 2]})]
+    
+    released = pa.Table.from_batches(list(hold_back(batches, 5000, state, idle_before=20000)))
+    
+    assert released.column("v").to_pylist() == [1, 2]
+    assert state["until"] == 9000
+
+
+def set_parquet_options(feed_name: str, **options):
+    """Écrit les options Parquet du feed dans son JSON (feeds/active)"""
+    feed_file = get_feed_file(feed_name)
+    feed_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(feed_file, "w") as f:
+        json.dump({"parquet": options}, f)
+
+
+@pytest.mark.parametrize("row_group_size, row_groups", [(None, 1), (5000, 4)])
+def test_incremental_files_get_full_row_groups(exporter, ksqldb, row_group_size, row_groups):
+    if row_group_size:
+        set_parquet_options(STREAM, row_group_size=row_group_size)
+    ksqldb.columns = {"USER_ID": "STRING", "AMOUNT": "DOUBLE"}
+    start = epoch_ms(datetime(2026, 10, 18, 8))
+    ksqldb.rows = [(start + i, [f"u{i % 50}", float(i)]) for i in range(18_300)]
+    
+    # 18 300 lignes reçues en deux batches de BATCH_SIZE
+    exporter.export_stream(STREAM, dict(STREAMS_CONFIG[STREAM]), incremental=True)
+    
+    (file_path,) = get_stream_path(STREAM).rglob("*.parquet")
+    metadata = pq.ParquetFile(file_path).metadata
+    assert metadata.num_rows == 18_300
+    assert metadata.num_row_groups == row_groups
+
+
+def test_streamed_export_logs_encoding_throughput(exporter, ksqldb, caplog):
+    ksqldb.columns = {"USER_ID": "STRING", "AMOUNT": "DOUBLE"}
+    ksqldb.rows = [(0, [f"u{i}", float(i)]) for i in range(100)]
+    
+    with caplog.at_level(logging.INFO, logger="export_to_data_lake"):
+        exporter.export_stream(STREAM, dict(STREAMS_CONFIG[STREAM]))
+    
+    assert any("MB/s" in message and "1 row group(s)" in message for message in caplog.messages)
+
+
+def test_bucketed_stream_export_is_pruned_by_key(exporter, ksqldb):
+    feed_file = get_feed_file(STREAM)
+    feed_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(feed_file, "w") as f:
+        json.dump({"partitioning": {"bucket_by": "user_id", "num_buckets": 4}}, f)
+    ksqldb.columns = {"USER_ID": "STRING", "AMOUNT": "DOUBLE"}
+    start = epoch_ms(datetime(2026, 10, 18, 8))
+    ksqldb.rows = [(start + i, [f"u{i % 10}", float(i)]) for i in range(100)]
+    
+    assert exporter.export_stream(STREAM, dict(STREAMS_CONFIG[STREAM]), incremental=True)["records"] == 100
+    
+    base_path = get_stream_path(STREAM)
+    bucket_dirs = sorted({f.parent.name for f in base_path.rglob("*.parquet")})
+    assert bucket_dirs and all(name.startswith("bucket=") for name in bucket_dirs)
+    partitions = read_metadata(base_path)["partitions"]
+    assert all(p["bucketing"] == {"column": "user_id", "num_buckets": 4} for p in partitions)
+    
+    # Recherche par clé: seul le bucket de u3 est lu
+    (bucket,) = candidate_buckets(["u3"], 4)
+    dataset, _ = LakeReader().dataset(STREAM, filters=[("user_id", "==", "u3")])
+    assert {Path(f).parent.name for f in dataset.files} == {f"bucket={bucket:02d}"}
+    result = LakeReader().read_table(STREAM, filters=[("user_id", "==", "u3")])
+    assert result.column("amount").to_pylist() == [float(i) for i in range(3, 100, 10)]
+
+
+class BarrierExporter:
+    """Exporteur simulé: chaque feed attend que tous les autres aient démarré"""
+    
+    def __init__(self, feeds: int):
+        self.barrier = threading.Barrier(feeds, timeout=5)
+    
+    def export_stream(self, stream_name, config, export_date=None, incremental=False):
+        self.barrier.wait()
+        return {"records": 10, "bytes": 100}
+    
+    def export_table(self, table_name, config, version=None):
+        self.barrier.wait()
+        if table_name == TABLE:
+            raise RuntimeError("ksqlDB indisponible")
+        return None
+
+
+def test_export_all_runs_feeds_concurrently_and_isolates_failures():
+    feeds = len(STREAMS_CONFIG) + len(TABLES_CONFIG)
+    
+    # Avec des exports séquentiels, la barrière expirerait
+    results = export_all(BarrierExporter(feeds), workers=feeds)
+    
+    assert [r["name"] for r in results] == list(STREAMS_CONFIG) + list(TABLES_CONFIG)
+    by_name = {r["name"]: r for r in results}
+    assert by_name[TABLE]["status"] == "failed" and by_name[TABLE]["error"] == "ksqlDB indisponible"
+    assert all(by_name[name]["status"] == "ok" and by_name[name]["records"] == 10 for name in STREAMS_CONFIG)
+    assert all(by_name[name]["status"] == "skipped" for name in TABLES_CONFIG if name != TABLE)
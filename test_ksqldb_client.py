@@ -0,0 +1,112 @@
+"""
+Tests du client ksqlDB: pool de connexions, lecture en flux des réponses
+/query et /query-stream, types Arrow du header
+"""
+import json
+from datetime import date, time
+from decimal import Decimal
+
+import pyarrow as pa
+import pytest
+
+from ksqldb_client import (
+    KsqlDBClient, KsqlQueryError, RETRY_STATUS_CODES, build_record_batch, iter_query_stream_batches, iter_response_batches,
+    ksql_schema_to_arrow
+)
+
+
+HEADER = '[{"header":{"queryId":"q1","schema":"`USER_ID` STRING, `AMOUNT` DOUBLE"}},'
+
+
+def test_response_batches_are_streamed_by_batch_size():
+    lines = [HEADER] + [
+        json.dumps({"row": {"columns": [f"u{i}", float(i)]}}) + "," for i in range(5)
+    ] + ['{"finalMessage":"Query Completed"}]']
+    
+    batches = list(iter_response_batches(iter(lines), batch_size=2))
+    
+    assert [batch.num_rows for batch in batches] == [2, 2, 1]
+    assert batches[0].schema.names == ["user_id", "amount"]
+    assert batches[2].column(0).to_pylist() == ["u4"]
+
+
+def test_error_message_aborts_the_response():
+    lines = [
+        HEADER,
+        '{"row":{"columns":["u1",1.0]}},',
+        '{"errorMessage":{"@type":"generic_error","error_code":50000,"message":"Query terminated"}}]'
+    ]
+    
+    with pytest.raises(KsqlQueryError, match="Query terminated"):
+        list(iter_response_batches(iter(lines), batch_size=1))
+
+
+def test_query_stream_error_frame_aborts_the_response():
+    lines = [
+        '{"queryId":"q1","columnNames":["USER_ID"],"columnTypes":["STRING"]}',
+        '["u1"]',
+        '{"@type":"generic_error","error_code":50000,"message":"Broker unavailable"}'
+    ]
+    
+    with pytest.raises(KsqlQueryError, match="Broker unavailable"):
+        list(iter_query_stream_batches(iter(lines), batch_size=10))
+
+
+def test_header_schema_gives_typed_named_columns():
+    schema = ksql_schema_to_arrow(
+        "`USER_ID` STRING KEY, `AMOUNT` DECIMAL(10, 2), `ITEMS` ARRAY<STRING>, "
+        "`ATTRS` MAP<STRING, INT>, `ADDRESS` STRUCT<`City` STRING, `Zip` INT>, "
+        "`CREATED_AT` TIMESTAMP, `DAY` DATE"
+    )
+    
+    assert schema.names == ["user_id", "amount", "items", "attrs", "address", "created_at", "day"]
+    assert schema.field("amount").type == pa.decimal128(10, 2)
+    assert schema.field("items").type == pa.list_(pa.string())
+    assert schema.field("attrs").type == pa.map_(pa.string(), pa.int32())
+    assert schema.field("address").type == pa.struct([("City", pa.string()), ("Zip", pa.int32())])
+    assert schema.field("created_at").type == pa.timestamp("ms")
+
+
+def test_json_values_are_converted_to_header_types():
+    schema = ksql_schema_to_arrow("`AMOUNT` DECIMAL(10, 2), `DAY` DATE, `AT` TIME, `RAW` BYTES")
+    
+    batch = build_record_batch([
+        [12.5, "2026-10-01", "08:30:00", "aGk="],
+        [None, None, None, None]
+    ], schema)
+    
+    assert batch.schema == schema
+    assert batch.column(0).to_pylist() == [Decimal("12.50"), None]
+    assert batch.column(1).to_pylist() == [date(2026, 10, 1), None]
+    assert batch.column(2).to_pylist() == [time(8, 30), None]
+    assert batch.column(3).to_pylist() == [b"hi", None]
+
+
+def test_rows_without_header_keep_inferred_types():
+    batch = build_record_batch([["u1", 1.0], ["u2", 2.0]])
+    
+    assert batch.schema.names == ["0", "1"]
+    assert batch.column(1).type == pa.float64()
+
+
+def test_client_from_config_pools_and_retries():
+    client = KsqlDBClient.from_config({
+        "host": "ksqldb", "port": 8088, "pool_size": 4, "max_retries": 2, "backoff_factor": 0.1
+    })
+    
+    adapter = client.session.get_adapter(f"{client.base_url}/query")
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 2
+    assert adapter.max_retries.backoff_factor == 0.1
+    assert set(adapter.max_retries.status_forcelist) == set(RETRY_STATUS_CODES)
+    assert "POST" in adapter.max_retries.allowed_methods
+    client.close()
+
+
+def test_queries_share_the_client_session(ksqldb):
+    ksqldb.columns = {"USER_ID": "STRING"}
+    ksqldb.rows = [(1, ["u1"]), (2, ["u2"])]
+    
+    assert ksqldb.client.execute_query("SELECT * FROM USERS") == [{"user_id": "u1"}, {"user_id": "u2"}]
+    assert ksqldb.client.get_table_data("USERS")["user_id"].tolist() == ["u1", "u2"]
+    assert ksqldb.queries == ["SELECT * FROM USERS", "SELECT * FROM USERS"]
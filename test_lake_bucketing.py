@@ -0,0 +1,54 @@
+"""
+Tests du bucketing par hash de clé
+"""
+from pathlib import Path
+
+import pyarrow as pa
+import pytest
+
+from lake_bucketing import bucket_file_path, bucket_ids, candidate_buckets, split_by_bucket
+
+
+def test_bucket_ids_are_stable_across_types():
+    ids = bucket_ids(pa.array(["42", "u1", None, ""]), 16)
+    
+    assert ids.tolist() == bucket_ids(pa.array(["42", "u1", None, ""]), 16).tolist()
+    assert bucket_ids(pa.array([42]), 16)[0] == ids[0]
+    assert ids[2] == ids[3]
+    assert all(0 <= bucket < 16 for bucket in ids)
+
+
+def test_split_keeps_each_key_in_one_bucket():
+    table = pa.table({
+        "user_id": [f"u{i % 20}" for i in range(200)],
+        "amount": [float(i) for i in range(200)]
+    })
+    
+    parts = split_by_bucket(table, "user_id", 4)
+    
+    assert sum(part.num_rows for part in parts.values()) == 200
+    owners = {}
+    for bucket, part in parts.items():
+        assert set(bucket_ids(part.column("user_id"), 4).tolist()) == {bucket}
+        for user_id in set(part.column("user_id").to_pylist()):
+            assert owners.setdefault(user_id, bucket) == bucket
+    # Ordre des lignes conservé dans chaque bucket
+    assert all(part.column("amount").to_pylist() == sorted(part.column("amount").to_pylist()) for part in parts.values())
+
+
+def test_candidate_buckets_follow_the_column_type():
+    expected = set(bucket_ids(pa.array(["7"]), 8).tolist())
+    
+    assert candidate_buckets([7], 8, pa.string()) == expected
+    assert candidate_buckets(["7"], 8) == expected
+
+
+def test_split_on_missing_column_fails():
+    with pytest.raises(ValueError, match="absente: user_id"):
+        split_by_bucket(pa.table({"amount": [1.0]}), "user_id", 4)
+
+
+def test_bucket_file_path():
+    assert bucket_file_path(Path("s/year=2026/month=10/day=01/data.parquet"), 3) == Path(
+        "s/year=2026/month=10/day=01/bucket=03/data.parquet"
+    )
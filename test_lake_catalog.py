@@ -0,0 +1,67 @@
+"""
+Tests du catalogue SQLite: reconstruction depuis les fichiers, listings et totaux indexés
+"""
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_lake_config import (
+    HOT_FILE_SUFFIX, get_date_partition_path, get_stream_path, get_table_path, get_version_partition_path
+)
+from lake_catalog import get_catalog, parse_partition
+from lake_tiering import write_hot_file
+
+
+def write_parquet(partition_path, name: str, rows: int):
+    partition_path.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.table({"user_id": [f"u{i}" for i in range(rows)]}), partition_path / name)
+
+
+def test_rebuild_catalogs_files_from_footers(lake):
+    stream = get_stream_path("transaction_stream")
+    write_parquet(get_date_partition_path(stream, 2026, 10, 1), "data_1.parquet", 10)
+    write_parquet(get_date_partition_path(stream, 2026, 10, 1), "data_2.parquet", 5)
+    write_parquet(get_date_partition_path(stream, 2026, 10, 2) / "bucket=03", "data_1.parquet", 7)
+    write_hot_file(pa.table({"user_id": ["u1", "u2"]}), get_date_partition_path(stream, 2026, 10, 3) / f"data{HOT_FILE_SUFFIX}")
+    # Fichier temporaire d'un écrivain: jamais catalogué
+    write_parquet(get_date_partition_path(stream, 2026, 10, 3), ".data.parquet.tmp.parquet", 3)
+    table = get_table_path("user_transaction_summary")
+    for version in (1, 2):
+        write_parquet(get_version_partition_path(table, version), "snapshot.parquet", 4)
+    
+    catalog = get_catalog()
+    assert catalog.rebuild() == 6
+    
+    assert catalog.list_feeds() == ["streams/transaction_stream", "tables/user_transaction_summary"]
+    totals = catalog.feed_totals(stream)
+    assert (totals["files"], totals["records"], totals["partitions"]) == (4, 24, 3)
+    partitions = {p["partition_path"]: p for p in catalog.list_partitions(stream)}
+    assert partitions["year=2026/month=10/day=01"]["records"] == 15
+    assert partitions["year=2026/month=10/day=02/bucket=03"]["bucket"] == 3
+    assert partitions["year=2026/month=10/day=03"]["hot_files"] == 1
+    assert [p["day"] for p in catalog.list_partitions(stream, before=date(2026, 10, 2))] == [1]
+    assert len(catalog.get_file_statistics(stream)) == 3
+    assert catalog.latest_version(table) == 2
+
+
+def test_rebuild_drops_files_that_no_longer_exist(lake):
+    stream = get_stream_path("transaction_stream")
+    partition_path = get_date_partition_path(stream, 2026, 10, 1)
+    write_parquet(partition_path, "data_1.parquet", 10)
+    write_parquet(partition_path, "data_2.parquet", 5)
+    catalog = get_catalog()
+    catalog.rebuild([stream])
+    
+    (partition_path / "data_1.parquet").unlink()
+    catalog.rebuild([stream])
+    
+    assert [f["file_name"] for f in catalog.list_files(stream)] == ["data_2.parquet"]
+    assert list(catalog.get_file_statistics(stream)) == [partition_path / "data_2.parquet"]
+
+
+def test_parse_partition():
+    assert parse_partition("year=2026/month=10/day=01/bucket=07") == {
+        "year": 2026, "month": 10, "day": 1, "version": None, "bucket": 7
+    }
+    assert parse_partition("version=v12")["version"] == 12
@@ -0,0 +1,92 @@
+"""
+Tests du clustering: ordre des lignes (sort, Z-order, Hilbert), re-clustering
+avec fichiers remplacés mis à la corbeille
+"""
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_lake_config import get_date_partition_path, get_stream_path
+from lake_catalog import get_catalog
+from lake_clustering import cluster_table, recluster_partition
+from lake_metadata import read_metadata, record_file_written
+from lake_trash import list_trash, restore
+
+
+def write_partition_file(base_path, partition_path, name: str, table: pa.Table):
+    """Écrit et enregistre un fichier Parquet de stream"""
+    file_path = partition_path / name
+    pq.write_table(table, file_path)
+    record_file_written(
+        base_path, base_path.name, "stream", "append", "date",
+        partition_path, file_path, table.num_rows, file_path.stat().st_size
+    )
+    return file_path
+
+
+def grid_table(side: int = 64) -> pa.Table:
+    """Grille side x side de points (x, y) dans un ordre aléatoire"""
+    x, y = np.meshgrid(np.arange(side), np.arange(side))
+    order = np.random.default_rng(0).permutation(side * side)
+    return pa.table({"x": x.ravel()[order], "y": y.ravel()[order]})
+
+
+def row_group_spans(table: pa.Table, column: str, row_group_size: int) -> float:
+    """Étendue moyenne (max - min) d'une colonne par row group"""
+    values = table.column(column).to_numpy()
+    groups = [values[i:i + row_group_size] for i in range(0, len(values), row_group_size)]
+    return float(np.mean([g.max() - g.min() for g in groups]))
+
+
+def test_sort_orders_rows_lexicographically():
+    clustered = cluster_table(grid_table(8), ["y", "x"], "sort")
+    
+    assert clustered.column("y").to_pylist() == sorted(clustered.column("y").to_pylist())
+    assert clustered.column("x").to_pylist()[:8] == list(range(8))
+
+
+@pytest.mark.parametrize("method", ["zorder", "hilbert"])
+def test_space_filling_curves_narrow_row_groups_on_both_columns(method):
+    table = grid_table()
+    
+    clustered = cluster_table(table, ["x", "y"], method)
+    
+    assert sorted(zip(*clustered.to_pydict().values())) == sorted(zip(*table.to_pydict().values()))
+    # 4 096 points en 16 row groups de 256: des carrés de 16 x 16 sur la grille 64 x 64
+    for column in ("x", "y"):
+        assert row_group_spans(clustered, column, 256) < 32 < row_group_spans(table, column, 256)
+
+
+def test_missing_cluster_column_keeps_the_table():
+    table = grid_table(4)
+    
+    assert cluster_table(table, ["z"], "zorder") is table
+
+
+def test_recluster_moves_replaced_files_to_trash(lake):
+    base_path = get_stream_path("transaction_stream")
+    partition_path = get_date_partition_path(base_path, 2026, 10, 1)
+    partition_path.mkdir(parents=True)
+    old_files = [
+        write_partition_file(base_path, partition_path, "data_1.parquet", pa.table({"user_id": ["u3", "u1"], "amount": [3.0, 1.0]})),
+        write_partition_file(base_path, partition_path, "data_2.parquet", pa.table({"user_id": ["u2", "u0"], "amount": [2.0, 0.0]}))
+    ]
+    
+    assert recluster_partition(base_path, partition_path, "transaction_stream", ["user_id"]) == 4
+    
+    files = get_catalog().list_files(base_path)
+    assert len(files) == 1 and files[0]["file_name"].endswith("_clustered.parquet")
+    clustered = pq.read_table(partition_path / files[0]["file_name"])
+    assert clustered.column("user_id").to_pylist() == ["u0", "u1", "u2", "u3"]
+    assert read_metadata(base_path)["total_records"] == 4
+    
+    # Les anciens fichiers ne sont pas supprimés: ils sont dans la corbeille
+    assert not any(f.exists() for f in old_files)
+    entries = list_trash()
+    assert sorted(e["original_path"].rsplit("/", 1)[-1] for e in entries) == ["data_1.parquet", "data_2.parquet"]
+    assert {e["reason"] for e in entries} == {"recluster"}
+    
+    restored = restore(entries[0]["entry"])
+    assert restored.exists()
+    assert len(get_catalog().list_files(base_path)) == 2
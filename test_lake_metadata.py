@@ -0,0 +1,95 @@
+"""
+Tests de la maintenance incrémentale de _metadata.json (compteurs, verrou, écriture atomique)
+"""
+import json
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_lake_config import get_date_partition_path, get_stream_path
+from lake_catalog import get_catalog
+from lake_metadata import (
+    METADATA_FILE, read_metadata, record_file_written, record_files_removed, record_partition_removed
+)
+
+
+def write_file(base_path, partition_path, name: str, rows: int):
+    """Écrit un fichier Parquet de rows lignes et l'enregistre; retourne (chemin, lignes, octets)"""
+    partition_path.mkdir(parents=True, exist_ok=True)
+    file_path = partition_path / name
+    pq.write_table(pa.table({"amount": [float(i) for i in range(rows)]}), file_path)
+    size_bytes = file_path.stat().st_size
+    record_file_written(
+        base_path, base_path.name, "stream", "append", "date",
+        partition_path, file_path, rows, size_bytes
+    )
+    return file_path, rows, size_bytes
+
+
+def test_concurrent_writers_keep_exact_counters(lake):
+    base_path = get_stream_path("transaction_stream")
+    written = []
+    
+    def writer(thread: int):
+        partition_path = get_date_partition_path(base_path, 2026, 10, 1 + thread % 2)
+        for index in range(10):
+            written.append(write_file(base_path, partition_path, f"data_{thread}_{index}.parquet", thread + 1))
+    
+    threads = [threading.Thread(target=writer, args=(thread,)) for thread in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    metadata = read_metadata(base_path)
+    assert metadata["total_files"] == 60
+    assert metadata["total_records"] == sum(entry[1] for entry in written) == 10 * (1 + 2 + 3 + 4 + 5 + 6)
+    assert metadata["total_size_bytes"] == sum(entry[2] for entry in written)
+    assert {p["path"]: p["files"] for p in metadata["partitions"]} == {
+        "year=2026/month=10/day=01": 30, "year=2026/month=10/day=02": 30
+    }
+    assert get_catalog().feed_totals(base_path)["records"] == metadata["total_records"]
+    
+    # Écriture atomique: pas de fichier temporaire laissé à côté des métadonnées
+    assert sorted(p.name for p in base_path.iterdir() if p.is_file()) == [".metadata.lock", METADATA_FILE]
+
+
+def test_removals_decrement_counters(lake):
+    base_path = get_stream_path("transaction_stream")
+    day1 = get_date_partition_path(base_path, 2026, 10, 1)
+    day2 = get_date_partition_path(base_path, 2026, 10, 2)
+    first = write_file(base_path, day1, "data_1.parquet", 10)
+    write_file(base_path, day1, "data_2.parquet", 20)
+    write_file(base_path, day2 / "bucket=00", "data_1.parquet", 5)
+    write_file(base_path, day2 / "bucket=01", "data_1.parquet", 7)
+    
+    record_files_removed(base_path, day1, [first])
+    metadata = read_metadata(base_path)
+    assert metadata["total_records"] == 32 and metadata["total_files"] == 3
+    assert next(p for p in metadata["partitions"] if p["path"].endswith("day=01"))["records"] == 20
+    
+    # Jour supprimé: ses buckets sont retirés avec lui
+    removed = record_partition_removed(base_path, day2)
+    assert removed["records"] == 12 and removed["files"] == 2
+    metadata = read_metadata(base_path)
+    assert metadata["total_records"] == 20 and metadata["total_files"] == 1
+    assert [p["path"] for p in metadata["partitions"]] == ["year=2026/month=10/day=01"]
+
+
+def test_legacy_metadata_size_in_mb_is_upgraded(lake):
+    base_path = get_stream_path("transaction_stream")
+    base_path.mkdir(parents=True)
+    with open(base_path / METADATA_FILE, "w") as f:
+        json.dump({
+            "source": base_path.name, "type": "stream", "storage_mode": "append", "partitioning": "date",
+            "total_records": 100, "total_size_mb": 1.0,
+            "partitions": [{"path": "year=2026/month=10/day=01", "records": 100, "size_mb": 1.0}]
+        }, f)
+    
+    _, _, size_bytes = write_file(base_path, get_date_partition_path(base_path, 2026, 10, 1), "data.parquet", 10)
+    
+    metadata = read_metadata(base_path)
+    assert metadata["total_records"] == 110
+    assert metadata["total_size_bytes"] == 1024 * 1024 + size_bytes
+    assert metadata["partitions"][0]["size_bytes"] == 1024 * 1024 + size_bytes
@@ -0,0 +1,128 @@
+"""
+Tests du lecteur du Data Lake (LakeReader): élagage des partitions, projection,
+filtres poussés vers le scan, versions des tables
+"""
+import shutil
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_lake_config import (
+    HOT_FILE_SUFFIX, get_date_partition_path, get_stream_path, get_table_path, get_version_partition_path
+)
+from lake_catalog import get_catalog
+from lake_metadata import record_file_written
+from lake_reader import LakeReader, parse_filter
+from lake_tiering import write_hot_file
+
+
+STREAM = "transaction_stream"
+TABLE = "user_transaction_summary"
+
+
+def add_file(base_path, partition_path, name: str, table: pa.Table, feed_type: str = "stream"):
+    """Écrit (Parquet ou Arrow selon le suffixe) et enregistre un fichier"""
+    partition_path.mkdir(parents=True, exist_ok=True)
+    file_path = partition_path / name
+    if name.endswith(HOT_FILE_SUFFIX):
+        write_hot_file(table, file_path)
+    else:
+        pq.write_table(table, file_path)
+    record_file_written(
+        base_path, base_path.name, feed_type,
+        "append" if feed_type == "stream" else "overwrite",
+        "date" if feed_type == "stream" else "version",
+        partition_path, file_path, table.num_rows, file_path.stat().st_size
+    )
+    return file_path
+
+
+@pytest.fixture
+def feeds(lake):
+    """Stream de 3 jours (le dernier dans le tier chaud) et table à 2 versions"""
+    stream = get_stream_path(STREAM)
+    for day in (1, 2):
+        add_file(stream, get_date_partition_path(stream, 2026, 10, day), "data.parquet", pa.table({
+            "user_id": [f"u{day}{i}" for i in range(10)],
+            "amount": [float(day * 100 + i) for i in range(10)]
+        }))
+    add_file(stream, get_date_partition_path(stream, 2026, 10, 3), f"data{HOT_FILE_SUFFIX}", pa.table({
+        "user_id": ["u30", "u31"], "amount": [300.0, 301.0]
+    }))
+    table = get_table_path(TABLE)
+    for version in (1, 2):
+        add_file(table, get_version_partition_path(table, version), "snapshot.parquet", pa.table({
+            "user_id": ["u1", "u2"], "total": [version * 10.0, version * 20.0]
+        }), "table")
+    return stream, table
+
+
+def test_date_range_reads_only_matching_partitions(feeds):
+    reader = LakeReader()
+    
+    dataset, remaining = reader.dataset(STREAM, start_date=date(2026, 10, 2), end_date=date(2026, 10, 2))
+    
+    assert remaining is None
+    assert [Path(f).parent.name for f in dataset.files] == ["day=02"]
+    assert reader.read_table(STREAM, start_date=date(2026, 10, 2)).num_rows == 12
+
+
+def test_projection_and_filters_across_both_tiers(feeds):
+    result = LakeReader().read_table(
+        STREAM, columns=["user_id"], filters=[("amount", ">=", 109.0), ("amount", "<", 301.0)]
+    )
+    
+    assert result.column_names == ["user_id"]
+    assert sorted(result.column("user_id").to_pylist()) == ["u19"] + [f"u2{i}" for i in range(10)] + ["u30"]
+
+
+def test_statistics_skip_files_without_candidate_rows(feeds):
+    dataset, _ = LakeReader().dataset(STREAM, filters=[("amount", ">", 150.0)])
+    
+    # Union Parquet + Arrow: seul le fichier Parquet du 2 est gardé
+    assert [Path(f).parent.name for f in dataset.children[0].files] == ["day=02"]
+
+
+def test_empty_result_keeps_the_projected_schema(feeds):
+    result = LakeReader().read_table(STREAM, columns=["amount"], filters=[("user_id", "==", "missing")])
+    
+    assert result.num_rows == 0 and result.column_names == ["amount"]
+
+
+def test_table_reads_latest_or_requested_versions(feeds):
+    reader = LakeReader()
+    
+    assert reader.read_table(TABLE).column("total").to_pylist() == [20.0, 40.0]
+    assert reader.read_table(TABLE, version=1).column("total").to_pylist() == [10.0, 20.0]
+    versions = reader.read_table(TABLE, all_versions=True).column("version").to_pylist()
+    assert sorted(versions) == ["v1", "v1", "v2", "v2"]
+
+
+def test_uncataloged_feed_is_pruned_by_partition_expression(feeds, lake):
+    stream, _ = feeds
+    copy = stream.parent / "legacy_stream"
+    shutil.copytree(stream, copy)
+    assert not get_catalog().has_feed(copy)
+    
+    result = LakeReader().read_table("legacy_stream", start_date=date(2026, 10, 2), columns=["user_id", "day"])
+    
+    assert result.num_rows == 12
+    assert set(result.column("day").to_pylist()) == {2, 3}
+
+
+def test_parse_filter():
+    assert parse_filter("user_id==42") == ("user_id", "==", 42)
+    assert parse_filter("amount>=99.5") == ("amount", ">=", 99.5)
+    assert parse_filter("currency='EUR'") == ("currency", "==", "EUR")
+    with pytest.raises(ValueError):
+        parse_filter("amount")
+
+
+def test_import_leaves_logging_configuration_to_the_host():
+    code = "import logging, lake_reader; assert not logging.getLogger().handlers"
+    subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent, check=True)
@@ -0,0 +1,84 @@
+"""
+Tests du SQL embarqué (DuckDB) sur les vues des streams et tables
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_lake_config import (
+    HOT_FILE_SUFFIX, get_date_partition_path, get_stream_path, get_table_path, get_version_partition_path
+)
+from lake_metadata import record_file_written
+from lake_sql import LakeSQL
+from lake_tiering import write_hot_file
+
+
+pytest.importorskip("duckdb")
+
+
+def add_file(base_path, partition_path, name: str, table: pa.Table, feed_type: str = "stream"):
+    """Écrit (Parquet ou Arrow selon le suffixe) et enregistre un fichier"""
+    partition_path.mkdir(parents=True, exist_ok=True)
+    file_path = partition_path / name
+    if name.endswith(HOT_FILE_SUFFIX):
+        write_hot_file(table, file_path)
+    else:
+        pq.write_table(table, file_path)
+    record_file_written(
+        base_path, base_path.name, feed_type,
+        "append" if feed_type == "stream" else "overwrite",
+        "date" if feed_type == "stream" else "version",
+        partition_path, file_path, table.num_rows, file_path.stat().st_size
+    )
+
+
+@pytest.fixture
+def lake_sql(lake):
+    stream = get_stream_path("transaction_stream")
+    add_file(stream, get_date_partition_path(stream, 2026, 10, 1), "data.parquet", pa.table({"user_id": ["u1", "u2"], "amount": [1.0, 2.0]}))
+    add_file(stream, get_date_partition_path(stream, 2026, 10, 2) / "bucket=01", "data.parquet", pa.table({"user_id": ["u3"], "amount": [3.0]}))
+    add_file(stream, get_date_partition_path(stream, 2026, 10, 3), f"data{HOT_FILE_SUFFIX}", pa.table({"user_id": ["u4"], "amount": [4.0]}))
+    table = get_table_path("user_transaction_summary")
+    for version, total in ((1, 10.0), (2, 20.0)):
+        add_file(table, get_version_partition_path(table, version), "snapshot.parquet", pa.table({"user_id": ["u1"], "total": [total]}), "table")
+    
+    engine = LakeSQL(cache_dir=lake / "_catalog" / "query_cache")
+    yield engine
+    engine.close()
+
+
+def test_views_union_parquet_buckets_and_hot_tier(lake_sql):
+    result = lake_sql.query(
+        "SELECT day, bucket, SUM(amount) AS amount FROM transaction_stream GROUP BY day, bucket ORDER BY day"
+    )
+    
+    assert result.to_pydict() == {"day": [1, 2, 3], "bucket": [None, 1, None], "amount": [3.0, 3.0, 4.0]}
+
+
+def test_table_view_reads_the_latest_version(lake_sql):
+    assert lake_sql.query("SELECT total FROM user_transaction_summary").to_pydict() == {"total": [20.0]}
+    assert lake_sql.query(
+        "SELECT version, total FROM user_transaction_summary_all_versions ORDER BY version"
+    ).to_pydict() == {"version": ["v1", "v2"], "total": [10.0, 20.0]}
+
+
+def test_cached_result_is_invalidated_when_files_change(lake_sql):
+    query = "SELECT COUNT(*) AS n FROM transaction_stream"
+    assert lake_sql.query(query).column("n").to_pylist() == [4]
+    assert len(list(lake_sql.cache_dir.glob("*.parquet"))) == 1
+    
+    stream = get_stream_path("transaction_stream")
+    add_file(stream, get_date_partition_path(stream, 2026, 10, 1), "data_2.parquet", pa.table({"user_id": ["u5"], "amount": [5.0]}))
+    lake_sql.register_views()
+    
+    assert lake_sql.query(query).column("n").to_pylist() == [5]
+    assert lake_sql.clear_cache() == 2
+
+
+def test_import_leaves_logging_configuration_to_the_host():
+    code = "import logging, lake_sql; assert not logging.getLogger().handlers"
+    subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent, check=True)
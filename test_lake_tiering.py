@@ -0,0 +1,104 @@
+"""
+Tests du tier chaud: partitions fermées, conversion en Parquet (enregistré),
+fichiers Arrow à la corbeille
+"""
+import os
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import lake_tiering
+from data_lake_config import HOT_FILE_SUFFIX, get_date_partition_path, get_stream_path
+from lake_catalog import get_catalog
+from lake_metadata import read_metadata, record_file_written
+from lake_tiering import (
+    convert_closed_partitions, convert_partition, is_partition_closed, read_hot_file, write_hot_file
+)
+from lake_trash import list_trash, move_to_trash
+
+
+@pytest.fixture
+def hot_partition(lake):
+    """Partition de stream de deux fichiers Arrow enregistrés (3 + 2 lignes)"""
+    base_path = get_stream_path("transaction_stream")
+    partition_path = get_date_partition_path(base_path, 2026, 10, 1)
+    partition_path.mkdir(parents=True)
+    for index, amounts in enumerate(([1.0, 2.0, 3.0], [4.0, 5.0])):
+        table = pa.table({"amount": amounts})
+        file_path = partition_path / f"data_{index}{HOT_FILE_SUFFIX}"
+        write_hot_file(table, file_path)
+        record_file_written(
+            base_path, base_path.name, "stream", "append", "date",
+            partition_path, file_path, table.num_rows, file_path.stat().st_size
+        )
+    return base_path, partition_path
+
+
+def test_convert_partition_moves_hot_files_to_trash(hot_partition):
+    base_path, partition_path = hot_partition
+    
+    assert convert_partition(base_path, partition_path, "transaction_stream") == 5
+    
+    files = get_catalog().list_files(base_path)
+    assert [f["file_name"].endswith("_cold.parquet") for f in files] == [True]
+    assert pq.read_table(partition_path / files[0]["file_name"]).num_rows == 5
+    assert read_metadata(base_path)["total_records"] == 5
+    
+    assert not list(partition_path.glob(f"*{HOT_FILE_SUFFIX}"))
+    assert sorted(e["original_path"].rsplit("/", 1)[-1] for e in list_trash()) == [
+        f"data_0{HOT_FILE_SUFFIX}", f"data_1{HOT_FILE_SUFFIX}"
+    ]
+    assert {e["reason"] for e in list_trash()} == {"tiering"}
+
+
+def test_interrupted_conversion_is_finished(hot_partition, monkeypatch):
+    base_path, partition_path = hot_partition
+    
+    def interrupted(path, base_path, reason=""):
+        raise OSError("conversion interrompue")
+    
+    monkeypatch.setattr(lake_tiering, "move_to_trash", interrupted)
+    with pytest.raises(OSError):
+        convert_partition(base_path, partition_path, "transaction_stream")
+    monkeypatch.setattr(lake_tiering, "move_to_trash", move_to_trash)
+    
+    # Parquet publié et enregistré, fichiers Arrow encore présents: la passe
+    # suivante termine la conversion sans compter les lignes deux fois
+    assert convert_partition(base_path, partition_path, "transaction_stream") == 0
+    
+    files = get_catalog().list_files(base_path)
+    assert [f["file_name"].endswith("_cold.parquet") for f in files] == [True]
+    assert read_metadata(base_path)["total_records"] == 5
+    assert len(list_trash()) == 2
+
+
+def test_only_closed_partitions_are_converted(hot_partition):
+    base_path, partition_path = hot_partition
+    files = sorted(partition_path.glob(f"*{HOT_FILE_SUFFIX}"))
+    last_write = datetime(2026, 10, 2, 0, 10).timestamp()
+    for file_path in files:
+        os.utime(file_path, (last_write, last_write))
+    
+    # Jour courant, puis écriture trop récente: partition encore ouverte
+    assert not is_partition_closed(partition_path, files, now=datetime(2026, 10, 1, 23, 0))
+    assert not is_partition_closed(partition_path, files, now=datetime(2026, 10, 2, 0, 20), grace_minutes=30)
+    assert is_partition_closed(partition_path, files, now=datetime(2026, 10, 2, 0, 40), grace_minutes=30)
+    
+    assert convert_closed_partitions(
+        "transaction_stream", now=datetime(2026, 10, 2, 0, 20), grace_minutes=30
+    ) == {"partitions": 0, "records": 0}
+    assert convert_closed_partitions(
+        "transaction_stream", now=datetime(2026, 10, 2, 0, 40), grace_minutes=30
+    ) == {"partitions": 1, "records": 5}
+
+
+def test_hot_file_round_trip(lake, tmp_path):
+    table = pa.table({"user_id": ["u1", "u2"], "amount": [1.0, 2.0]})
+    file_path = tmp_path / f"data{HOT_FILE_SUFFIX}"
+    
+    write_hot_file(table, file_path)
+    
+    assert read_hot_file(file_path).equals(table)
+    assert read_hot_file(file_path, ["amount"]).column_names == ["amount"]
@@ -0,0 +1,75 @@
+"""
+Tests des lectures à une version ou une date (time travel) des tables versionnées
+"""
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_lake_config import get_table_path, get_version_partition_path
+from lake_metadata import read_metadata, record_file_written, write_metadata
+from lake_time_travel import TimeTravelReader
+
+
+TABLE = "user_transaction_summary"
+
+
+def publish_version(version: int, total: float, exported_at: str):
+    """Publie une version d'une ligne et fixe sa date d'export dans les métadonnées"""
+    base_path = get_table_path(TABLE)
+    partition_path = get_version_partition_path(base_path, version)
+    partition_path.mkdir(parents=True)
+    file_path = partition_path / "snapshot.parquet"
+    pq.write_table(pa.table({"user_id": ["u1"], "total": [total]}), file_path)
+    record_file_written(
+        base_path, TABLE, "table", "overwrite", "version",
+        partition_path, file_path, 1, file_path.stat().st_size
+    )
+    metadata = read_metadata(base_path)
+    partition_key = str(partition_path.relative_to(base_path))
+    next(p for p in metadata["partitions"] if p["path"] == partition_key)["exported_at"] = exported_at
+    write_metadata(base_path, metadata)
+
+
+@pytest.fixture
+def versions(lake):
+    publish_version(1, 10.0, "2026-10-16T08:00:00")
+    publish_version(2, 20.0, "2026-10-17T08:00:00")
+
+
+def test_read_a_version_or_the_state_at_a_date(versions):
+    reader = TimeTravelReader()
+    
+    assert reader.dataset(TABLE).to_table().column("total").to_pylist() == [20.0]
+    assert reader.dataset(TABLE, version=1).to_table().column("total").to_pylist() == [10.0]
+    assert reader.resolve_version(TABLE, as_of=datetime(2026, 10, 16, 23, 59))["version"] == 1
+    assert reader.resolve_version(TABLE, as_of=datetime(2026, 10, 17, 8))["version"] == 2
+    
+    # as_of avec fuseau: comparé en heure locale
+    as_of = datetime(2026, 10, 16, 12).astimezone(timezone.utc)
+    assert reader.resolve_version(TABLE, as_of=as_of)["version"] == 1
+    
+    with pytest.raises(ValueError, match="v3 indisponible"):
+        reader.resolve_version(TABLE, version=3)
+    with pytest.raises(ValueError, match="exportée avant"):
+        reader.resolve_version(TABLE, as_of=datetime(2026, 10, 15))
+
+
+def test_resolution_index_follows_new_versions(versions):
+    reader = TimeTravelReader()
+    assert reader.resolve_files(TABLE)[0] == 2
+    
+    publish_version(3, 30.0, "2026-10-18T08:00:00")
+    
+    version, files = reader.resolve_files(TABLE)
+    assert version == 3
+    assert files == [str(get_version_partition_path(get_table_path(TABLE), 3) / "snapshot.parquet")]
+
+
+def test_import_leaves_logging_configuration_to_the_host():
+    code = "import logging, lake_time_travel; assert not logging.getLogger().handlers"
+    subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent, check=True)
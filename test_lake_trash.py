@@ -0,0 +1,103 @@
+"""
+Tests de la corbeille: mise à la corbeille par renommage, restauration
+(fichiers réenregistrés), purge après le délai de grâce, débit de suppression
+"""
+import time
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_lake_config import TRASH_DIR, get_date_partition_path, get_stream_path
+from lake_catalog import get_catalog
+from lake_metadata import read_metadata, record_file_written, record_partition_removed
+from lake_trash import DeleteThrottle, list_trash, move_to_trash, purge_trash, restore
+
+
+@pytest.fixture
+def partition(lake):
+    """Partition de stream de deux fichiers enregistrés (10 + 5 lignes)"""
+    base_path = get_stream_path("transaction_stream")
+    partition_path = get_date_partition_path(base_path, 2026, 10, 1)
+    partition_path.mkdir(parents=True)
+    for name, rows in (("data_1.parquet", 10), ("data_2.parquet", 5)):
+        file_path = partition_path / name
+        pq.write_table(pa.table({"amount": [float(i) for i in range(rows)]}), file_path)
+        record_file_written(
+            base_path, base_path.name, "stream", "append", "date",
+            partition_path, file_path, rows, file_path.stat().st_size
+        )
+    return base_path, partition_path
+
+
+def trash(base_path, partition_path) -> str:
+    """Supprime la partition comme la rétention: corbeille puis métadonnées"""
+    entry = move_to_trash(partition_path, base_path, "retention")
+    record_partition_removed(base_path, partition_path)
+    return entry.name
+
+
+def test_move_to_trash_renames_the_partition(partition):
+    base_path, partition_path = partition
+    
+    entry = trash(base_path, partition_path)
+    
+    assert not partition_path.exists()
+    assert sorted(p.name for p in (TRASH_DIR / entry / "day=01").iterdir()) == ["data_1.parquet", "data_2.parquet"]
+    [listed] = list_trash()
+    assert listed["entry"] == entry and listed["reason"] == "retention"
+    assert listed["original_path"] == "streams/transaction_stream/year=2026/month=10/day=01"
+    assert listed["feed_path"] == "streams/transaction_stream"
+    assert read_metadata(base_path)["total_records"] == 0
+
+
+def test_restore_registers_the_files_again(partition):
+    base_path, partition_path = partition
+    entry = trash(base_path, partition_path)
+    
+    assert restore(entry) == partition_path
+    
+    assert not list_trash()
+    assert read_metadata(base_path)["total_records"] == 15
+    assert sorted(f["file_name"] for f in get_catalog().list_files(base_path)) == ["data_1.parquet", "data_2.parquet"]
+
+
+def test_restore_refuses_an_occupied_location(partition):
+    base_path, partition_path = partition
+    entry = trash(base_path, partition_path)
+    partition_path.mkdir()
+    
+    with pytest.raises(ValueError):
+        restore(entry)
+    with pytest.raises(ValueError):
+        restore("inconnue")
+    assert len(list_trash()) == 1
+
+
+def test_purge_waits_for_the_grace_period(partition):
+    base_path, partition_path = partition
+    entry = trash(base_path, partition_path)
+    trashed_at = datetime.fromisoformat(list_trash()[0]["trashed_at"])
+    
+    assert purge_trash(grace_hours=24, now=trashed_at + timedelta(hours=23)) == {"entries": 0, "files": 0}
+    assert (TRASH_DIR / entry).exists()
+    
+    # Deux fichiers de données et le manifeste
+    assert purge_trash(grace_hours=24, now=trashed_at + timedelta(hours=25)) == {"entries": 1, "files": 3}
+    assert not (TRASH_DIR / entry).exists()
+
+
+def test_delete_throttle_limits_the_shared_rate():
+    throttle = DeleteThrottle(200)
+    start = time.monotonic()
+    
+    for _ in range(4):
+        throttle.wait(10)
+    
+    # Créneaux à 0, 50, 100 et 150 ms
+    assert time.monotonic() - start >= 0.14
+    
+    start = time.monotonic()
+    DeleteThrottle(None).wait(1000)
+    assert time.monotonic() - start < 0.05
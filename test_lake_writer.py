@@ -0,0 +1,126 @@
+"""
+Tests de la publication atomique des fichiers du Data Lake
+"""
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import lake_writer
+from data_lake_config import DEFAULT_PARQUET_OPTIONS
+from lake_writer import (
+    TMP_DIR, AtomicParquetWriter, atomic_path, cleanup_orphans, part_file_path, row_group_full,
+    row_group_rows, temp_path, write_parquet_atomic, write_parquet_parallel
+)
+
+
+TABLE = pa.table({"amount": [1.0, 2.0, 3.0]})
+
+
+def options(**overrides):
+    return {**DEFAULT_PARQUET_OPTIONS, **overrides}
+
+
+@pytest.fixture
+def partition_path(tmp_path):
+    return tmp_path / "streams" / "transaction_stream" / "year=2026" / "month=10" / "day=01"
+
+
+def test_temp_file_is_written_in_the_feed_tmp_dir(partition_path):
+    path = temp_path(partition_path / "data.parquet")
+    
+    assert path.parent == partition_path.parents[2] / TMP_DIR
+    assert path.name.startswith(".year=2026__month=10__day=01__data.parquet.")
+
+
+def test_failed_write_keeps_the_previous_file(partition_path):
+    file_path = partition_path / "data.parquet"
+    write_parquet_atomic(TABLE, file_path)
+    
+    with pytest.raises(RuntimeError):
+        with atomic_path(file_path) as tmp_path:
+            tmp_path.write_bytes(b"partiel")
+            raise RuntimeError("écrivain interrompu")
+    
+    assert pq.read_table(file_path).equals(TABLE)
+    assert not list((partition_path.parents[2] / TMP_DIR).iterdir())
+
+
+def test_streaming_writer_publishes_on_close_only(partition_path):
+    file_path = partition_path / "data.parquet"
+    
+    with pytest.raises(RuntimeError):
+        with AtomicParquetWriter(file_path, TABLE.schema) as writer:
+            writer.write_table(TABLE)
+            raise RuntimeError("export interrompu")
+    # Abandon: ni fichier, ni dossier de partition vide
+    assert not partition_path.exists()
+    
+    with AtomicParquetWriter(file_path, TABLE.schema) as writer:
+        writer.write_table(TABLE)
+        assert not file_path.exists()
+    assert pq.read_table(file_path).equals(TABLE)
+
+
+def test_row_groups_follow_the_feed_option_or_the_byte_target(monkeypatch):
+    monkeypatch.setattr(lake_writer, "TARGET_ROW_GROUP_BYTES", TABLE.nbytes)
+    
+    assert row_group_rows(TABLE, {"row_group_size": 2}) == 2
+    assert row_group_rows(TABLE, {}) == 3
+    assert row_group_full(2, 0, {"row_group_size": 2})
+    assert not row_group_full(1000, TABLE.nbytes - 1, {})
+
+
+def test_parallel_write_splits_in_order(partition_path, monkeypatch):
+    monkeypatch.setattr(lake_writer, "PARALLEL_WRITE_MIN_ROWS", 100)
+    table = pa.table({"amount": [float(i) for i in range(1000)]})
+    file_path = partition_path / "snapshot.parquet"
+    
+    written = write_parquet_parallel(table, file_path, options(row_group_size=100), workers=3)
+    
+    assert list(written) == [part_file_path(file_path, index) for index in range(3)]
+    assert list(written.values()) == [400, 400, 200]
+    assert not file_path.exists()
+    parts = [pq.ParquetFile(path) for path in written]
+    assert [part.metadata.num_row_groups for part in parts] == [4, 4, 2]
+    assert pa.concat_tables(part.read() for part in parts).equals(table)
+    
+    # Sous le seuil: un seul fichier, mêmes row groups
+    small = table.slice(0, 99)
+    assert write_parquet_parallel(small, file_path, options(row_group_size=50), workers=3) == {file_path: 99}
+    assert pq.ParquetFile(file_path).metadata.num_row_groups == 2
+
+
+def test_failed_part_unpublishes_the_others(partition_path, monkeypatch):
+    monkeypatch.setattr(lake_writer, "PARALLEL_WRITE_MIN_ROWS", 100)
+    table = pa.table({"amount": [float(i) for i in range(300)]})
+    file_path = partition_path / "snapshot.parquet"
+    
+    def failing_write(part, path, **kwargs):
+        if path.name.endswith("part001.parquet"):
+            raise OSError("disque plein")
+        write_parquet_atomic(part, path, **kwargs)
+    
+    monkeypatch.setattr(lake_writer, "write_parquet_atomic", failing_write)
+    with pytest.raises(OSError):
+        write_parquet_parallel(table, file_path, options(row_group_size=100), workers=3)
+    
+    assert not list(partition_path.glob("*.parquet"))
+
+
+def test_cleanup_removes_only_old_orphans(tmp_path):
+    tmp_dir = tmp_path / "streams" / "transaction_stream" / TMP_DIR
+    tmp_dir.mkdir(parents=True)
+    old = tmp_dir / ".data.parquet.1.1.tmp"
+    recent = tmp_dir / ".data.parquet.2.1.tmp"
+    other = tmp_dir / "notes.txt"
+    for path in (old, recent, other):
+        path.write_bytes(b"x")
+    two_hours_ago = time.time() - 2 * 3600
+    os.utime(old, (two_hours_ago, two_hours_ago))
+    os.utime(other, (two_hours_ago, two_hours_ago))
+    
+    assert cleanup_orphans([tmp_path / "streams", tmp_path / "tables"], max_age_minutes=60) == 1
+    assert not old.exists() and recent.exists() and other.exists()
@@ -0,0 +1,153 @@
+"""
+Tests des utilitaires de métadonnées: parcours des partitions en cache, recomptage
+par footers, élagage par statistiques et par bloom filters
+"""
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_lake_config import get_date_partition_path, get_stream_path, parquet_writer_supports
+from lake_catalog import get_catalog
+from lake_metadata import METADATA_FILE, record_file_written
+import metadata_utils
+from metadata_utils import BloomFilterLookup, FooterVerifier, PartitionScanner, StatisticsPruner
+
+
+def write_stream_file(base_path, day: int, table: pa.Table, row_group_size: int = 25, **kwargs):
+    """Écrit et enregistre (métadonnées, catalogue, statistiques) un fichier de stream"""
+    partition_path = get_date_partition_path(base_path, 2026, 10, day)
+    partition_path.mkdir(parents=True, exist_ok=True)
+    file_path = partition_path / "data.parquet"
+    pq.write_table(table, file_path, row_group_size=row_group_size, **kwargs)
+    record_file_written(
+        base_path, base_path.name, "stream", "append", "date",
+        partition_path, file_path, table.num_rows, file_path.stat().st_size
+    )
+    return file_path
+
+
+@pytest.fixture
+def stream(lake):
+    """Stream de 3 jours de 100 lignes, montants disjoints d'un jour à l'autre"""
+    base_path = get_stream_path("transaction_stream")
+    for day in (1, 2, 3):
+        write_stream_file(base_path, day, pa.table({
+            "user_id": [f"u{day}{i:02d}" for i in range(100)],
+            "amount": [float(day * 100 + i) for i in range(100)],
+            "currency": ["EUR"] * 100
+        }))
+    return base_path
+
+
+def test_recount_keeps_file_statistics(stream):
+    catalog = get_catalog()
+    assert len(catalog.get_file_statistics(stream)) == 3
+    
+    # Métadonnées perdues: le recomptage les réécrit, ainsi que le catalogue
+    (stream / METADATA_FILE).unlink()
+    report = FooterVerifier().verify_feed(stream, update=True)
+    
+    assert report["updated"] and report["records"] == 300
+    assert len(catalog.get_file_statistics(stream)) == 3
+
+
+def test_recount_drops_statistics_of_missing_files(stream):
+    missing = get_date_partition_path(stream, 2026, 10, 2) / "data.parquet"
+    missing.unlink()
+    
+    FooterVerifier().verify_feed(stream, update=True)
+    
+    statistics = get_catalog().get_file_statistics(stream)
+    assert len(statistics) == 2 and missing not in statistics
+
+
+def test_read_filtered_prunes_row_groups(stream):
+    selected = StatisticsPruner.select_row_groups(stream, [("amount", ">=", 260.0)])
+    
+    assert {str(path.relative_to(stream)): row_groups for path, row_groups in selected.items()} == {
+        "year=2026/month=10/day=02/data.parquet": [2, 3],
+        "year=2026/month=10/day=03/data.parquet": [0, 1, 2, 3]
+    }
+    assert len(StatisticsPruner.read_filtered(stream, [("amount", ">=", 260.0)])) == 140
+
+
+def test_read_filtered_on_a_column_that_is_not_projected(stream):
+    df = StatisticsPruner.read_filtered(stream, [("amount", "<", 103.0)], columns=["user_id"])
+    
+    assert list(df.columns) == ["user_id"]
+    assert df["user_id"].tolist() == ["u100", "u101", "u102"]
+
+
+def test_partition_scan_is_cached_by_directory_mtime(lake, monkeypatch):
+    base_path = get_stream_path("transaction_stream")
+    for day in (1, 2):
+        partition_path = get_date_partition_path(base_path, 2026, 10, day)
+        partition_path.mkdir(parents=True)
+        pq.write_table(pa.table({"amount": [1.0]}), partition_path / "data.parquet")
+    (get_date_partition_path(base_path, 2026, 10, 3) / "bucket=02").mkdir(parents=True)
+    pq.write_table(pa.table({"amount": [1.0]}), get_date_partition_path(base_path, 2026, 10, 3) / "bucket=02" / "data.parquet")
+    cache_file = lake / "_catalog" / "scan_cache.json"
+    
+    partitions = PartitionScanner(workers=2, cache_file=cache_file).scan_feed(base_path)
+    assert [(p["day"], p.get("bucket"), p["files_count"]) for p in partitions] == [(1, None, 1), (2, None, 1), (3, 2, 1)]
+    assert cache_file.exists()
+    
+    # Nouveau processus: le cache persisté évite tout scandir des dossiers inchangés
+    scanned = []
+    scandir = os.scandir
+    monkeypatch.setattr(metadata_utils.os, "scandir", lambda path: scanned.append(path) or scandir(path))
+    assert PartitionScanner(workers=2, cache_file=cache_file).scan_feed(base_path) == partitions
+    assert scanned == []
+    
+    # Un fichier ajouté modifie le mtime du dossier: seule sa partition est reparcourue
+    day2 = get_date_partition_path(base_path, 2026, 10, 2)
+    pq.write_table(pa.table({"amount": [2.0]}), day2 / "data_2.parquet")
+    partitions = PartitionScanner(workers=2, cache_file=cache_file).scan_feed(base_path)
+    assert set(scanned) == {str(day2)}
+    assert [p["files_count"] for p in partitions] == [1, 2, 1]
+
+
+def test_verify_reports_mismatches_and_recount_fixes_them(stream):
+    day2 = get_date_partition_path(stream, 2026, 10, 2)
+    pq.write_table(pa.table({"user_id": ["x"], "amount": [0.0], "currency": ["EUR"]}), day2 / "extra.parquet")
+    (get_date_partition_path(stream, 2026, 10, 1) / "broken.parquet").write_bytes(b"not parquet")
+    
+    report = FooterVerifier().verify_feed(stream)
+    
+    assert report["records"] == 301 and report["recorded_records"] == 300
+    issues = {(m["partition"], m["issue"]) for m in report["mismatches"]}
+    assert issues == {
+        ("year=2026/month=10/day=02", "lignes"),
+        ("year=2026/month=10/day=02", "octets"),
+        ("year=2026/month=10/day=01", "fichiers illisibles")
+    }
+    assert len(report["schema_fingerprints"]) == 1
+    assert "updated" not in report
+    
+    assert FooterVerifier().verify_feed(stream, update=True)["updated"]
+    
+    report = FooterVerifier().verify_feed(stream)
+    assert report["recorded_records"] == 301
+    assert [m["issue"] for m in report["mismatches"]] == ["fichiers illisibles"]
+    assert get_catalog().feed_totals(stream)["records"] == 301
+
+
+@pytest.mark.skipif(not parquet_writer_supports("bloom_filter_options"), reason="pyarrow sans bloom filters")
+def test_lookup_reads_only_row_groups_whose_bloom_filter_matches(lake):
+    base_path = get_stream_path("transaction_stream")
+    # Identifiants entrelacés: les min/max des row groups ne permettent aucun élagage
+    file_path = write_stream_file(base_path, 1, pa.table({
+        "user_id": [f"u{(i % 4) * 100 + i // 4:03d}" for i in range(400)],
+        "account": pa.array([(i % 4) * 1000 + i // 4 for i in range(400)], type=pa.int32())
+    }), row_group_size=100, bloom_filter_options={"user_id": True, "account": True})
+    assert StatisticsPruner.select_row_groups(base_path, [("user_id", "in", ["u205"])]) == {file_path: [0, 1, 2, 3]}
+    
+    assert BloomFilterLookup.candidate_row_groups(base_path, "user_id", ["u205"]) == {file_path: [0]}
+    df = BloomFilterLookup.lookup(base_path, "user_id", ["u205", "u399"], columns=["account"])
+    assert sorted(df["account"].tolist()) == [2005, 3099]
+    
+    # Entier hors de la plage INT32: absent, sans erreur de conversion
+    assert BloomFilterLookup.candidate_row_groups(base_path, "account", [2 ** 40]) == {}
+    assert BloomFilterLookup.lookup(base_path, "account", [3099, 2 ** 40])["user_id"].tolist() == ["u399"]
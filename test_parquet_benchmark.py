@@ -0,0 +1,30 @@
+"""
+Tests du banc d'essai des codecs Parquet
+"""
+import pyarrow as pa
+
+from parquet_benchmark import best_result, format_results, parse_codec, run_benchmark
+
+
+def test_parse_codec():
+    assert parse_codec("zstd:3") == {"compression": "zstd", "compression_level": 3}
+    assert parse_codec("snappy") == {"compression": "snappy", "compression_level": None}
+
+
+def test_benchmark_measures_every_combination():
+    table = pa.table({
+        "currency": ["EUR", "USD"] * 5000,
+        "amount": [float(i % 100) for i in range(10_000)]
+    })
+    
+    results = run_benchmark(table, ["snappy", "zstd:9"], [True, False], [5000], [65536], repeat=1)
+    
+    assert len(results) == 4
+    assert all(r["size_bytes"] > 0 and r["write_mb_s"] > 0 and r["read_mb_s"] > 0 for r in results)
+    smallest = best_result(results, "size")
+    assert smallest["size_bytes"] == min(r["size_bytes"] for r in results)
+    assert best_result(results, "balanced") in results
+    
+    # Tableau trié par taille: la plus petite combinaison en premier
+    first_row = format_results(results, table.nbytes).splitlines()[2]
+    assert f"{smallest['size_bytes'] / 1024:,.0f}" in first_row
@@ -0,0 +1,42 @@
+"""
+Tests de la lecture des bloom filters Parquet écrits par pyarrow
+"""
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_lake_config import parquet_writer_supports
+from parquet_bloom import might_contain, plain_encode, read_bitset, xxh64
+
+
+def test_xxh64_reference_values():
+    assert xxh64(b"") == 0xEF46DB3751D8E999
+    assert xxh64(b"abc") == 0x44BC2CF5AD770999
+    assert xxh64(b"Nobody inspects the spammish repetition") == 0xFBCEA83C8A378BF1
+
+
+def test_plain_encode_out_of_range_values():
+    assert plain_encode(2 ** 31, "INT32") is None
+    assert plain_encode(2 ** 31, "INT64") == (2 ** 31).to_bytes(8, "little")
+    assert plain_encode("u1", "BYTE_ARRAY") == b"u1"
+    assert plain_encode(True, "INT32") is None
+
+
+@pytest.mark.skipif(not parquet_writer_supports("bloom_filter_options"), reason="pyarrow sans bloom filters")
+def test_bitset_contains_written_values(tmp_path):
+    file_path = tmp_path / "data.parquet"
+    table = pa.table({
+        "user_id": [f"u{i}" for i in range(1000)],
+        "account": pa.array(range(1000), type=pa.int32())
+    })
+    pq.write_table(table, file_path, bloom_filter_options={"user_id": True, "account": True})
+    
+    metadata = pq.ParquetFile(file_path).metadata
+    with open(file_path, "rb") as source:
+        user_ids = read_bitset(source, metadata.row_group(0).column(0))
+        accounts = read_bitset(source, metadata.row_group(0).column(1))
+    
+    # Jamais de faux négatif, peu de faux positifs
+    assert all(might_contain(user_ids, xxh64(f"u{i}".encode())) for i in range(1000))
+    assert all(might_contain(accounts, xxh64(plain_encode(i, "INT32"))) for i in range(1000))
+    assert sum(might_contain(user_ids, xxh64(f"x{i}".encode())) for i in range(1000)) < 50